@@ -8,6 +8,7 @@ from pysnptools.distreader.distdata import DistData  # noqa: F401, E402
 from pysnptools.distreader.distnpz import DistNpz  # noqa: F401, E402
 from pysnptools.distreader.disthdf5 import DistHdf5  # noqa: F401, E402
 from pysnptools.distreader.distmemmap import DistMemMap  # noqa: F401, E402
+from pysnptools.distreader.distchunked import DistChunked  # noqa: F401, E402
 from pysnptools.distreader.bgen import Bgen  # noqa: F401, E402
 from pysnptools.distreader.distgen import DistGen  # noqa: F401, E402
 from pysnptools.distreader._distmergesids import _DistMergeSIDs  # noqa: F401, E402
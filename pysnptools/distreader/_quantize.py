@@ -0,0 +1,75 @@
+import numpy as np
+
+
+# A distribution is stored as its first two probabilities, each quantized to an unsigned integer from 0 to
+# 'scale' (the integer type's max minus 1). The third probability is 'scale' minus the other two.
+# The integer type's max marks a missing distribution.
+
+
+def _is_quantized_dtype(dtype):
+    dtype = np.dtype(dtype)
+    return dtype == np.uint8 or dtype == np.uint16
+
+
+def _round_to_scale(val, scale):
+    """
+    Returns (rounded, missing). 'rounded' is a float64 array of integer values with the shape of val. Each
+    distribution (the last dimension) is normalized and rounded so that its values sum to exactly 'scale'.
+    'missing' tells which distributions have a NaN (or sum to 0). Their 'rounded' values are meaningless.
+    """
+    val = np.asarray(val, dtype=np.float64)
+    total = val.sum(axis=-1, keepdims=True)
+    missing = ~(total[..., 0] > 0)  # also True for NaN
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scaled = val * (scale / total)
+    floor = np.floor(scaled)
+    # Round up the values with the largest remainders, just enough to make the sum 'scale'
+    short = scale - floor.sum(axis=-1, keepdims=True)
+    rank = np.argsort(np.argsort(floor - scaled, axis=-1), axis=-1)
+    return floor + (rank < short), missing
+
+
+def _quantize(val, dtype):
+    """
+    Returns an array of shape val.shape[:-1]+(2,) and the given unsigned integer dtype that approximates the
+    distributions (the last dimension, of size 3) in val. Each distribution is normalized and rounded so that
+    its three quantized values sum to exactly 'scale'. Distributions with a NaN (or that sum to 0) are marked missing.
+    """
+    dtype = np.dtype(dtype)
+    assert _is_quantized_dtype(dtype), "Expect dtype to be uint8 or uint16"
+    missing_code = np.iinfo(dtype).max
+    rounded, missing = _round_to_scale(val, missing_code - 1)
+
+    quantized = np.empty(rounded.shape[:-1] + (2,), dtype=dtype)
+    quantized[...] = np.where(missing[..., np.newaxis], missing_code, rounded[..., :2])
+    return quantized
+
+
+def _from_scale(first_two, scale, missing, dtype, order="C"):
+    """
+    The inverse of '_round_to_scale'. Returns a new array of distributions (with a last dimension of size 3) with the
+    given dtype and order from the integer values of the first two probabilities (the last dimension of 'first_two').
+    Distributions marked by 'missing' are NaN.
+    """
+    dtype = np.dtype(dtype)
+    # float16 can't hold 'scale' for uint16, so work in at least float32
+    work_dtype = np.float64 if dtype == np.float64 else np.float32
+
+    first = first_two[..., 0].astype(work_dtype)
+    second = first_two[..., 1].astype(work_dtype)
+    val = np.empty(first_two.shape[:-1] + (3,), dtype=dtype, order=order)
+    val[..., 0] = first / scale
+    val[..., 1] = second / scale
+    val[..., 2] = (scale - first - second) / scale
+    val[missing] = np.nan
+    return val
+
+
+def _dequantize(quantized, dtype, order):
+    """
+    Returns a new array of distributions (with a last dimension of size 3) with the given dtype and order.
+    """
+    missing_code = np.iinfo(quantized.dtype).max
+    return _from_scale(
+        quantized, missing_code - 1, quantized[..., 0] == missing_code, dtype, order
+    )
@@ -4,3 +4,30 @@ from pysnptools.pstreader._subset import _PstSubset
 class _DistSubset(_PstSubset,DistReader):
     def __init__(self, *args, **kwargs):
         super(_DistSubset, self).__init__(*args, **kwargs)
+
+    def _read_snp_into(
+        self,
+        iid_index_or_none,
+        sid_index_or_none,
+        max_weight,
+        hard_call,
+        out,
+        force_python_only,
+        num_threads,
+    ):
+        # Push the subset down, so that, for example, a subset of a Bgen still decodes straight to expected values
+        iid_index_or_none = _PstSubset.compose_indexer_with_index_or_none(
+            self._internal.row_count, self._row_indexer, self.row_count, iid_index_or_none
+        )
+        sid_index_or_none = _PstSubset.compose_indexer_with_index_or_none(
+            self._internal.col_count, self._col_indexer, self.col_count, sid_index_or_none
+        )
+        self._internal._read_snp_into(
+            iid_index_or_none,
+            sid_index_or_none,
+            max_weight,
+            hard_call,
+            out,
+            force_python_only,
+            num_threads,
+        )
@@ -7,6 +7,7 @@ from pathlib import Path
 try:
     from bgen_reader import open_bgen, example_filepath
     from bgen_reader._multimemmap import MultiMemMap
+    from cbgen import bgen_file
 
     BGEN_READER_AVAILABLE = True
 except ImportError:
@@ -14,9 +15,15 @@ except ImportError:
 from pysnptools.util import log_in_place
 import shutil
 import math
-import subprocess
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pysnptools.util as pstutil
+from pysnptools.util import _memory_budget_bytes
 from pysnptools.distreader import DistReader
+from pysnptools.distreader._quantize import _round_to_scale, _from_scale
 from bed_reader import get_num_threads
 
 
@@ -116,6 +123,10 @@ class Bgen(DistReader):
                      * **fresh_properties** (optional, bool) -- When true (default), memory will be allocated for the iid, sid, and
                        pos properties. This is safe. When false, the properties will use the Bgen's on-disk 'memmap'. That saves
                        memory, but is only safe if the Bgen object is still around when the properties are used.
+                     * **cache_size** (optional, number or string) -- The most memory, as a number of bytes or a string such as "500MB",
+                       with which to cache decompressed SNP data. (Default: "64MB".) When reading a subset of the individuals,
+                       Bgen decodes just their probabilities from each SNP's decompressed data, so repeated reads of the same SNPs
+                       (for example, of cases and then of controls) decompress each SNP just once.
 
         :Example:
 
@@ -138,6 +149,7 @@ class Bgen(DistReader):
         sample=None,
         num_threads=None,
         fresh_properties=True,
+        cache_size="64MB",
     ):
         super(Bgen, self).__init__()
         self._ran_once = False
@@ -148,6 +160,7 @@ class Bgen(DistReader):
         self._sample = sample
         self._num_threads = num_threads
         self._fresh_properties = fresh_properties
+        self._cache_size = _memory_budget_bytes(cache_size)
 
     @property
     def row(self):
@@ -223,94 +236,13 @@ class Bgen(DistReader):
         ), "expect data to be unphased"
 
         if self._col_property_key not in self._open_bgen._metadata2_memmaps:
-            logging.info("Extending metadata file with PySnpTools metadata")
             assert (
                 self._default_iid_key not in self._open_bgen._metadata2_memmaps
                 and self._default_sid_key not in self._open_bgen._metadata2_memmaps
             ), "real assert"
-            metadata2_temp = self._open_bgen._metadata2_path.parent / (
-                self._open_bgen._metadata2_path.name + ".temp"
-            )
-            if metadata2_temp.exists():
-                metadata2_temp.unlink()
             metadata2_path = self._open_bgen._metadata2_path
             del self._open_bgen
-            shutil.copy(metadata2_path, metadata2_temp)
-            with MultiMemMap(metadata2_temp, mode="r+") as metadata2_memmaps:
-                samples = metadata2_memmaps["samples"]
-                row = metadata2_memmaps.append_empty(
-                    self._default_iid_key,
-                    shape=(len(samples), 2),
-                    dtype=str(samples.dtype),
-                )
-                if len(samples) == 0 or "," not in samples[0]:
-                    logging.info(
-                        "No comma in first sample, so extending metadata file with 'no-comma' default iids"
-                    )
-                    row[:, 0] = "0"
-                    row[:, 1] = samples
-                else:
-                    # Later: Do this in chunks of size about len(samples) using old np.stack(np.core.defchararray.split(samples,',',maxsplit=2)) code (see pre 8/1/2020 code)
-                    with log_in_place(
-                        "splitting samples on commas", logging.INFO
-                    ) as updater:
-                        for i, val in enumerate(samples):
-                            if i % 1000 == 0:
-                                updater(f"{i:,} of {len(samples):,}")
-                            row[i, :] = default_iid_function(val)
-                col_property = metadata2_memmaps.append_empty(
-                    self._col_property_key,
-                    shape=(len(metadata2_memmaps["ids"]), 3),
-                    dtype="float",
-                )
-                col_property[:, 2] = metadata2_memmaps["positions"]
-                # Do something fast if all numbers
-                try:
-                    col_property[:, 0] = metadata2_memmaps["chromosomes"]
-                except Exception:
-                    # If that doesn't work, do something slow
-                    with log_in_place(
-                        "converting chromosomes strings to numbers, one at a time",
-                        logging.INFO,
-                    ) as updater:
-                        for i, val in enumerate(metadata2_memmaps["chromosomes"]):
-                            if i % 1000 == 0:
-                                updater(f"{i:,} of {len(col_property):,}")
-                            try:
-                                col_property[i, 0] = int(val)
-                            except Exception:
-                                col_property[i, 0] = 0
-
-                rsid_list = metadata2_memmaps["rsids"]
-                id_list = metadata2_memmaps["ids"]
-                assert str(rsid_list.dtype).startswith("<U") and str(
-                    id_list.dtype
-                ).startswith("<U"), "real assert"
-                if _all_equal_in_parts(rsid_list, "0") or _all_equal_in_parts(
-                    rsid_list, ""
-                ):
-                    col = metadata2_memmaps.append_empty(
-                        self._default_sid_key,
-                        shape=len(metadata2_memmaps["ids"]),
-                        dtype=str(id_list.dtype),
-                    )
-                    col[:] = id_list
-                else:
-                    max_length = (
-                        int(str(rsid_list.dtype)[2:]) + 1 + int(str(id_list.dtype)[2:])
-                    )
-                    col = metadata2_memmaps.append_empty(
-                        self._default_sid_key,
-                        shape=len(metadata2_memmaps["ids"]),
-                        dtype=f"<U{max_length}",
-                    )
-                    for _, _, start, end in _parts(len(col)):
-                        col[start:end] = np.char.add(
-                            np.char.add(id_list[start:end], ","), rsid_list[start:end]
-                        )
-
-            metadata2_path.unlink()
-            shutil.copy(metadata2_temp, metadata2_path)
+            self._extend_metadata(metadata2_path)
             self._open_bgen = open_bgen(self.filename, self._sample, verbose=verbose)
         else:
             assert (
@@ -322,8 +254,205 @@ class Bgen(DistReader):
         self._col = self._apply_sid_function(self._open_bgen.ids, self._open_bgen.rsids)
         self._col_property = self._open_bgen._metadata2_memmaps[self._col_property_key]
         self._assert_iid_sid_pos(check_val=False)
+        self._decompress = _layout2_decompressor(self.filename)
+        self._file_bytes = (
+            np.memmap(self.filename, dtype=np.uint8, mode="r")
+            if self._decompress is not None
+            else None
+        )
+        self._block_cache = _BlockCache(self._cache_size)
         self._ran_once = True
 
+    _progress_key = "_pysnptools_progress"
+    _metadata_chunk_size = 100_000
+
+    def _extend_metadata(self, metadata2_path):
+        # The work is done in a '.temp' copy of the metadata file, in chunks. After each chunk, the
+        # progress is saved in the copy, so if this is interrupted, the next call continues from there.
+        metadata2_temp = metadata2_path.parent / (metadata2_path.name + ".temp")
+        stat = metadata2_path.stat()
+        source_stamp = [stat.st_size, stat.st_mtime_ns]
+
+        metadata2_memmaps = self._open_partial_metadata(metadata2_temp, source_stamp)
+        if metadata2_memmaps is None:
+            logging.info("Extending metadata file with PySnpTools metadata")
+            if metadata2_temp.exists():
+                metadata2_temp.unlink()
+            shutil.copy(metadata2_path, metadata2_temp)
+            metadata2_memmaps = MultiMemMap(metadata2_temp, mode="r+")
+            self._append_empty_metadata(metadata2_memmaps, source_stamp)
+        else:
+            logging.info(
+                "Resuming the extension of metadata file with PySnpTools metadata"
+            )
+
+        with metadata2_memmaps:
+            samples = metadata2_memmaps["samples"]
+            row = metadata2_memmaps[self._default_iid_key]
+            chromosomes = metadata2_memmaps["chromosomes"]
+            positions = metadata2_memmaps["positions"]
+            col_property = metadata2_memmaps[self._col_property_key]
+            rsid_list = metadata2_memmaps["rsids"]
+            id_list = metadata2_memmaps["ids"]
+            col = metadata2_memmaps[self._default_sid_key]
+
+            def split_samples(start, end):
+                sample_chunk = samples[start:end]
+                if len(samples) == 0 or "," not in samples[0]:
+                    # No comma in first sample, so use 'no-comma' default iids
+                    row[start:end, 0] = "0"
+                    row[start:end, 1] = sample_chunk
+                else:
+                    # Vectorized version of default_iid_function
+                    one_comma = np.char.count(sample_chunk, ",") == 1
+                    parts = np.char.partition(sample_chunk, ",")
+                    row[start:end, 0] = np.where(one_comma, parts[:, 0], "0")
+                    row[start:end, 1] = np.where(one_comma, parts[:, 2], sample_chunk)
+
+            def unique_chromosomes(start_end):
+                start, end = start_end
+                return np.unique(chromosomes[start:end])
+
+            def fill_sids(start, end):
+                if col.dtype == id_list.dtype:  # All rsids are '0' or ''
+                    col[start:end] = id_list[start:end]
+                else:
+                    col[start:end] = np.char.add(
+                        np.char.add(id_list[start:end], ","), rsid_list[start:end]
+                    )
+
+            num_threads = get_num_threads(self._num_threads)
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                self._fill_in_chunks(
+                    metadata2_memmaps,
+                    executor,
+                    0,
+                    len(samples),
+                    split_samples,
+                    "splitting samples on commas",
+                )
+
+                # There are few distinct chromosomes, so convert each to a number just once
+                chromosome_list = np.unique(
+                    np.concatenate(
+                        [np.empty(0, dtype=chromosomes.dtype)]
+                        + list(
+                            executor.map(
+                                unique_chromosomes,
+                                _chunks(len(chromosomes), self._metadata_chunk_size),
+                            )
+                        )
+                    )
+                )
+                try:
+                    number_list = chromosome_list.astype("float")
+                except ValueError:
+                    number_list = np.array(
+                        [_int_or_zero(chromosome) for chromosome in chromosome_list],
+                        dtype="float",
+                    )
+
+                def fill_col_property(start, end):
+                    col_property[start:end, 0] = number_list[
+                        np.searchsorted(chromosome_list, chromosomes[start:end])
+                    ]
+                    col_property[start:end, 1] = 0
+                    col_property[start:end, 2] = positions[start:end]
+
+                self._fill_in_chunks(
+                    metadata2_memmaps,
+                    executor,
+                    1,
+                    len(col_property),
+                    fill_col_property,
+                    "converting chromosomes to numbers",
+                )
+                self._fill_in_chunks(
+                    metadata2_memmaps, executor, 2, len(col), fill_sids, "creating sids"
+                )
+
+            # The progress memmap was appended last, so this removes it
+            metadata2_memmaps.popitem()
+
+        metadata2_path.unlink()
+        metadata2_temp.replace(metadata2_path)
+
+    def _open_partial_metadata(self, metadata2_temp, source_stamp):
+        # Returns the temp file left by an interrupted extension of this same metadata file, if any.
+        if not metadata2_temp.exists():
+            return None
+        try:
+            metadata2_memmaps = MultiMemMap(metadata2_temp, mode="r+")
+        except Exception:
+            return None
+        if self._progress_key not in metadata2_memmaps or not np.array_equal(
+            metadata2_memmaps[self._progress_key][:2], source_stamp
+        ):
+            metadata2_memmaps.close()
+            return None
+        return metadata2_memmaps
+
+    def _append_empty_metadata(self, metadata2_memmaps, source_stamp):
+        samples = metadata2_memmaps["samples"]
+        metadata2_memmaps.append_empty(
+            self._default_iid_key,
+            shape=(len(samples), 2),
+            dtype=str(samples.dtype),
+        )
+        metadata2_memmaps.append_empty(
+            self._col_property_key,
+            shape=(len(metadata2_memmaps["ids"]), 3),
+            dtype="float",
+        )
+        rsid_list = metadata2_memmaps["rsids"]
+        id_list = metadata2_memmaps["ids"]
+        assert str(rsid_list.dtype).startswith("<U") and str(id_list.dtype).startswith(
+            "<U"
+        ), "real assert"
+        if _all_equal_in_parts(rsid_list, "0") or _all_equal_in_parts(rsid_list, ""):
+            sid_dtype = str(id_list.dtype)
+        else:
+            max_length = (
+                int(str(rsid_list.dtype)[2:]) + 1 + int(str(id_list.dtype)[2:])
+            )
+            sid_dtype = f"<U{max_length}"
+        metadata2_memmaps.append_empty(
+            self._default_sid_key,
+            shape=len(id_list),
+            dtype=sid_dtype,
+        )
+        # The source file's size and modification time, followed by the number of items done
+        # in each of the three steps
+        progress = metadata2_memmaps.append_empty(
+            self._progress_key, shape=5, dtype="<i8"
+        )
+        progress[:2] = source_stamp
+        progress[2:] = 0
+        metadata2_memmaps.flush()
+
+    def _fill_in_chunks(
+        self, metadata2_memmaps, executor, step, item_count, fill, description
+    ):
+        # Chunks are filled in parallel, but progress is recorded in order, so it always counts
+        # the items, from the start, that are done.
+        progress = metadata2_memmaps[self._progress_key]
+        start_end_list = [
+            (start, end)
+            for start, end in _chunks(item_count, self._metadata_chunk_size)
+            if end > progress[2 + step]
+        ]
+
+        def fill_one(start_end):
+            fill(*start_end)
+            return start_end[1]
+
+        with log_in_place(description, logging.INFO) as updater:
+            for end in executor.map(fill_one, start_end_list):
+                metadata2_memmaps.flush()
+                progress[2 + step] = end
+                progress.flush()
+                updater(f"{end:,} of {item_count:,}")
+
     def _read(
         self,
         iid_index_or_none,
@@ -343,15 +472,143 @@ class Bgen(DistReader):
             self._num_threads if num_threads is None else num_threads
         )
 
-        val = self._open_bgen.read(
-            (iid_index_or_none, sid_index_or_none),
-            dtype=dtype,
-            order=order,
-            num_threads=num_threads,
-        )
-        assert val.shape[-1] == 3, "Expect ploidy to be 2"
+        sample_index = self._decode_sample_index(iid_index_or_none)
+        if sample_index is None:
+            val = self._open_bgen.read(
+                (iid_index_or_none, sid_index_or_none),
+                dtype=dtype,
+                order=order,
+                num_threads=num_threads,
+            )
+            assert val.shape[-1] == 3, "Expect ploidy to be 2"
+            return val
+
+        # Decode just the wanted samples from each SNP's (cached) decompressed data
+        vaddr = self._open_bgen._vaddr
+        if sid_index_or_none is not None:
+            vaddr = vaddr[sid_index_or_none]
+        val = np.empty((len(sample_index), len(vaddr), 3), dtype=dtype, order=order)
+
+        def decode(start, stop):
+            for out_index in range(start, stop):
+                val[:, out_index, :] = self._sample_probabilities(
+                    vaddr[out_index], sample_index, dtype
+                )
+
+        _run_in_chunks(len(vaddr), num_threads, decode)
         return val
 
+    def _read_snp_into(
+        self,
+        iid_index_or_none,
+        sid_index_or_none,
+        max_weight,
+        hard_call,
+        out,
+        force_python_only,
+        num_threads,
+    ):
+        if force_python_only:
+            return DistReader._read_snp_into(
+                self,
+                iid_index_or_none,
+                sid_index_or_none,
+                max_weight,
+                hard_call,
+                out,
+                force_python_only,
+                num_threads,
+            )
+        self._run_once()
+
+        # Decode one SNP at a time and reduce its probabilities straight into its column of 'out',
+        # so that the (iid,sid,3) probabilities are never allocated.
+        vaddr = self._open_bgen._vaddr
+        if sid_index_or_none is not None:
+            vaddr = vaddr[sid_index_or_none]
+        decode_sample_index = self._decode_sample_index(iid_index_or_none)
+        sample_index = (
+            None
+            if iid_index_or_none is None
+            else self._open_bgen._sample_range[iid_index_or_none]
+        )
+        # Like open_bgen.read, decode at 32-bit precision for float16 and float32
+        precision = 32 if out.dtype in (np.float16, np.float32) else 64
+        filepath = self._open_bgen._filepath
+
+        def decode(start, stop):
+            with bgen_file(filepath) as cbgen:
+                for out_index in range(start, stop):
+                    if decode_sample_index is not None:
+                        probability = self._sample_probabilities(
+                            vaddr[out_index],
+                            decode_sample_index,
+                            np.float32 if precision == 32 else np.float64,
+                        )
+                    else:
+                        probability = cbgen.read_probability(
+                            vaddr[out_index], precision
+                        )
+                        assert probability.shape[1] == 3, "Expect ploidy to be 2"
+                        if sample_index is not None:
+                            probability = probability[sample_index]
+                    DistReader._to_snp_values(
+                        probability.astype(out.dtype, copy=False),
+                        max_weight,
+                        hard_call,
+                        out[:, out_index],
+                    )
+
+        num_threads = get_num_threads(
+            self._num_threads if num_threads is None else num_threads
+        )
+        _run_in_chunks(len(vaddr), num_threads, decode)
+
+    def _decode_sample_index(self, iid_index_or_none):
+        # Returns the index of the samples to decode (in NumPy) from each SNP's decompressed data,
+        # or None to decode all samples with cbgen.
+        if iid_index_or_none is None or self._decompress is None:
+            return None
+        return self._open_bgen._sample_range[iid_index_or_none]
+
+    def _decompressed_block(self, vaddr):
+        vaddr = int(vaddr)
+
+        def load():
+            # A layout 2 genotype block starts with its length and its decompressed length
+            length, decompressed_length = np.frombuffer(
+                self._file_bytes[vaddr : vaddr + 8].tobytes(), dtype="<u4"
+            )
+            data = self._decompress(
+                self._file_bytes[vaddr + 8 : vaddr + 4 + int(length)],
+                int(decompressed_length),
+            )
+            # Pad with zeros, so that every value can be read as a 5-byte window
+            return np.frombuffer(data + bytes(8), dtype=np.uint8)
+
+        return self._block_cache.get(vaddr, load)
+
+    def _sample_probabilities(self, vaddr, sample_index, dtype):
+        # Returns the probabilities of one SNP for just the samples in 'sample_index'
+        block = self._decompressed_block(vaddr)
+        sample_count, allele_count = struct.unpack_from("<IH", block)
+        min_ploidy, max_ploidy = block[6], block[7]
+        phased, bits = block[8 + sample_count], int(block[9 + sample_count])
+        if allele_count != 2 or min_ploidy != 2 or max_ploidy != 2 or phased != 0:
+            # Not unphased, diploid, and bi-allelic, so let cbgen decode it
+            with bgen_file(self._open_bgen._filepath) as cbgen:
+                probability = cbgen.read_probability(
+                    vaddr, 32 if np.dtype(dtype).itemsize <= 4 else 64
+                )
+            assert probability.shape[1] == 3, "Expect ploidy to be 2"
+            return probability[sample_index]
+
+        first_two = _unpack_bits(
+            block, 10 + sample_count, sample_count, bits, sample_index
+        )
+        missing = (block[8 + sample_index] & 0x80) != 0
+        return _from_scale(first_two, 2**bits - 1, missing, dtype)
+
     def __repr__(self):
         return "{0}('{1}')".format(self.__class__.__name__, self.filename)
 
@@ -376,6 +633,8 @@ class Bgen(DistReader):
                 hasattr(self, "_open_bgen") and self._open_bgen is not None
             ):  # we need to test this because Python doesn't guarantee that __init__ was fully run
                 del self._open_bgen
+            self._file_bytes = None
+            self._block_cache = None
 
     @staticmethod
     def write(
@@ -390,8 +649,12 @@ class Bgen(DistReader):
         block_size=None,
         qctool_path=None,
         cleanup_temp_files=True,
+        num_threads=None,
     ):
-        r"""Writes a :class:`DistReader` to BGEN format and return a the :class:`.Bgen`. Requires access to the 3rd party QCTool.
+        r"""Writes a :class:`DistReader` to BGEN format (version 1.2, layout 2) and return a the :class:`.Bgen`.
+
+        The *distreader* is read in blocks of SNPs. The SNPs of each block are encoded and compressed on a pool of threads
+        and then appended, in order, to the file, so the data never needs to fit in memory.
 
         :param filename: the name of the file to create
         :type filename: string
@@ -401,7 +664,8 @@ class Bgen(DistReader):
         :param bits: Number of bits, between 1 and 32 used to represent each 0-to-1 probability value. Default is 16.
             An np.float32 needs 23 bits. A np.float64 would need 52 bits, which the BGEN format doesn't offer, so use 32.
         :type bits: int
-        :param compression: How to compress the file. Can be None (default), 'zlib', or 'zstd'.
+        :param compression: How to compress the file. Can be None (default, which means 'zlib'), 'zlib', or 'zstd'.
+            ('zstd' requires the `zstandard <https://pypi.org/project/zstandard/>`_ package.)
         :type compression: string
         :param sample_function: Function to turn a :attr:`DistReader.iid` into a BGEN sample.
            (Default: :meth:`bgen.default_sample_function`.)
@@ -417,14 +681,19 @@ class Bgen(DistReader):
         :type sid_function: function
         :param block_size: The number of SNPs to read in a batch from *distreader*. Defaults to a *block_size* such that *block_size* \* *iid_count* is about 100,000.
         :type block_size: number
-        :param qctool_path: Tells the path to the 3rd party `QCTool <https://www.well.ox.ac.uk/~gav/qctool_v2/>`_. Defaults to reading
-           path from environment variable QCTOOLPATH. (To use on Windows, install Ubuntu for Windows, install QCTool in Ubuntu,
-           and then give the path as "ubuntu run <UBUNTU PATH TO QCTOOL".)
+        :param qctool_path: No longer used. (The BGEN file is written directly, without the 3rd party QCTool.)
         :type qctool_path: string
-        :param cleanup_temp_files: Tells if delete temporary \*.gen and \*.sample files.
+        :param cleanup_temp_files: No longer used. (No temporary \*.gen and \*.sample files are created.)
         :type cleanup_temp_files: bool
+        :param num_threads: The number of threads with which to encode and compress SNPs. Defaults to all available processors.
+            Can also be set with these environment variables (listed in priority order):
+            'PST_NUM_THREADS', 'NUM_THREADS', 'MKL_NUM_THREADS'.
+        :type num_threads: int
         :rtype: :class:`.Bgen`
 
+        Each probability distribution must be non-negative and sum to 1 (within 0.001). Distributions that contain a NaN, or
+        that are all 0, are written as missing.
+
         >>> from pysnptools.distreader import DistHdf5, Bgen
         >>> import pysnptools.util as pstutil
         >>> from pysnptools.util import example_file # Download and return local file name
@@ -434,67 +703,48 @@ class Bgen(DistReader):
         >>> Bgen.write("tempdir/toydata10.bgen",distreader)        # Write data in BGEN format
         Bgen('tempdir/toydata10.bgen')
         """
-        qctool_path = qctool_path or os.environ.get("QCTOOLPATH")
         assert (
-            qctool_path is not None
-        ), "Bgen.write() requires a path to an external qctool program either via the qctool_path input or by setting the QCTOOLPATH environment variable."
-
-        # We need the +1 so that all three values will have enough precision to be very near 1
-        # The max(3,..) is needed to even 1 bit will have enough precision in the gen file
-        genfilename = os.path.splitext(filename)[0] + ".gen"
-        decimal_places = max(3, math.ceil(math.log(2**bits, 10)) + 1)
-        Bgen.genwrite(
-            genfilename,
-            distreader,
-            decimal_places,
-            id_rsid_function,
-            sample_function,
-            block_size,
+            BGEN_READER_AVAILABLE
+        ), "To use Bgen, you must install the bgen feature of the pysnptools package. Try 'pip install pysnptools[bgen]'"
+        assert 1 <= bits <= 32, "Expect bits to be between 1 and 32"
+        compression = compression or "zlib"
+        compress = _compressor(compression)
+        num_threads = get_num_threads(num_threads)
+        iid_count, sid_count = distreader.iid_count, distreader.sid_count
+        block_size = block_size or max((100 * 1000) // max(1, iid_count), 1)
+        samples = [sample_function(f, i) for f, i in distreader.iid]
+
+        pstutil.create_directory_if_necessary(filename)
+        metadata2 = open_bgen._metadata_path_from_filename(
+            filename, samples_filepath=None
         )
+        for path in [filename, metadata2]:
+            if os.path.exists(path):
+                os.remove(path)
+
+        with open(filename + ".temp", "wb") as bgen_fp, ThreadPoolExecutor(
+            max_workers=num_threads
+        ) as executor, log_in_place("writing BGEN ", logging.INFO) as updater:
+            bgen_fp.write(_header_and_samples(sid_count, compression, samples))
+            for start, end in _chunks(sid_count, block_size):
+                updater("{0:,} of {1:,} SNPs".format(start, sid_count))
+                distdata = distreader[:, start:end].read(view_ok=True)
+
+                def encode(sid_index):
+                    id, rsid = id_rsid_function(distdata.sid[sid_index])
+                    return _variant(
+                        id,
+                        rsid,
+                        distdata.pos[sid_index],
+                        distdata.val[:, sid_index, :],
+                        bits,
+                        compress,
+                    )
 
-        dir, file = os.path.split(filename)
-        if dir == "":
-            dir = "."
-        metadata_mmm = open_bgen._metadata_path_from_filename(
-            file, samples_filepath=None
-        )
-        samplefile = os.path.splitext(file)[0] + ".sample"
-        genfile = os.path.splitext(file)[0] + ".gen"
-        olddir = os.getcwd()
-        os.chdir(dir)
-
-        if os.path.exists(file):
-            os.remove(file)
-        if os.path.exists(metadata_mmm):
-            os.remove(metadata_mmm)
-        cmd = "{0} -g {1} -s {2} -og {3}{4}{5}".format(
-            qctool_path,
-            genfile,
-            samplefile,
-            file,
-            " -bgen-bits {0}".format(bits) if bits is not None else "",
-            (
-                " -bgen-compression {0}".format(compression)
-                if compression is not None
-                else ""
-            ),
-        )
-        try:
-            _ = subprocess.check_output(
-                cmd, stderr=subprocess.STDOUT, shell=True, universal_newlines=True
-            )
-        except subprocess.CalledProcessError as exc:
-            print(
-                "Status : FAIL", exc.returncode, exc.output
-            )  # LATER this doesn't seem to work when called from VS
-            if cleanup_temp_files:
-                raise Exception("qctool command failed")
-            else:
-                print("qctool command failed\n{0}".format(cmd))
-        if cleanup_temp_files:
-            os.remove(genfile)
-            os.remove(samplefile)
-        os.chdir(olddir)
+                for variant in executor.map(encode, range(distdata.sid_count)):
+                    bgen_fp.write(variant)
+
+        shutil.move(filename + ".temp", filename)
         new_bgen = Bgen(filename, iid_function=iid_function, sid_function=sid_function)
         return new_bgen
 
@@ -635,6 +885,191 @@ def _parts(item_count):
     assert end == item_count, "real assert"
 
 
+def _chunks(item_count, chunk_size):
+    for start in range(0, item_count, chunk_size):
+        yield start, min(start + chunk_size, item_count)
+
+
+def _run_in_chunks(item_count, num_threads, work):
+    # Calls work(start, stop) on each of up to 'num_threads' equal chunks of the items, on a pool of threads
+    if item_count == 0:
+        return
+    num_threads = max(1, min(num_threads, item_count))
+    items_per_thread = -(-item_count // num_threads)  # Int Ceiling
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        for future in [
+            executor.submit(work, start, min(start + items_per_thread, item_count))
+            for start in range(0, item_count, items_per_thread)
+        ]:
+            future.result()  # raise any exception
+
+
+class _BlockCache:
+    # A thread-safe cache of decompressed SNP data, that evicts the least recently used
+    # blocks to keep the total under 'max_bytes'.
+    def __init__(self, max_bytes):
+        self._max_bytes = max_bytes
+        self._blocks = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                return block
+        block = load()  # Outside the lock, so that threads can decompress in parallel
+        if block.nbytes <= self._max_bytes:
+            with self._lock:
+                if key not in self._blocks:
+                    self._blocks[key] = block
+                    self._bytes += block.nbytes
+                    while self._bytes > self._max_bytes:
+                        _, evicted = self._blocks.popitem(last=False)
+                        self._bytes -= evicted.nbytes
+        return block
+
+
+def _layout2_decompressor(filename):
+    # Returns a function to decompress the genotype blocks of a layout 2 BGEN file, or None
+    # if the file's SNP data should be decoded by cbgen.
+    with open(filename, "rb") as fp:
+        _, header_length = struct.unpack("<II", fp.read(8))
+        fp.seek(header_length)
+        (flags,) = struct.unpack("<I", fp.read(4))
+    compression, layout = flags & 3, (flags >> 2) & 15
+    if layout != 2:
+        return None
+    if compression == 1:
+        return lambda data, decompressed_length: zlib.decompress(data)
+    if compression == 2:
+        try:
+            import zstandard
+        except ImportError:
+            return None
+
+        def decompress(data, decompressed_length):
+            return zstandard.ZstdDecompressor().decompress(
+                data, max_output_size=decompressed_length
+            )
+
+        return decompress
+    return None
+
+
+def _unpack_bits(block, offset, sample_count, bits, sample_index):
+    # Returns the first two probabilities (as integers) of the samples in 'sample_index'
+    # from the bit-packed values that start at 'offset' (the inverse of '_pack_bits')
+    if bits in (8, 16, 32):
+        values = block[offset : offset + sample_count * bits // 4]
+        return values.view("<u{0}".format(bits // 8)).reshape(-1, 2)[sample_index]
+    sample_index = np.asarray(sample_index, dtype=np.int64)
+    bit_offset = (2 * sample_index[:, np.newaxis] + np.arange(2)) * bits
+    byte_offset = offset + bit_offset // 8
+    window = np.zeros(bit_offset.shape, dtype=np.uint64)
+    for byte in range(-(-(bits + 7) // 8)):  # Int Ceiling
+        window |= block[byte_offset + byte].astype(np.uint64) << np.uint64(8 * byte)
+    window >>= (bit_offset % 8).astype(np.uint64)
+    return window & np.uint64(2**bits - 1)
+
+
+def _int_or_zero(chromosome):
+    try:
+        return int(chromosome)
+    except Exception:
+        return 0
+
+
+# https://www.well.ox.ac.uk/~gav/bgen_format/spec/v1.2.html
+_compression_flag = {"zlib": 1, "zstd": 2}
+_layout2_flag = 2 << 2
+_sample_identifiers_flag = 1 << 31
+_sum_tolerance = 1e-3
+
+
+def _compressor(compression):
+    assert compression in _compression_flag, "Expect compression to be 'zlib' or 'zstd'"
+    if compression == "zlib":
+        return zlib.compress
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "To write a BGEN file with 'zstd' compression, you must install the zstandard package. Try 'pip install zstandard'"
+        )
+    return lambda data: zstandard.ZstdCompressor().compress(data)
+
+
+def _length_and_bytes(text, length_format="<H"):
+    data = str(text).encode("utf-8")
+    return struct.pack(length_format, len(data)) + data
+
+
+def _header_and_samples(variant_count, compression, samples):
+    header_block = struct.pack(
+        "<III4sI",
+        20,  # the length of the header block, which has no free data
+        variant_count,
+        len(samples),
+        b"bgen",
+        _compression_flag[compression] | _layout2_flag | _sample_identifiers_flag,
+    )
+    sample_ids = b"".join(_length_and_bytes(sample) for sample in samples)
+    sample_block = struct.pack("<II", 8 + len(sample_ids), len(samples)) + sample_ids
+    offset = struct.pack("<I", len(header_block) + len(sample_block))
+    return offset + header_block + sample_block
+
+
+def _pack_bits(values, bits):
+    # Each value takes 'bits' bits, least significant bit first, in a little-endian bit stream
+    if bits in (8, 16, 32):
+        return values.astype("<u{0}".format(bits // 8)).tobytes()
+    values = values.astype(np.uint32).reshape(-1)
+    bit_matrix = (values[:, np.newaxis] >> np.arange(bits, dtype=np.uint32)) & 1
+    return np.packbits(bit_matrix.astype(np.uint8), bitorder="little").tobytes()
+
+
+def _variant(id, rsid, pos, probabilities, bits, compress):
+    # One BGEN variant block (layout 2) for an unphased, diploid, bi-allelic SNP
+    if np.any(probabilities < 0):
+        raise ValueError(
+            "Expect probabilities to be non-negative (sid '{0}')".format(id)
+        )
+    total = probabilities.sum(axis=-1)
+    present = total > 0
+    if np.any(np.abs(total[present] - 1) > _sum_tolerance):
+        raise ValueError("Expect probabilities to sum to 1 (sid '{0}')".format(id))
+
+    rounded, missing = _round_to_scale(probabilities, 2**bits - 1)
+    rounded[missing] = 0
+    ploidy = np.where(missing, 0x82, 0x02).astype(np.uint8)  # high bit means missing
+    data = b"".join(
+        [
+            struct.pack("<IHBB", len(probabilities), 2, 2, 2),
+            ploidy.tobytes(),
+            struct.pack("<BB", 0, bits),  # unphased
+            _pack_bits(rounded[:, :2], bits),
+        ]
+    )
+    compressed = compress(data)
+    genotype_block = struct.pack("<II", len(compressed) + 4, len(data)) + compressed
+
+    chromosome = int(pos[0])
+    position = int(pos[2])
+    return b"".join(
+        [
+            _length_and_bytes(id),
+            _length_and_bytes(rsid),
+            _length_and_bytes(chromosome),
+            struct.pack("<IH", position, 2),
+            _length_and_bytes("A", "<I"),
+            _length_and_bytes("G", "<I"),
+            genotype_block,
+        ]
+    )
+
+
 def _all_equal_in_parts(array, val):
     for _, _, start, end in _parts(len(array)):
         if not np.all(array[start:end] == val):
@@ -703,9 +1138,6 @@ class TestBgen(unittest.TestCase):
     def test_memmap(self):
         old_dir = os.getcwd()
         os.chdir(os.path.dirname(os.path.realpath(__file__)))
-        assert (
-            "QCTOOLPATH" in os.environ
-        ), "To run test_read_write_round_trip, QCTOOLPATH environment variable must be set. (On Windows, install QcTools in 'Ubuntu on Windows' and set to 'ubuntu run <qctoolLinuxPath>')."
 
         distgen0data = Bgen("../examples/example.bgen")[:, 10].read()
         assert distgen0data.iid[0, 0] == "0"
@@ -723,10 +1155,6 @@ class TestBgen(unittest.TestCase):
         old_dir = os.getcwd()
         os.chdir(os.path.dirname(os.path.realpath(__file__)))
 
-        assert (
-            "QCTOOLPATH" in os.environ
-        ), "To run test_read_write_round_trip, QCTOOLPATH environment variable must be set. (On Windows, install QcTools in 'Ubuntu on Windows' and set to 'ubuntu run <qctoolLinuxPath>')."
-
         exampledata = Bgen("../examples/example.bgen")[:, 10].read()
         distgen0data = DistGen(seed=332, iid_count=50, sid_count=5).read()
 
@@ -755,9 +1183,6 @@ class TestBgen(unittest.TestCase):
         os.chdir(os.path.dirname(os.path.realpath(__file__)))
         Path("temp").mkdir(parents=True, exist_ok=True)
 
-        assert (
-            "QCTOOLPATH" in os.environ
-        ), "To run test_read_write_round_trip, QCTOOLPATH environment variable must be set. (On Windows, install QcTools in 'Ubuntu on Windows' and set to 'ubuntu run <qctoolLinuxPath>')."
 
         distdata = Bgen("../examples/example.bgen")[:5, :5].read()
 
@@ -799,6 +1224,78 @@ class TestBgen(unittest.TestCase):
         assert failed
         os.chdir(old_dir)
 
+    def test_write_streaming(self):
+        from pysnptools.distreader import DistGen
+
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+
+        distgen = DistGen(seed=332, iid_count=101, sid_count=23)
+        distdata0 = distgen.read()
+        distdata0.val[3, 5, :] = np.nan
+        for bits in [3, 8, 16, 32]:
+            for distreader in [distgen, distdata0]:
+                file1 = "temp/streaming-{0}.bgen".format(bits)
+                bgen = Bgen.write(
+                    file1, distreader, bits=bits, block_size=5, num_threads=3
+                )
+                assert not os.path.exists("temp/streaming-{0}.gen".format(bits))
+                distdata1 = bgen.read()
+                assert np.array_equal(distdata1.iid, distdata0.iid)
+                assert np.array_equal(distdata1.sid, distdata0.sid)
+                assert np.array_equal(
+                    distdata1.pos[:, [0, 2]], distdata0.pos[:, [0, 2]]
+                )
+                atol = 1.0 / (2**bits - 1)
+                if distreader is distgen:
+                    distdata0_val = distgen.read().val
+                else:
+                    distdata0_val = distdata0.val
+                    assert np.isnan(distdata1.val[3, 5, :]).all()
+                np.testing.assert_allclose(
+                    distdata1.val, distdata0_val, atol=atol, equal_nan=True
+                )
+                bgen.flush()
+        os.chdir(old_dir)
+
+    def test_sample_subset(self):
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+
+        example = Bgen("../examples/example.bgen")
+        for bits in [3, 16]:
+            file1 = "temp/subset-{0}.bgen".format(bits)
+            bgen = Bgen.write(file1, example, bits=bits)
+            distdata = Bgen(file1).read()
+            for iid_index in [[499, 0, 3], np.s_[::7], []]:
+                for order in ["F", "C"]:
+                    for dtype in [np.float32, np.float64]:
+                        expected = distdata[iid_index, ::3].read(dtype=dtype)
+                        distdata1 = bgen[iid_index, ::3].read(order=order, dtype=dtype)
+                        TestBgen.assert_approx_equal(distdata1, expected, atol=1e-6)
+                        snpdata = bgen[iid_index, ::3].as_snp().read(dtype=dtype)
+                        np.testing.assert_allclose(
+                            snpdata.val,
+                            expected.as_snp().read(dtype=dtype).val,
+                            atol=1e-5,
+                            equal_nan=True,
+                        )
+            assert len(bgen._block_cache._blocks) == len(range(0, 199, 3))
+            bgen.flush()
+
+        # The least recently used blocks are evicted
+        cache = _BlockCache(max_bytes=25)
+        for key in [1, 2, 1, 3]:
+            cache.get(key, lambda: np.zeros(10, dtype=np.uint8))
+        assert list(cache._blocks) == [1, 3]
+        cache.get(4, lambda: np.zeros(30, dtype=np.uint8))  # too big to cache
+        assert list(cache._blocks) == [1, 3]
+
+        bgen = Bgen("../examples/example.bgen", cache_size=0)
+        bgen[::2, :5].read()
+        assert len(bgen._block_cache._blocks) == 0
+        os.chdir(old_dir)
+
     def test_read1(self):
         old_dir = os.getcwd()
         os.chdir(os.path.dirname(os.path.realpath(__file__)))
@@ -859,6 +1356,70 @@ class TestBgen(unittest.TestCase):
 
         # This and many of the tests based on bgen-reader-py\bgen_reader\test
 
+    def test_extend_metadata(self):
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+
+        file_to = "temp/extend_metadata.bgen"
+        pstutil.create_directory_if_necessary(file_to)
+        shutil.copy("../examples/example.bgen", file_to)
+        metadata_path = Path(
+            open_bgen._metadata_path_from_filename(file_to, samples_filepath=None)
+        )
+        metadata2_temp = metadata_path.parent / (metadata_path.name + ".temp")
+        for path in [metadata_path, metadata2_temp]:
+            if path.exists():
+                path.unlink()
+
+        # Create the bgen_reader metadata, then give it samples with and without commas and non-numeric chromosomes
+        open_bgen(file_to, verbose=False)
+        with MultiMemMap(metadata_path, mode="r+") as metadata2_memmaps:
+            samples = metadata2_memmaps["samples"]
+            samples[:] = np.array(
+                [
+                    ["f{0},i{0}".format(i), "i{0}".format(i), "a,b,c"][i % 3]
+                    for i in range(len(samples))
+                ]
+            )
+            chromosomes = metadata2_memmaps["chromosomes"]
+            chromosomes[:] = np.array(["1", "X", "22", "Y"])[
+                np.arange(len(chromosomes)) % 4
+            ]
+            expected_iid = np.array(
+                [default_iid_function(sample) for sample in samples]
+            )
+            expected_chrom = np.array([1, 0, 22, 0])[np.arange(len(chromosomes)) % 4]
+
+        class Interrupted(Exception):
+            pass
+
+        class InterruptedBgen(Bgen):
+            def _fill_in_chunks(self, metadata2_memmaps, executor, step, *args):
+                if step == 1:
+                    raise Interrupted()
+                return Bgen._fill_in_chunks(
+                    self, metadata2_memmaps, executor, step, *args
+                )
+
+        old_chunk_size = Bgen._metadata_chunk_size
+        Bgen._metadata_chunk_size = 7
+        try:
+            with self.assertRaises(Interrupted):
+                InterruptedBgen(file_to).iid
+            assert metadata2_temp.exists()
+
+            bgen = Bgen(file_to)
+            np.testing.assert_array_equal(bgen.iid, expected_iid)
+            np.testing.assert_array_equal(bgen.pos[:, 0], expected_chrom)
+            assert bgen.sid[0] == "SNPID_2,RSID_2"
+            assert bgen.pos[7, 2] == 9000
+            assert not metadata2_temp.exists()
+            del bgen
+        finally:
+            Bgen._metadata_chunk_size = old_chunk_size
+
+        os.chdir(old_dir)
+
     def test_bgen_samples_inside_bgen(self):
         with example_filepath("example.32bits.bgen") as filepath:
             data = Bgen(filepath)
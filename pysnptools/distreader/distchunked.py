@@ -0,0 +1,114 @@
+from pysnptools.pstreader import PstChunked
+from pysnptools.distreader import DistReader
+import logging
+import numpy as np
+
+
+class DistChunked(PstChunked, DistReader):
+    r"""
+    A :class:`.DistReader` for reading \*.dist.chunked files from disk.
+
+    See :class:`.DistReader` for general examples of using DistReaders.
+
+    The DistChunked format stores val, iid, sid, and pos information. The values are compressed in 2-D chunks of
+    individuals and SNPs, so reading a subset of individuals, of SNPs, or of both, decompresses only the chunks needed.
+    See :class:`.PstChunked` for details.
+
+    **Constructor:**
+        :Parameters: * **filename** (*string*) -- The DistChunked file to read.
+
+        Also see :meth:`.DistChunked.write`.
+
+        :Example:
+
+        >>> from pysnptools.distreader import DistChunked, Bgen
+        >>> import pysnptools.util as pstutil
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bgen_file = example_file("pysnptools/examples/2500x100.bgen")
+        >>> pstutil.create_directory_if_necessary("tempdir/2500x100.dist.chunked")
+        >>> data_on_disk = DistChunked.write("tempdir/2500x100.dist.chunked",Bgen(bgen_file),chunk_shape=(500,10))
+        >>> print((data_on_disk.iid_count, data_on_disk.sid_count))
+        (2500, 100)
+        >>> print(data_on_disk[0,:3].read().val.round(3))
+        [[[0.467 0.388 0.145]
+          [0.482 0.105 0.413]
+          [0.737 0.112 0.151]]]
+
+    **Methods beyond** :class:`.DistReader`
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(DistChunked, self).__init__(*args, **kwargs)
+
+    @property
+    def row(self):
+        self._run_once()
+        if self._row.dtype.type is not np.str_:
+            self._row = np.array(self._row, dtype="str")
+        return self._row
+
+    @property
+    def col(self):
+        self._run_once()
+        if self._col.dtype.type is not np.str_:
+            self._col = np.array(self._col, dtype="str")
+        return self._col
+
+    @staticmethod
+    def write(
+        filename,
+        distreader,
+        chunk_shape=(1024, 256),
+        dtype=None,
+        compression_level=1,
+        num_threads=None,
+    ):
+        """Writes a :class:`DistReader` to DistChunked format and returns the :class:`.DistChunked`
+
+        :param filename: the name of the file to create
+        :type filename: string
+        :param distreader: The data that should be written to disk. It can be any :class:`DistReader`, for example, :class:`.Bgen`.
+            It is read one column of chunks at a time.
+        :type distreader: :class:`DistReader`
+        :param chunk_shape: optional -- The number of individuals and the number of SNPs in each chunk. Default: (1024, 256)
+        :type chunk_shape: tuple of two ints
+        :param dtype: {None (default), numpy.float64, numpy.float32}, optional -- The data-type of the values on disk.
+            By default, that of the input if it is in memory, otherwise numpy.float64.
+        :type dtype: data-type
+        :param compression_level: optional -- The zlib compression level, from 0 (none) to 9 (most). Default: 1 (fastest)
+        :type compression_level: int
+        :param num_threads: optional -- The number of threads with which to read and compress data. Defaults to all available
+            processors. Can also be set with these environment variables (listed in priority order):
+            'PST_NUM_THREADS', 'NUM_THREADS', 'MKL_NUM_THREADS'.
+        :type num_threads: None or int
+        :rtype: :class:`.DistChunked`
+
+        >>> from pysnptools.distreader import DistChunked, DistHdf5
+        >>> import pysnptools.util as pstutil
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> hdf5_file = example_file("pysnptools/examples/toydata.iidmajor.dist.hdf5")
+        >>> distdata = DistHdf5(hdf5_file)[:,:10].read()     # Read first 10 snps from DistHdf5 format
+        >>> pstutil.create_directory_if_necessary("tempdir/toydata10.dist.chunked")
+        >>> DistChunked.write("tempdir/toydata10.dist.chunked",distdata)          # Write data in DistChunked format
+        DistChunked('tempdir/toydata10.dist.chunked')
+        """
+        PstChunked._write(
+            filename,
+            distreader,
+            np.array(distreader.row, dtype="str"),
+            np.array(distreader.col, dtype="str"),
+            chunk_shape,
+            dtype,
+            compression_level,
+            num_threads,
+        )
+        return DistChunked(filename)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    import doctest
+
+    doctest.testmod(optionflags=doctest.ELLIPSIS | doctest.NORMALIZE_WHITESPACE)
@@ -1,7 +1,8 @@
 import logging
 import numpy as np
 from pysnptools.distreader import DistReader
-from pysnptools.pstreader import PstHdf5
+from pysnptools.distreader._quantize import _is_quantized_dtype, _quantize, _dequantize
+from pysnptools.pstreader import PstHdf5, PstData
 
 class DistHdf5(PstHdf5,DistReader):
     r'''
@@ -45,18 +46,35 @@ class DistHdf5(PstHdf5,DistReader):
             self._col = np.array(self._col,dtype='str')
         return self._col
 
+    def _read(self, row_index_or_none, col_index_or_none, order, dtype, force_python_only, view_ok, num_threads):
+        self._run_once()
+        if not _is_quantized_dtype(self.val_in_file.dtype):
+            return PstHdf5._read(self, row_index_or_none, col_index_or_none, order, dtype,
+                                 force_python_only, view_ok, num_threads)
+
+        # Read the (two) quantized values of each distribution and then dequantize them
+        if order == "A":
+            order = "F" if self.is_col_major else "C"
+        quantized = PstHdf5._read(self, row_index_or_none, col_index_or_none, order, self.val_in_file.dtype,
+                                  force_python_only, True, num_threads)
+        return _dequantize(quantized, dtype, order)
+
     @staticmethod
-    def write(filename, distdata, hdf5_dtype=None, sid_major=True):
-        """Writes a :class:`DistData` to DistHdf5 format and return a the :class:`.DistHdf5`.
+    def write(filename, distdata, hdf5_dtype=None, sid_major=True, block_size=None):
+        r"""Writes a :class:`DistData` to DistHdf5 format and return a the :class:`.DistHdf5`.
 
         :param filename: the name of the file to create
         :type filename: string
         :param distdata: The in-memory data that should be written to disk.
         :type distdata: :class:`DistData`
-        :param hdf5_dtype: None (use the .val's dtype) or a Hdf5 dtype, e.g. 'f8','f4',etc.
+        :param hdf5_dtype: None (use the .val's dtype) or a Hdf5 dtype, e.g. 'f8','f4',etc. With 'u1' or 'u2', each distribution
+            is stored as two probabilities (the third is one minus the other two) quantized to 8 or 16 bits, with a
+            precision of 1/254 or 1/65534. Reads dequantize the values.
         :type hdf5_dtype: string
         :param sid_major: Tells if vals should be stored on disk in sid_major (default) or iid_major format.
         :type col_major: bool
+        :param block_size: With 'u1' or 'u2', the number of SNPs to quantize at a time. Defaults to a *block_size* such that *block_size* \* *iid_count* is about 100,000.
+        :type block_size: number
         :rtype: :class:`.DistHdf5`
 
         >>> from pysnptools.distreader import DistHdf5, Bgen
@@ -67,8 +85,18 @@ class DistHdf5(PstHdf5,DistReader):
         >>> pstutil.create_directory_if_necessary("tempdir/toydata10.dist.hdf5")
         >>> DistHdf5.write("tempdir/toydata10.dist.hdf5",distdata)        # Write data in DistHdf5 format
         DistHdf5('tempdir/toydata10.dist.hdf5')
+        >>> DistHdf5.write("tempdir/toydata10.u2.dist.hdf5",distdata,hdf5_dtype='u2') # Store each distribution in 4 bytes
+        DistHdf5('tempdir/toydata10.u2.dist.hdf5')
         """
-        PstHdf5.write(filename,distdata,hdf5_dtype=hdf5_dtype,col_major=sid_major)
+        distdata = PstData._in_memory(distdata)
+        if hdf5_dtype is not None and _is_quantized_dtype(hdf5_dtype):
+            quantized = np.empty(distdata.val.shape[:2]+(2,), dtype=hdf5_dtype, order="F" if sid_major else "C")
+            block_size = block_size or max((100_000) // max(1, distdata.iid_count), 1)
+            for start in range(0, distdata.sid_count, block_size):
+                quantized[:, start:start+block_size] = _quantize(distdata.val[:, start:start+block_size], hdf5_dtype)
+            PstHdf5._write(filename,distdata,quantized,None,sid_major)
+        else:
+            PstHdf5.write(filename,distdata,hdf5_dtype=hdf5_dtype,col_major=sid_major)
         return DistHdf5(filename)
 
 if __name__ == "__main__":
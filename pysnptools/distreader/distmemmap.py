@@ -5,8 +5,13 @@ import numpy as np
 import unittest
 import doctest
 import pysnptools.util as pstutil
-from pysnptools.pstreader import PstMemMap
+from pysnptools.pstreader import PstMemMap, PstData
 from pysnptools.distreader import DistData
+from pysnptools.distreader._quantize import (
+    _is_quantized_dtype,
+    _quantize,
+    _dequantize,
+)
 from pysnptools.util import log_in_place
 
 
@@ -21,6 +26,10 @@ class DistMemMap(PstMemMap, DistData):
 
         Also see :meth:`.DistMemMap.empty` and :meth:`.DistMemMap.write`.
 
+        A file written by :meth:`.DistMemMap.write` with a *dtype* of np.uint8 or np.uint16 stores just two quantized
+        probabilities per individual and SNP (the third is one minus the other two). The values take one twelfth (np.uint8)
+        or one sixth (np.uint16) of the space of np.float64 values. Reads dequantize just the values wanted.
+
         :Example:
 
         >>> from pysnptools.distreader import DistMemMap
@@ -41,6 +50,8 @@ class DistMemMap(PstMemMap, DistData):
     def __init__(self, *args, **kwargs):
         super(DistMemMap, self).__init__(*args, **kwargs)
 
+    _quantized = None  # For files of quantized values, the memmap of those values
+
     @property
     def val(self):
         """The 3D NumPy memmap array of floats that represents the distribution of SNP values. You can get this property, but cannot set it (except with itself)
@@ -52,14 +63,23 @@ class DistMemMap(PstMemMap, DistData):
         >>> dist_mem_map = DistMemMap(mem_map_file)
         >>> print(dist_mem_map.val[0,1])
         [0.43403135 0.28289911 0.28306954]
+
+        A file of quantized values (see :meth:`DistMemMap.write`) has no float array to map, so this raises an AttributeError.
+        Use :meth:`DistMemMap.read` to get dequantized values. (Writers and :meth:`DistData.allclose` read them this way.)
         """
         self._run_once()
+        if self._quantized is not None:
+            raise AttributeError(
+                "DistMemMap '{0}' stores quantized values, so it has no val. Use read() to get dequantized values.".format(
+                    self._filename
+                )
+            )
         return self._val
 
     @val.setter
     def val(self, new_value):
         self._run_once()
-        if self._val is new_value:
+        if self._quantized is None and self._val is new_value:
             return
         raise Exception("DistMemMap val's cannot be set to a different array")
 
@@ -142,8 +162,11 @@ class DistMemMap(PstMemMap, DistData):
 
         """
         if self._ran_once:
-            self.val.flush()
-            del self._val
+            if self._quantized is not None:
+                del self._quantized
+            else:
+                self.val.flush()
+                del self._val
             self._ran_once = False
 
     @staticmethod
@@ -159,8 +182,9 @@ class DistMemMap(PstMemMap, DistData):
         :type distreader: :class:`DistReader`
         :param order: {'A' (default), 'F', 'C'}, optional -- Specify the order of the ndarray. By default, will match the order of the input if knowable; otherwise, 'F'
         :type order: string or None
-        :param dtype: {None (default), numpy.float64, numpy.float32}, optional -- The data-type for the :attr:`DistMemMap.val` ndarray.
+        :param dtype: {None (default), numpy.float64, numpy.float32, numpy.uint8, numpy.uint16}, optional -- The data-type for the :attr:`DistMemMap.val` ndarray.
              By default, will match the order of the input if knowable; otherwise np.float64.
+             With np.uint8 or np.uint16, each distribution is stored as two quantized probabilities, with a precision of 1/254 or 1/65534.
         :type dtype: data-type
         :param block_size: The number of SNPs to read in a batch from *distreader*. Defaults to a *block_size* such that *block_size* \* *iid_count* is about 100,000.
         :type block_size: number
@@ -178,11 +202,20 @@ class DistMemMap(PstMemMap, DistData):
         >>> pstutil.create_directory_if_necessary("tempdir/tiny.dist.memmap")
         >>> DistMemMap.write("tempdir/tiny.dist.memmap",distreader)      # Write distreader in DistMemMap format
         DistMemMap('tempdir/tiny.dist.memmap')
+        >>> DistMemMap.write("tempdir/tiny.u1.dist.memmap",distreader,dtype=np.uint8) # Store each distribution in 2 bytes
+        DistMemMap('tempdir/tiny.u1.dist.memmap')
 
         """
         block_size = block_size or max((100_000) // max(1, distreader.row_count), 1)
 
-        if hasattr(distreader, "val"):
+        if dtype is not None and _is_quantized_dtype(dtype):
+            return DistMemMap._write_quantized(
+                filename, distreader, order, np.dtype(dtype), block_size, num_threads
+            )
+
+        # A DistMemMap of quantized values has no val, so it's read in blocks, like any other reader
+        has_val = hasattr(distreader, "val")
+        if has_val:
             order = PstMemMap._order(distreader) if order == "A" else order
             dtype = dtype or distreader.val.dtype
         else:
@@ -200,7 +233,7 @@ class DistMemMap(PstMemMap, DistData):
             dtype=dtype,
             val_shape=3,
         )
-        if hasattr(distreader, "val"):
+        if has_val:
             self.val[:, :, :] = distreader.val
         else:
             start = 0
@@ -220,6 +253,46 @@ class DistMemMap(PstMemMap, DistData):
         logging.debug("Done writing " + filename)
         return DistMemMap(filename)
 
+    @staticmethod
+    def _write_quantized(filename, distreader, order, dtype, block_size, num_threads):
+        order = "F" if order == "A" else order
+        shape = (distreader.iid_count, distreader.sid_count, 2)
+        offset = PstMemMap._write_header(
+            filename + ".temp",
+            PstData._fixup_input(distreader.row),
+            PstData._fixup_input(distreader.col),
+            PstData._fixup_input(distreader.row_property, count=shape[0]),
+            PstData._fixup_input(distreader.col_property, count=shape[1]),
+            order,
+            dtype,
+            2,
+        )
+        quantized = np.memmap(
+            filename + ".temp",
+            offset=offset,
+            dtype=dtype,
+            mode="r+",
+            order=order,
+            shape=shape,
+        )
+        with log_in_place("DistMemMap writing sid_index ", logging.INFO) as updater:
+            for start in range(0, distreader.sid_count, block_size):
+                updater("{0} of {1}".format(start, distreader.sid_count))
+                distdata = distreader[:, start : start + block_size].read(
+                    order=order, view_ok=True, num_threads=num_threads
+                )
+                quantized[:, start : start + distdata.sid_count, :] = _quantize(
+                    distdata.val, dtype
+                )
+        quantized.flush()
+        del quantized
+
+        if os.path.exists(filename):
+            os.remove(filename)
+        shutil.move(filename + ".temp", filename)
+        logging.debug("Done writing " + filename)
+        return DistMemMap(filename)
+
     def _run_once(self):
         if self._ran_once:
             return
@@ -227,6 +300,12 @@ class DistMemMap(PstMemMap, DistData):
         row = np.array(row_ascii, dtype="str")  # !!!avoid this copy when not needed
         col = np.array(col_ascii, dtype="str")  # !!!avoid this copy when not needed
 
+        self._quantized = None
+        if _is_quantized_dtype(val.dtype):
+            # Give DistData a stand-in of the right shape that needs no memory. The values are dequantized when read.
+            self._quantized = val
+            val = np.broadcast_to(np.float64(np.nan), val.shape[:2] + (3,))
+
         DistData.__init__(
             self,
             iid=row,
@@ -235,6 +314,43 @@ class DistMemMap(PstMemMap, DistData):
             pos=col_property,
             name="np.memmap('{0}')".format(self._filename),
         )
+        if self._quantized is not None:
+            self._val = None
+
+    def _read(
+        self,
+        row_index_or_none,
+        col_index_or_none,
+        order,
+        dtype,
+        force_python_only,
+        view_ok,
+        num_threads,
+    ):
+        self._run_once()
+        if self._quantized is None:
+            return PstMemMap._read(
+                self,
+                row_index_or_none,
+                col_index_or_none,
+                order,
+                dtype,
+                force_python_only,
+                view_ok,
+                num_threads,
+            )
+
+        # Select the quantized values (with a view for a range) and dequantize just them
+        quantized = self._quantized
+        for axis, index_or_none in enumerate([row_index_or_none, col_index_or_none]):
+            index_slice = PstMemMap._as_slice(index_or_none)
+            if index_slice is not None:
+                quantized = quantized[(slice(None),) * axis + (index_slice,)]
+            else:
+                quantized = np.take(quantized, index_or_none, axis=axis)
+        if order == "A":
+            order = self._order
+        return _dequantize(quantized, dtype, order)
 
 
 class TestDistMemMap(unittest.TestCase):
@@ -293,6 +409,63 @@ class TestDistMemMap(unittest.TestCase):
         assert DistData.allclose(bgen.read(), distmemmap.read(), equal_nan=True)
         os.chdir(old_dir)
 
+    def test_quantized(self):
+        from pysnptools.distreader import Bgen, DistHdf5, DistNpz
+
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+
+        pstutil.create_directory_if_necessary("tempdir/quantized.dist.memmap")
+        distdata = Bgen("../examples/example.bgen").read()
+        for dtype in [np.uint8, np.uint16]:
+            atol = 1.0 / (np.iinfo(dtype).max - 1)
+            distmemmap = DistMemMap.write(
+                "tempdir/quantized.dist.memmap", distdata, dtype=dtype, block_size=7
+            )
+            disthdf5 = DistHdf5.write(
+                "tempdir/quantized.dist.hdf5",
+                distdata,
+                hdf5_dtype=np.dtype(dtype).str[1:],
+                block_size=7,
+            )
+            for reader in [distmemmap, disthdf5]:
+                for order in ["F", "C", "A"]:
+                    for iid_index, sid_index in [
+                        (slice(None), slice(None)),
+                        (slice(None, None, 3), [5, 2, 7]),
+                        ([4, 1], slice(2, 9)),
+                    ]:
+                        val = reader[iid_index, sid_index].read(order=order).val
+                        expected = distdata.val[iid_index][:, sid_index]
+                        assert np.array_equal(np.isnan(val), np.isnan(expected))
+                        assert np.allclose(val, expected, atol=atol, equal_nan=True)
+                        assert np.allclose(
+                            np.nansum(val, axis=-1)[~np.isnan(val[:, :, 0])], 1
+                        )
+            with self.assertRaises(AttributeError):
+                distmemmap.val
+            # Copying a quantized file reads it in blocks
+            for dtype2 in [None, dtype]:
+                copy = DistMemMap.write(
+                    "tempdir/quantized2.dist.memmap", distmemmap, dtype=dtype2, block_size=7
+                )
+                assert np.array_equal(
+                    copy.read().val, distmemmap.read().val, equal_nan=True
+                )
+                copy.flush()
+            # Writers and allclose read the dequantized values
+            dequantized = distmemmap.read()
+            assert distmemmap.allclose(dequantized)
+            assert DistData.allclose(dequantized, distmemmap)
+            distnpz = DistNpz.write("tempdir/quantized.dist.npz", distmemmap)
+            disthdf5_copy = DistHdf5.write("tempdir/quantized2.dist.hdf5", distmemmap)
+            for copy in [distnpz, disthdf5_copy]:
+                assert copy.read().allclose(distmemmap)
+            disthdf5_copy.flush()
+            distmemmap.flush()
+            disthdf5.flush()
+        os.chdir(old_dir)
+
     def test_doctest(self):
         import pysnptools.distreader.distmemmap as mod_mm
         import doctest
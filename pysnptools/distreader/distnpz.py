@@ -1,4 +1,4 @@
-from pysnptools.pstreader import PstNpz
+from pysnptools.pstreader import PstNpz, PstData
 from pysnptools.distreader import DistReader
 import logging
 import numpy as np
@@ -65,6 +65,7 @@ class DistNpz(PstNpz, DistReader):
         >>> DistNpz.write("tempdir/toydata10.dist.npz",distdata)          # Write data in DistNpz format
         DistNpz('tempdir/toydata10.dist.npz')
         """
+        distdata = PstData._in_memory(distdata)
         row_ascii = np.array(
             distdata.row, dtype="S"
         )  # !!! would be nice to avoid this copy when not needed.
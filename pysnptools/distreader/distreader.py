@@ -1,6 +1,7 @@
 import numpy as np
 from itertools import *  # noqa: F403
 import logging
+from pysnptools.util._posindex import _PosIndex
 from pysnptools.pstreader import PstReader
 from pysnptools.snpreader._dist2snp import _Dist2Snp
 
@@ -59,13 +60,14 @@ class DistReader(PstReader):
         :class:`.DistNpz`         binary, floats      No                     .dist.npz          Yes
         :class:`.DistHdf5`        binary, floats      Yes (by sid or iid)    .dist.hdf5         Yes
         :class:`.DistMemMap`      mem-mapped floats   Yes                    .dist.memmap       Yes
+        :class:`.DistChunked`     compressed floats   Yes (by chunk)         .dist.chunked      Yes
         ========================= =================== ====================== ================== ======================
 
 
     Methods & Properties:
 
         Every DistReader, such as :class:`.Bgen` and :class:`.DistData`, has these properties: :attr:`iid`, :attr:`iid_count`, :attr:`sid`, :attr:`sid_count`,
-        :attr:`pos` and these methods: :meth:`read`, :meth:`iid_to_index`, :meth:`sid_to_index`, :meth:`as_snp`. See below for details.
+        :attr:`pos` and these methods: :meth:`read`, :meth:`iid_to_index`, :meth:`sid_to_index`, :meth:`region`, :meth:`as_snp`. See below for details.
 
         :class:`.DistData` is a DistReader so it supports the above properties and methods. In addition, it supports property :attr:`DistData.val`.
 
@@ -219,6 +221,47 @@ class DistReader(PstReader):
     ):
         raise NotImplementedError
 
+    def _read_snp_into(
+        self,
+        iid_index_or_none,
+        sid_index_or_none,
+        max_weight,
+        hard_call,
+        out,
+        force_python_only,
+        num_threads,
+    ):
+        """
+        Writes the expected values (or, with 'hard_call', the most likely values) of the distributions into 'out',
+        a preallocated 'C' or 'F' ndarray. See :meth:`as_snp`.
+        Readers that can decode straight to expected values (for example, :class:`.Bgen`) override this.
+        """
+        distreader = self
+        if iid_index_or_none is not None or sid_index_or_none is not None:
+            distreader = distreader[
+                slice(None) if iid_index_or_none is None else iid_index_or_none,
+                slice(None) if sid_index_or_none is None else sid_index_or_none,
+            ]
+        distdata = distreader.read(
+            order="F" if out.flags["F_CONTIGUOUS"] else "C",
+            dtype=out.dtype,
+            force_python_only=force_python_only,
+            view_ok=True,
+            num_threads=num_threads,
+        )  # a view is always OK, because we'll write into 'out' in the next step
+        DistReader._to_snp_values(distdata.val, max_weight, hard_call, out)
+
+    @staticmethod
+    def _to_snp_values(val, max_weight, hard_call, out):
+        # 'val' has a last dimension of 3 that 'out' doesn't have.
+        if hard_call:
+            np.multiply(np.argmax(val, axis=-1), max_weight / 2.0, out=out)
+            out[np.isnan(val[..., 0])] = np.nan
+        else:
+            weights = np.array([0, 0.5, 1], dtype=out.dtype) * max_weight
+            # Find the expected values without allocating a temporary (iid,sid,3) array
+            np.einsum("...k,k->...", val, weights, out=out)
+
     # !!check that views always return contiguous memory by default
     def read(
         self,
@@ -289,7 +332,9 @@ class DistReader(PstReader):
         ret = DistData(self.iid, self.sid, val, pos=self.pos, name=str(self))
         return ret
 
-    def as_snp(self, max_weight=2.0, block_size=None):
+    def as_snp(
+        self, max_weight=2.0, block_size=None, memory_budget=None, hard_call=False
+    ):
         """Returns a :class:`pysnptools.snpreader.SnpReader` such that turns the probability distribution into an expected value.
 
         For example, if the probability distribution is [0.466804   0.38812848 0.14506752] and the max_weight is 2, then the expected
@@ -298,9 +343,18 @@ class DistReader(PstReader):
         :param max_weight: optional -- The expected values will range from 0 to *max_weight*. Default of 2.
         :type max_weight: number
 
+        :param hard_call: optional -- If True, instead of the expected value, gives the value of the most likely of the three
+            outcomes, that is, 0, *max_weight*/2, or *max_weight*. Default of False.
+        :type hard_call: bool
+
         :param block_size: optional -- Default of None (meaning to load all). Suggested number of sids to read into memory at a time.
         :type block_size: int or None
 
+        :param memory_budget: optional -- Instead of **block_size**, the approximate memory to use when reading, as a number of bytes
+            or as a string such as "8GB". The block size is derived (and logged) from the number of individuals and SNPs read and the dtype,
+            after setting aside room for the expected values themselves.
+        :type memory_budget: int, string, or None
+
         :rtype: class:`SnpReader`
 
         :Example:
@@ -314,8 +368,19 @@ class DistReader(PstReader):
         >>> snpreader = distreader.as_snp(max_weight=2)
         >>> print(snpreader[0,0].read().val)
         [[0.67826352]]
+        >>> print(distreader.as_snp(max_weight=2, hard_call=True)[0,0].read().val)
+        [[0.]]
+
+        :class:`.Bgen` decodes its values straight to expected values (or hard calls), without
+        first creating the three probabilities for every individual and SNP.
         """
-        dist2snp = _Dist2Snp(self, max_weight=max_weight, block_size=block_size)
+        dist2snp = _Dist2Snp(
+            self,
+            max_weight=max_weight,
+            block_size=block_size,
+            memory_budget=memory_budget,
+            hard_call=hard_call,
+        )
         return dist2snp
 
     def iid_to_index(self, list):
@@ -360,6 +425,34 @@ class DistReader(PstReader):
         """
         return self.col_to_index(list)
 
+    def region(self, region):
+        """Returns a :class:`.DistReader` for the SNPs in one or more genomic regions. No SNP values are read.
+
+        :param region: A region string, such as ``'1:1000000-2000000'`` (1-based, with both ends inclusive), ``'1:1000000'`` (one position),
+            or ``'1'`` (a whole chromosome). Or, a dictionary from chromosome number to an :class:`.IntRangeSet` (or any *ranges input*)
+            of base-pair positions, such as ``{1: IntRangeSet('1000000:2000001')}``. Or, a list of these.
+        :type region: string, dictionary, or list
+
+        :rtype: :class:`.DistReader` (a subset of this reader, in its original SNP order)
+
+        The first call sorts the SNPs by chromosome and base-pair position. After that, each region is found with a binary search.
+        SNPs with a missing chromosome or position are never in a region.
+
+        :Example:
+
+        >>> from pysnptools.distreader import Bgen
+        >>> from pysnptools.util import IntRangeSet, example_file # Download and return local file name
+        >>> bgen_file = example_file("pysnptools/examples/example.bgen")
+        >>> dist_on_disk = Bgen(bgen_file)
+        >>> print(dist_on_disk.region("1:2000-5000").sid_count) # The SNPs on chromosome 1 from position 2000 through 5000
+        7
+        >>> print(dist_on_disk.region({1: IntRangeSet("2000:3000,4000:5000")}).sid_count) # Two ranges, each with an exclusive stop
+        4
+        """
+        if not hasattr(self, "_pos_index"):
+            self._pos_index = _PosIndex(self.pos)
+        return self[:, self._pos_index.index(region)]
+
     @property
     def val_shape(self):
         """
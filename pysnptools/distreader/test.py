@@ -197,7 +197,13 @@ class TestDistReaders(unittest.TestCase):
         self.assertTrue(np.may_share_memory(result4.val, result5.val))
 
     def test_writes(self):
-        from pysnptools.distreader import DistData, DistHdf5, DistNpz, DistMemMap
+        from pysnptools.distreader import (
+            DistData,
+            DistHdf5,
+            DistNpz,
+            DistMemMap,
+            DistChunked,
+        )
         from pysnptools.kernelreader.test import _fortesting_JustCheckExists
 
         the_class_and_suffix_list = [
@@ -205,10 +211,30 @@ class TestDistReaders(unittest.TestCase):
             # Bgen used to be here
             (DistHdf5, "hdf5", None, None),
             (DistMemMap, "memmap", None, None),
+            (
+                DistChunked,
+                "chunked",
+                None,
+                lambda filename, distdata: DistChunked.write(
+                    filename, distdata, chunk_shape=(2, 3)
+                ),
+            ),
         ]
-        # Skip because write requires qctool, which is not installed by default
-        #     from pysnptools.distreader import Bgen
-        #     the_class_and_suffix_list.append((Bgen,"bgen",None,lambda filename,distdata: Bgen.write(filename,distdata,bits=32)))
+        from pysnptools.distreader import Bgen
+
+        the_class_and_suffix_list.append(
+            (
+                Bgen,
+                "bgen",
+                None,
+                lambda filename, distdata: Bgen.write(
+                    filename,
+                    distdata,
+                    bits=32,
+                    sample_function=lambda fam, ind: fam + "," + ind,
+                ),
+            )
+        )
 
         cant_do_col_prop_none_set = {"bgen"}
         cant_do_col_len_0_set = {"bgen"}
@@ -465,6 +491,44 @@ class TestDistReaders(unittest.TestCase):
 
         logging.info("done with test")
 
+    def test_bgen_as_snp(self):
+        from pysnptools.distreader import Bgen
+
+        bgen = Bgen(self.currentFolder + "/../examples/2500x100.bgen")
+        distdata = bgen.read()
+        for hard_call in [False, True]:
+            for dtype in [np.float64, np.float32]:
+                for order in ["F", "C"]:
+                    for num_threads in [1, 3]:
+                        # Bgen decodes straight to expected values, DistData doesn't
+                        for dist2snp, expected in [
+                            (bgen.as_snp(max_weight=3, hard_call=hard_call), distdata),
+                            (
+                                bgen.as_snp(max_weight=3, hard_call=hard_call)[
+                                    ::2, [5, 2, 7]
+                                ],
+                                distdata[::2, [5, 2, 7]],
+                            ),
+                            (
+                                bgen[::2, :].as_snp(
+                                    max_weight=3, hard_call=hard_call, block_size=7
+                                ),
+                                distdata[::2, :],
+                            ),
+                        ]:
+                            val = dist2snp.read(
+                                dtype=dtype, order=order, num_threads=num_threads
+                            ).val
+                            expected_val = expected.as_snp(
+                                max_weight=3, hard_call=hard_call
+                            ).read(dtype=dtype, order=order).val
+                            assert val.flags[order + "_CONTIGUOUS"]
+                            np.testing.assert_allclose(
+                                val, expected_val, rtol=1e-6, equal_nan=True
+                            )
+                            if hard_call:
+                                assert set(np.unique(val[val == val])) <= {0, 1.5, 3}
+
     def test_subset_Snp2Dist(self):  # !!!move these to another test class
         logging.info("in test_subset")
         snpreader = Bed(
@@ -732,6 +796,18 @@ class TestDistReaderDocStrings(unittest.TestCase):
         os.chdir(old_dir)
         assert result.failed == 0, "failed doc test: " + __file__
 
+    def test_distchunked(self):
+        import pysnptools.distreader.distchunked
+
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+        result = doctest.testmod(
+            pysnptools.distreader.distchunked,
+            optionflags=doctest.ELLIPSIS | doctest.NORMALIZE_WHITESPACE,
+        )
+        os.chdir(old_dir)
+        assert result.failed == 0, "failed doc test: " + __file__
+
 
 def getTestSuite():
     """
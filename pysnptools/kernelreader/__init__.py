@@ -7,3 +7,5 @@ from pysnptools.kernelreader.snpkernel import SnpKernel  # noqa: F401, E402
 from pysnptools.kernelreader.identity import Identity  # noqa: F401, E402
 from pysnptools.kernelreader.kernelnpz import KernelNpz  # noqa: F401, E402
 from pysnptools.kernelreader.kernelhdf5 import KernelHdf5  # noqa: F401, E402
+from pysnptools.kernelreader.kernelmemmap import KernelMemMap  # noqa: F401, E402
+from pysnptools.kernelreader.kernelaccumulator import KernelAccumulator  # noqa: F401, E402
@@ -0,0 +1,63 @@
+import numpy as np
+from pysnptools.kernelreader import KernelReader
+
+
+class _LocoKernel(KernelReader):
+    """
+    A leave-one-chromosome-out kernel, the total kernel minus the partial kernel of one chromosome.
+    Values are computed only when read.
+    """
+
+    def __init__(self, total, partial, chrom):
+        super(_LocoKernel, self).__init__()
+        self._total = total
+        self._partial = partial
+        self._chrom = chrom
+
+    def __repr__(self):
+        return "{0}({1},chrom={2})".format(
+            self.__class__.__name__, self._total, self._chrom
+        )
+
+    @property
+    def row(self):
+        return self._total.row
+
+    @property
+    def col(self):
+        return self._total.col
+
+    def copyinputs(self, copier):
+        self._total.copyinputs(copier)
+        self._partial.copyinputs(copier)
+
+    def _read(
+        self,
+        row_index_or_none,
+        col_index_or_none,
+        order,
+        dtype,
+        force_python_only,
+        view_ok,
+        num_threads,
+    ):
+        dtype = np.dtype(dtype)
+        val = self._total._read(
+            row_index_or_none,
+            col_index_or_none,
+            order,
+            dtype,
+            force_python_only,
+            False,
+            num_threads,
+        )
+        val -= self._partial._read(
+            row_index_or_none,
+            col_index_or_none,
+            order,
+            dtype,
+            force_python_only,
+            True,
+            num_threads,
+        )
+        return val
@@ -0,0 +1,350 @@
+import logging
+import numpy as np
+import unittest
+import doctest
+import pysnptools.util as pstutil
+import pysnptools.standardizer as stdizer
+from pysnptools.kernelreader import KernelData
+
+
+class KernelAccumulator(KernelData):
+    r"""
+    A :class:`.KernelData` whose :attr:`KernelData.val` is the sum of the kernel contributions of a changeable set of SNPs.
+    SNPs can be added with :meth:`add_sids` and removed with :meth:`remove_sids` without re-reading the other SNPs.
+    The accumulator, including the standardization statistics learned for each SNP, can be saved with :meth:`save`
+    and re-opened with :meth:`load`.
+
+    See :class:`.KernelData` for general examples of using KernelData.
+
+    **Constructor:**
+        :Parameters: * **iid** (an array of string pairs) -- The :attr:`KernelReader.iid` information.
+                     * **standardizer** (:class:`.Standardizer`) -- How the SNP data should be standardized,
+                       for example, :class:`.Unit`, :class:`.Beta` or :class:`standardizer.Identity`
+                     * **dtype** (optional, data-type) -- The data-type of the kernel values. Default: numpy.float64
+
+        :Example:
+
+        >>> from pysnptools.kernelreader import KernelAccumulator
+        >>> from pysnptools.snpreader import Bed
+        >>> from pysnptools.standardizer import Unit
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bedfile = example_file("tests/datasets/all_chr.maf0.001.N300.*","*.bed")
+        >>> snp_on_disk = Bed(bedfile,count_A1=False)
+        >>> kernel_accumulator = KernelAccumulator(snp_on_disk.iid, Unit())
+        >>> kernel_accumulator.add_sids(snp_on_disk[:,:500])
+        >>> kernel_accumulator.add_sids(snp_on_disk[:,500:])
+        >>> print(kernel_accumulator.sid_count, '{0:.6f}'.format(kernel_accumulator.val[0,0]))
+        1015 901.421836
+        >>> kernel_accumulator.remove_sids(snp_on_disk[:,500:])
+        >>> print(kernel_accumulator.sid_count, '{0:.6f}'.format(kernel_accumulator.val[0,0]))
+        500 437.054390
+
+    **Methods beyond** :class:`.KernelData`
+
+    """
+
+    def __init__(self, iid, standardizer, dtype=np.float64):
+        iid = np.asarray(iid, dtype="str")
+        super(KernelAccumulator, self).__init__(
+            iid=iid,
+            val=np.zeros((len(iid), len(iid)), dtype=dtype),
+            name=str(standardizer),
+        )
+        self.standardizer = standardizer
+        self._sid = np.empty(0, dtype="str")
+        self._trained = None
+
+    @property
+    def sid(self):
+        """The sids of the SNPs whose contributions are currently in the kernel, in the order they were added."""
+        return self._sid
+
+    @property
+    def sid_count(self):
+        """The number of SNPs whose contributions are currently in the kernel."""
+        return len(self._sid)
+
+    @property
+    def trained(self):
+        """A constant :class:`.Standardizer` (for example, :class:`.UnitTrained`) holding the statistics used to standardize each SNP in :attr:`sid`.
+        None if no SNPs have been added."""
+        return self._trained
+
+    def add_sids(
+        self, snpreader, block_size=None, force_python_only=False, num_threads=None
+    ):
+        """Reads and standardizes the SNPs of a :class:`.SnpReader` and adds their contribution to the kernel, in place.
+
+        :param snpreader: The SNPs to add. Its iids must be the kernel's iids (in the same order) and its sids must not already be in the kernel.
+        :type snpreader: :class:`.SnpReader`
+
+        :param block_size: optional -- Default of None (meaning to load all). Suggested number of sids to read into memory at a time.
+        :type block_size: int or None
+
+        :param force_python_only: optional -- If False (default), may use outside library code. If True, requests that the read
+            be done without outside library code.
+        :type force_python_only: bool
+
+        :param num_threads: optional -- The number of threads with which to read and standardize data. Defaults to all available
+            processors. Can also be set with these environment variables (listed in priority order):
+            'PST_NUM_THREADS', 'NUM_THREADS', 'MKL_NUM_THREADS'.
+        :type num_threads: None or int
+        """
+        assert np.array_equal(
+            self.iid, snpreader.iid
+        ), "Expect the snpreader's iids to be the kernel's iids, in the same order"
+        sid = snpreader.sid
+        assert len(set(sid)) == len(sid), "Expect the sids to add to be unique"
+        assert not np.isin(sid, self._sid).any(), "Expect the sids to add not to already be in the kernel"
+
+        trained_list = [] if self._trained is None else [self._trained]
+        is_triangle_only = False
+        for snpdata, trained in snpreader.iter_blocks(
+            block_size or max(snpreader.sid_count, 1),
+            order="F",
+            dtype=self.val.dtype,
+            standardizer=self.standardizer,
+            return_trained=True,
+            force_python_only=force_python_only,
+            num_threads=num_threads,
+            prefetch=block_size is not None,
+        ):
+            trained_list.append(trained)
+            is_triangle_only = self._accumulate(snpdata.val, 1.0)
+        if is_triangle_only:
+            self._fill_lower()
+
+        if trained_list:
+            self._trained = self.standardizer._merge_trained(trained_list)
+        self._sid = np.concatenate([self._sid, sid])
+
+    def remove_sids(
+        self, snpreader, block_size=None, force_python_only=False, num_threads=None
+    ):
+        """Reads the SNPs of a :class:`.SnpReader` and subtracts their contribution from the kernel, in place.
+        The SNPs are standardized with the statistics saved when they were added (see :attr:`trained`), so the
+        contribution removed matches the one added.
+
+        :param snpreader: The SNPs to remove. Its iids must be the kernel's iids (in the same order) and its sids must be in the kernel.
+        :type snpreader: :class:`.SnpReader`
+
+        :param block_size: optional -- Default of None (meaning to load all). Suggested number of sids to read into memory at a time.
+        :type block_size: int or None
+
+        :param force_python_only: optional -- If False (default), may use outside library code. If True, requests that the read
+            be done without outside library code.
+        :type force_python_only: bool
+
+        :param num_threads: optional -- The number of threads with which to read and standardize data. Defaults to all available
+            processors. Can also be set with these environment variables (listed in priority order):
+            'PST_NUM_THREADS', 'NUM_THREADS', 'MKL_NUM_THREADS'.
+        :type num_threads: None or int
+        """
+        assert np.array_equal(
+            self.iid, snpreader.iid
+        ), "Expect the snpreader's iids to be the kernel's iids, in the same order"
+        sid = snpreader.sid
+        assert len(set(sid)) == len(sid), "Expect the sids to remove to be unique"
+        sid_to_index = {s: index for index, s in enumerate(self._sid)}
+        assert all(
+            s in sid_to_index for s in sid
+        ), "Expect the sids to remove to be in the kernel"
+        if len(sid) == 0:
+            return
+
+        is_triangle_only = False
+        for snpdata in snpreader.iter_blocks(
+            block_size or snpreader.sid_count,
+            order="F",
+            dtype=self.val.dtype,
+            force_python_only=force_python_only,
+            num_threads=num_threads,
+            prefetch=block_size is not None,
+        ):
+            sid_index = np.array([sid_to_index[s] for s in snpdata.sid], dtype=np.intp)
+            self._trained_subset(sid_index).standardize(
+                snpdata, force_python_only=force_python_only, num_threads=num_threads
+            )
+            is_triangle_only = self._accumulate(snpdata.val, -1.0)
+        if is_triangle_only:
+            self._fill_lower()
+
+        keep = np.ones(len(self._sid), dtype=bool)
+        keep[[sid_to_index[s] for s in sid]] = False
+        self._trained = self._trained_subset(np.flatnonzero(keep))
+        self._sid = self._sid[keep]
+
+    def save(self, filename):
+        r"""Saves the accumulator, including the kernel, sids, and standardization statistics, to a \*.npz file.
+
+        :param filename: the name of the file to create
+        :type filename: string
+
+        >>> import pysnptools.util as pstutil
+        >>> from pysnptools.kernelreader import KernelAccumulator
+        >>> from pysnptools.snpreader import Bed
+        >>> from pysnptools.standardizer import Unit
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bedfile = example_file("tests/datasets/all_chr.maf0.001.N300.*","*.bed")
+        >>> snp_on_disk = Bed(bedfile,count_A1=False)
+        >>> kernel_accumulator = KernelAccumulator(snp_on_disk.iid, Unit())
+        >>> kernel_accumulator.add_sids(snp_on_disk[:,:500])
+        >>> pstutil.create_directory_if_necessary("tempdir/all_chr.kernelacc.npz")
+        >>> kernel_accumulator.save("tempdir/all_chr.kernelacc.npz")
+        >>> kernel_accumulator2 = KernelAccumulator.load("tempdir/all_chr.kernelacc.npz")
+        >>> kernel_accumulator2.add_sids(snp_on_disk[:,500:]) # Later, add more SNPs
+        >>> print(kernel_accumulator2.sid_count, '{0:.6f}'.format(kernel_accumulator2.val[0,0]))
+        1015 901.421836
+        """
+        trained = self._trained
+        if isinstance(self.standardizer, stdizer.Unit):
+            kind, a, b = "unit", np.nan, np.nan
+        elif isinstance(self.standardizer, stdizer.Beta):
+            kind, a, b = "beta", self.standardizer.a, self.standardizer.b
+        elif isinstance(self.standardizer, stdizer.Identity):
+            kind, a, b = "identity", np.nan, np.nan
+        else:
+            raise Exception(
+                "Don't know how to save standardizer '{0}'".format(self.standardizer)
+            )
+        stats = (
+            trained.stats
+            if hasattr(trained, "stats")
+            else np.empty((len(self._sid), 0), dtype=self.val.dtype)
+        )
+        np.savez(
+            filename,
+            iid=self.iid,
+            sid=self._sid,
+            val=self.val,
+            stats=stats,
+            standardizer=np.array([kind]),
+            ab=np.array([a, b]),
+        )
+        logging.debug("Done writing " + filename)
+
+    @staticmethod
+    def load(filename):
+        """Re-opens a :class:`.KernelAccumulator` saved with :meth:`save`.
+
+        :param filename: the name of the file to read
+        :type filename: string
+        :rtype: :class:`.KernelAccumulator`
+        """
+        with np.load(filename, allow_pickle=False) as data:
+            kind = str(data["standardizer"][0])
+            a, b = data["ab"]
+            val = data["val"]
+            sid = data["sid"]
+            stats = data["stats"]
+            iid = data["iid"]
+        if kind == "unit":
+            standardizer = stdizer.Unit()
+        elif kind == "beta":
+            standardizer = stdizer.Beta(float(a), float(b))
+        else:
+            assert kind == "identity", "Don't know standardizer '{0}'".format(kind)
+            standardizer = stdizer.Identity()
+
+        self = KernelAccumulator(iid, standardizer, dtype=val.dtype)
+        self.val[:, :] = val
+        self._sid = sid
+        if len(sid) > 0:
+            self._trained = KernelAccumulator._make_trained(
+                standardizer, sid, stats
+            )
+        return self
+
+    def _accumulate(self, val, alpha):
+        from pysnptools.snpreader import SnpReader
+
+        return SnpReader._syrk_accumulate(self.val, val, alpha)
+
+    def _fill_lower(self):
+        from pysnptools.snpreader import SnpReader
+
+        SnpReader._fill_lower_from_upper(self.val)
+
+    def _trained_subset(self, sid_index):
+        if not hasattr(self._trained, "stats"):
+            return self._trained
+        return KernelAccumulator._make_trained(
+            self.standardizer, self._sid[sid_index], self._trained.stats[sid_index]
+        )
+
+    @staticmethod
+    def _make_trained(standardizer, sid, stats):
+        if isinstance(standardizer, stdizer.Unit):
+            return stdizer.UnitTrained(sid, stats)
+        if isinstance(standardizer, stdizer.Beta):
+            return stdizer.BetaTrained(standardizer.a, standardizer.b, sid, stats)
+        return standardizer
+
+
+class TestKernelAccumulator(unittest.TestCase):
+    def test1(self):
+        import os
+        from pysnptools.kernelreader import KernelAccumulator
+        from pysnptools.snpreader import Bed
+        from pysnptools.standardizer import Unit, Beta, Identity
+
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+
+        bed = Bed("../../tests/datasets/all_chr.maf0.001.N300", count_A1=False)
+        pstutil.create_directory_if_necessary("tempdir/all_chr.kernelacc.npz")
+        for standardizer in [Unit(), Beta(1, 25), Identity()]:
+            for dtype in [np.float64, np.float32]:
+                rtol = 1e-5 if dtype == np.float32 else 1e-10
+                atol = 1e-1 if dtype == np.float32 else 1e-8
+                kernel_accumulator = KernelAccumulator(bed.iid, standardizer, dtype)
+                kernel_accumulator.add_sids(bed[:, 100:], block_size=300)
+                kernel_accumulator.add_sids(bed[:, :100])
+                expected = bed.read_kernel(standardizer)
+                assert kernel_accumulator.sid_count == bed.sid_count
+                assert kernel_accumulator.val.dtype == dtype
+                assert np.allclose(kernel_accumulator.val, expected.val, rtol=rtol, atol=atol)
+
+                with self.assertRaises(AssertionError):
+                    kernel_accumulator.add_sids(bed[:, 5:7])
+
+                kernel_accumulator.save("tempdir/all_chr.kernelacc.npz")
+                kernel_accumulator = KernelAccumulator.load("tempdir/all_chr.kernelacc.npz")
+                kernel_accumulator.remove_sids(bed[:, 1::2], block_size=200)
+                kernel_accumulator.remove_sids(bed[:, 4:10:2])
+
+                # The statistics were learned on all the iids, so with Unit and Beta, the standardized SNPs
+                # are the same as standardizing the remaining SNPs from scratch
+                remaining = bed[:, bed.sid_to_index(kernel_accumulator.sid)]
+                expected = remaining.read_kernel(standardizer)
+                assert np.array_equal(remaining.sid, kernel_accumulator.sid)
+                assert np.allclose(kernel_accumulator.val, expected.val, rtol=rtol, atol=atol)
+                assert np.allclose(kernel_accumulator.val, kernel_accumulator.val.T, rtol=rtol, atol=atol)
+                if not isinstance(standardizer, Identity):
+                    assert np.array_equal(kernel_accumulator.trained.sid, remaining.sid)
+
+        os.chdir(old_dir)
+
+
+def getTestSuite():
+    """
+    set up composite test suite
+    """
+
+    test_suite = unittest.TestSuite([])
+    test_suite.addTests(
+        unittest.TestLoader().loadTestsFromTestCase(TestKernelAccumulator)
+    )
+    return test_suite
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARN)
+
+    suites = getTestSuite()
+    r = unittest.TextTestRunner(failfast=True)
+    ret = r.run(suites)
+    assert ret.wasSuccessful()
+
+    result = doctest.testmod(optionflags=doctest.ELLIPSIS)
+    assert result.failed == 0, "failed doc test: " + __file__
@@ -0,0 +1,339 @@
+import logging
+import os
+import shutil
+import numpy as np
+import unittest
+import doctest
+import pysnptools.util as pstutil
+from pysnptools.pstreader import PstMemMap
+from pysnptools.kernelreader import KernelData
+
+
+class KernelMemMap(PstMemMap, KernelData):
+    r"""
+    A :class:`.KernelData` that keeps its data in a memory-mapped file. This allows kernels larger than fit in main memory.
+
+    See :class:`.KernelData` for general examples of using KernelData.
+
+    **Constructor:**
+        :Parameters: **filename** (*string*) -- The *\*.kernel.memmap* file to read.
+
+        Also see :meth:`.KernelMemMap.empty` and :meth:`.KernelMemMap.write`.
+
+        :Example:
+
+        >>> import pysnptools.util as pstutil
+        >>> from pysnptools.kernelreader import KernelMemMap, SnpKernel
+        >>> from pysnptools.snpreader import Bed
+        >>> from pysnptools.standardizer import Unit
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bedfile = example_file("tests/datasets/all_chr.maf0.001.N300.*","*.bed")
+        >>> pstutil.create_directory_if_necessary("tempdir/all_chr.kernel.memmap")
+        >>> _ = KernelMemMap.write("tempdir/all_chr.kernel.memmap",SnpKernel(Bed(bedfile,count_A1=False),Unit()))
+        >>> kernel_mem_map = KernelMemMap("tempdir/all_chr.kernel.memmap")
+        >>> print(kernel_mem_map.iid_count, '{0:.6f}'.format(kernel_mem_map.val[0,0]))
+        300 901.421836
+
+    **Methods inherited from** :class:`.KernelData`
+
+        :meth:`.KernelData.allclose`, :meth:`.KernelData.standardize`
+
+    **Methods beyond** :class:`.KernelReader`
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(KernelMemMap, self).__init__(*args, **kwargs)
+
+    @property
+    def val(self):
+        """The 2D NumPy memmap array of floats that represents the values. You can get this property, but cannot set it (except with itself)"""
+        self._run_once()
+        return self._val
+
+    @val.setter
+    def val(self, new_value):
+        self._run_once()
+        if self._val is new_value:
+            return
+        raise Exception("KernelMemMap val's cannot be set to a different array")
+
+    @property
+    def offset(self):
+        """The byte position in the file where the memory-mapped values start.
+
+        (The disk space before this is used to store :attr:`KernelReader.iid` information.
+        This property is useful when interfacing with, for example, external Fortran and C matrix libraries.)
+
+        """
+        self._run_once()
+        return self._offset
+
+    @property
+    def filename(self):
+        """The name of the memory-mapped file"""
+        # Don't need '_run_once'
+        return self._filename
+
+    @staticmethod
+    def empty(iid, filename, order="F", dtype=np.float64):
+        """Create an empty square :class:`.KernelMemMap` on disk.
+
+        :param iid: The :attr:`KernelReader.iid` information
+        :type iid: an array of string pairs
+
+        :param filename: name of memory-mapped file to create
+        :type filename: string
+
+        :param order: {'F' (default), 'C'}, optional -- Specify the order of the ndarray.
+        :type order: string or None
+
+        :param dtype: {numpy.float64 (default), numpy.float32}, optional -- The data-type for the :attr:`KernelMemMap.val` ndarray.
+        :type dtype: data-type
+
+        :rtype: :class:`.KernelMemMap`
+
+        >>> import pysnptools.util as pstutil
+        >>> from pysnptools.kernelreader import KernelMemMap
+        >>> filename = "tempdir/tiny.kernel.memmap"
+        >>> pstutil.create_directory_if_necessary(filename)
+        >>> kernel_mem_map = KernelMemMap.empty(iid=[['fam0','iid0'],['fam0','iid1']],filename=filename,order="F",dtype=np.float64)
+        >>> kernel_mem_map.val[:,:] = [[1.,.5],[.5,1.]]
+        >>> kernel_mem_map.flush()
+
+        """
+
+        self = KernelMemMap(filename)
+        self._empty_inner(
+            row=iid,
+            col=iid,
+            filename=filename,
+            row_property=None,
+            col_property=None,
+            order=order,
+            dtype=dtype,
+            val_shape=None,
+        )
+        return self
+
+    def flush(self):
+        """Flush :attr:`KernelMemMap.val` to disk and close the file. (If values or properties are accessed again, the file will be reopened.)"""
+        if self._ran_once:
+            self.val.flush()
+            del self._val
+            self._ran_once = False
+
+    @staticmethod
+    def write(
+        filename,
+        kernelreader,
+        order="A",
+        dtype=None,
+        block_size=None,
+        memory_budget=None,
+        num_threads=None,
+    ):
+        """Writes a :class:`KernelReader` to :class:`KernelMemMap` format.
+
+        :param filename: the name of the file to create
+        :type filename: string
+        :param kernelreader: The data that should be written to disk. If it is a :class:`.SnpKernel`, the kernel is
+            computed directly into the file, so it never needs to fit in memory.
+        :type kernelreader: :class:`KernelReader`
+        :param order: {'A' (default), 'F', 'C'}, optional -- Specify the order of the ndarray on disk.
+        :type order: string
+        :param dtype: {None (default), numpy.float64, numpy.float32}, optional -- The data-type of the values on disk.
+            By default, that of the input if it is in memory, otherwise numpy.float64.
+        :type dtype: data-type
+        :param block_size: optional -- The number of SNPs (for a :class:`.SnpKernel`) or kernel rows (otherwise) to read into memory at a time.
+            Defaults to the :class:`.SnpKernel`'s own block size or, if given, to a size derived from **memory_budget**.
+        :type block_size: int or None
+        :param memory_budget: optional -- For a :class:`.SnpKernel`, the approximate working memory to use, as a number of bytes or as a string such as "8GB".
+            The kernel is built in panels of rows, with half the budget going to the panel and half to two blocks of SNP values.
+            When a single panel can't hold every row, the SNP data is re-read once per panel (for successively fewer individuals).
+            Default: enough for a single panel.
+        :type memory_budget: int, string, or None
+        :param num_threads: optional -- The number of threads with which to read and standardize data. Defaults to all available
+            processors. Can also be set with these environment variables (listed in priority order):
+            'PST_NUM_THREADS', 'NUM_THREADS', 'MKL_NUM_THREADS'.
+        :type num_threads: None or int
+        :rtype: :class:`.KernelMemMap`
+
+        >>> import pysnptools.util as pstutil
+        >>> from pysnptools.kernelreader import KernelMemMap, SnpKernel
+        >>> from pysnptools.snpreader import Bed
+        >>> from pysnptools.standardizer import Unit
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bedfile = example_file("tests/datasets/all_chr.maf0.001.N300.*","*.bed")
+        >>> pstutil.create_directory_if_necessary("tempdir/all_chr.kernel.memmap")
+        >>> KernelMemMap.write("tempdir/all_chr.kernel.memmap",SnpKernel(Bed(bedfile,count_A1=False),Unit()),memory_budget=500_000)
+        KernelMemMap('tempdir/all_chr.kernel.memmap')
+        """
+        from pysnptools.kernelreader import SnpKernel
+        from pysnptools.snpreader import SnpReader
+
+        if hasattr(kernelreader, "val"):
+            order = PstMemMap._order(kernelreader) if order == "A" else order
+            dtype = dtype or kernelreader.val.dtype
+        else:
+            order = "F" if order == "A" else order
+            dtype = dtype or np.float64
+        dtype = np.dtype(dtype)
+
+        kernelmemmap = KernelMemMap.empty(
+            iid=kernelreader.iid,
+            filename=filename + ".temp",
+            order=order,
+            dtype=dtype,
+        )
+        if hasattr(kernelreader, "val"):
+            kernelmemmap.val[:, :] = kernelreader.val
+        elif isinstance(kernelreader, SnpKernel):
+            snpreader = kernelreader.snpreader
+            if memory_budget is not None:
+                budget_block_size, iid_block_size = SnpReader._kernel_block_plan(
+                    snpreader.iid_count,
+                    snpreader.sid_count,
+                    dtype.itemsize,
+                    memory_budget,
+                )
+            else:
+                budget_block_size, iid_block_size = None, snpreader.iid_count
+            block_size = (
+                block_size
+                or budget_block_size
+                or kernelreader.block_size
+                or max(snpreader.sid_count, 1)
+            )
+            snpreader._read_kernel_into(
+                kernelmemmap.val,
+                kernelreader.standardizer,
+                block_size,
+                iid_block_size,
+                num_threads=num_threads,
+            )
+        else:
+            block_size = block_size or max(
+                (100_000) // max(1, kernelreader.iid_count), 1
+            )
+            for start in range(0, kernelreader.iid_count, block_size):
+                kerneldata = kernelreader[start : start + block_size, :].read(
+                    order=order, dtype=dtype, num_threads=num_threads
+                )
+                kernelmemmap.val[start : start + kerneldata.row_count, :] = (
+                    kerneldata.val
+                )
+
+        kernelmemmap.flush()
+        if os.path.exists(filename):
+            os.remove(filename)
+        shutil.move(filename + ".temp", filename)
+        logging.debug("Done writing " + filename)
+        return KernelMemMap(filename)
+
+    def _run_once(self):
+        if self._ran_once:
+            return
+        row_ascii, col_ascii, val, row_property, col_property = self._run_once_inner()
+        row = np.array(row_ascii, dtype="str")  # !!!avoid this copy when not needed
+        col = np.array(col_ascii, dtype="str")  # !!!avoid this copy when not needed
+        if np.array_equal(row, col):  # When square, keep iid0 and iid1 the same object
+            col = row
+
+        KernelData.__init__(
+            self,
+            iid0=row,
+            iid1=col,
+            val=val,
+            name="np.memmap('{0}')".format(self._filename),
+        )
+
+
+class TestKernelMemMap(unittest.TestCase):
+    def test1(self):
+        from pysnptools.kernelreader import KernelMemMap, SnpKernel
+        from pysnptools.snpreader import Bed
+        from pysnptools.standardizer import Unit, Beta
+
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+
+        filename = "tempdir/tiny.kernel.memmap"
+        pstutil.create_directory_if_necessary(filename)
+        kernelmemmap = KernelMemMap.empty(
+            iid=[["fam0", "iid0"], ["fam0", "iid1"]], filename=filename
+        )
+        assert isinstance(kernelmemmap.val, np.memmap)
+        kernelmemmap.val[:, :] = [[1.0, 0.5], [0.5, 1.0]]
+        kernelmemmap.flush()
+        kernelmemmap2 = KernelMemMap(filename)
+        assert isinstance(kernelmemmap2.val, np.memmap)
+        assert kernelmemmap2.iid0 is kernelmemmap2.iid1
+        assert np.array_equal(
+            kernelmemmap2[[1], [0]].read(view_ok=True).val, np.array([[0.5]])
+        )
+
+        bed = Bed(
+            "../../tests/datasets/all_chr.maf0.001.N300", count_A1=False
+        )[:, ::3]
+        for standardizer in [Unit(), Beta(1, 25)]:
+            expected = bed.read_kernel(standardizer)
+            for dtype in [np.float64, np.float32]:
+                for order in ["F", "C"]:
+                    for memory_budget in [None, 50_000, 300 * 300 * 8]:
+                        result = KernelMemMap.write(
+                            "tempdir/all_chr.kernel.memmap",
+                            SnpKernel(bed, standardizer, block_size=100),
+                            order=order,
+                            dtype=dtype,
+                            memory_budget=memory_budget,
+                        )
+                        assert result.val.dtype == dtype
+                        assert np.allclose(
+                            result.val,
+                            expected.val,
+                            rtol=1e-5 if dtype == np.float32 else 1e-10,
+                            atol=1e-2 if dtype == np.float32 else 1e-8,
+                        )
+                        result.flush()
+
+        with self.assertRaises(ValueError):
+            KernelMemMap.write(
+                "tempdir/all_chr.kernel.memmap",
+                SnpKernel(bed, Unit()),
+                memory_budget=1000,
+            )
+
+        # A kernel that is already in memory and one that is not a SnpKernel
+        KernelMemMap.write("tempdir/all_chr.kernel.memmap", expected)
+        result = KernelMemMap.write(
+            "tempdir/all_chr.kernel.memmap",
+            KernelMemMap("tempdir/all_chr.kernel.memmap")[::-1],
+            block_size=7,
+        )
+        assert np.array_equal(result.val, expected.val[::-1, ::-1])
+        result.flush()
+
+        os.chdir(old_dir)
+
+
+def getTestSuite():
+    """
+    set up composite test suite
+    """
+
+    test_suite = unittest.TestSuite([])
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestKernelMemMap))
+    return test_suite
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARN)
+
+    suites = getTestSuite()
+    r = unittest.TextTestRunner(failfast=True)
+    ret = r.run(suites)
+    assert ret.wasSuccessful()
+
+    result = doctest.testmod(optionflags=doctest.ELLIPSIS)
+    assert result.failed == 0, "failed doc test: " + __file__
@@ -20,8 +20,11 @@ class SnpKernel(KernelReader):
         :Parameters: * **snpreader** (:class:`SnpReader`) -- The SNP data
                      * **standardizer** (:class:`Standardizer`) -- How the SNP data should be standardized
                      * **block_size** (optional, int) -- The number of SNPs to read at a time.
+                     * **memory_budget** (optional, int or string) -- Instead of **block_size**, the approximate memory to use, as a number
+                       of bytes or as a string such as "8GB". The block size is derived (and logged) when the kernel is read, from the number
+                       of individuals and SNPs and the dtype, after setting aside room for the kernel itself.
 
-        If **block_size** is not given, then all SNP data will be read at once.
+        If neither **block_size** nor **memory_budget** is given, then all SNP data will be read at once.
 
         :Example:
 
@@ -40,7 +43,7 @@ class SnpKernel(KernelReader):
         0.992307
     """
 
-    def __init__(self, snpreader, standardizer=None, block_size=None):
+    def __init__(self, snpreader, standardizer=None, block_size=None, memory_budget=None):
         super(SnpKernel, self).__init__()
 
         assert standardizer is not None, "'standardizer' must be provided"
@@ -48,6 +51,7 @@ class SnpKernel(KernelReader):
         self.snpreader = snpreader
         self.standardizer = standardizer
         self.block_size = block_size
+        self.memory_budget = memory_budget
 
     @property
     def row(self):
@@ -67,6 +71,8 @@ class SnpKernel(KernelReader):
         s = "SnpKernel({0},standardizer={1}".format(self.snpreader, standardizer)
         if self.block_size is not None:
             s += ",block_size={0}".format(self.block_size)
+        if self.memory_budget is not None:
+            s += ",memory_budget={0}".format(repr(self.memory_budget))
         s += ")"
         return s
 
@@ -95,24 +101,26 @@ class SnpKernel(KernelReader):
         ):
             return self.snpreader[row_index_or_none, :]._read_kernel(
                 self.standardizer,
-                self.block_size,
-                order,
-                dtype,
-                force_python_only,
-                view_ok,
-                num_threads,
+                block_size=self.block_size,
+                order=order,
+                dtype=dtype,
+                force_python_only=force_python_only,
+                view_ok=view_ok,
+                num_threads=num_threads,
+                memory_budget=self.memory_budget,
             )  # !!!LATER can this ever be reached?
         else:
             # LATER: If it was often that case that we wanted to standardize on all the data, but then only return a slice of the result,
             #       that could be done with less memory by working in blocks but not tabulating for all the iids.
             whole = self.snpreader._read_kernel(
                 self.standardizer,
-                self.block_size,
-                order,
-                dtype,
-                force_python_only,
-                view_ok,
-                num_threads,
+                block_size=self.block_size,
+                order=order,
+                dtype=dtype,
+                force_python_only=force_python_only,
+                view_ok=view_ok,
+                num_threads=num_threads,
+                memory_budget=self.memory_budget,
             )
             val, shares_memory = self._apply_sparray_or_slice_to_val(
                 whole,
@@ -143,6 +151,7 @@ class SnpKernel(KernelReader):
                 self.snpreader[row_index_or_none, :],
                 self.standardizer,
                 block_size=self.block_size,
+                memory_budget=self.memory_budget,
             )
         else:
             return KernelReader.__getitem__(self, iid_indexer_and_snp_indexer)
@@ -174,6 +183,7 @@ class SnpKernel(KernelReader):
                 block_size=self.block_size,
                 return_trained=True,
                 num_threads=num_threads,
+                memory_budget=self.memory_budget,
             )
             kernel = KernelData(iid=self.snpreader.iid, val=val, name=str(self), xp=xp)
             kernel, kernel_trained = kernel.standardize(
@@ -6,6 +6,8 @@ import os.path
 
 from pysnptools.kernelreader import *  # noqa: F403
 from pysnptools.kernelreader import Identity, KernelData, KernelNpz, SnpKernel
+from pysnptools.kernelreader.kernelmemmap import TestKernelMemMap
+from pysnptools.kernelreader.kernelaccumulator import TestKernelAccumulator
 from pysnptools.snpreader import Bed
 from pysnptools.util import create_directory_if_necessary
 from pysnptools.pstreader import PstReader
@@ -464,6 +466,34 @@ class TestKernelReader(unittest.TestCase):
 
         logging.info("done with test")
 
+    def test_syrk(self):
+        logging.info("in test_syrk")
+        np.random.seed(0)
+        sid_count = 50
+        val = np.array(np.random.randint(3, size=[23, sid_count]), dtype=np.float64)
+        val[3, 4] = np.nan
+        snpreader = SnpData(
+            iid=[[str(i), str(i)] for i in range(23)],
+            sid=[str(i) for i in range(sid_count)],
+            val=val,
+        )
+        snpdata = snpreader.read().standardize()
+        expected = snpdata.val.dot(snpdata.val.T)
+        for dtype in [np.float64, np.float32]:
+            for order in ["F", "C", "A"]:
+                for block_size in [None, 7]:
+                    kerneldata = snpreader.read_kernel(
+                        stdizer.Unit(), block_size=block_size, order=order, dtype=dtype
+                    )
+                    assert kerneldata.val.dtype == dtype
+                    assert order == "A" or kerneldata.val.flags[order + "_CONTIGUOUS"]
+                    np.testing.assert_array_almost_equal(
+                        kerneldata.val, expected, decimal=4
+                    )
+                    assert np.array_equal(kerneldata.val, kerneldata.val.T)
+
+        logging.info("done with test")
+
 
 # We do it this way instead of using doctest.DocTestSuite because doctest.DocTestSuite requires modules to be pickled, which python doesn't allow.
 # We need tests to be pickleable so that they can be run on a cluster.
@@ -535,6 +565,28 @@ class TestKrDocStrings(unittest.TestCase):
         os.chdir(old_dir)
         assert result.failed == 0, "failed doc test: " + __file__
 
+    def test_kernelmemmap(self):
+        import pysnptools.kernelreader.kernelmemmap
+
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+        result = doctest.testmod(
+            pysnptools.kernelreader.kernelmemmap, optionflags=doctest.ELLIPSIS
+        )
+        os.chdir(old_dir)
+        assert result.failed == 0, "failed doc test: " + __file__
+
+    def test_kernelaccumulator(self):
+        import pysnptools.kernelreader.kernelaccumulator
+
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+        result = doctest.testmod(
+            pysnptools.kernelreader.kernelaccumulator, optionflags=doctest.ELLIPSIS
+        )
+        os.chdir(old_dir)
+        assert result.failed == 0, "failed doc test: " + __file__
+
 
 def getTestSuite():
     """
@@ -544,6 +596,8 @@ def getTestSuite():
     test_suite = unittest.TestSuite([])
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestKernelReader))
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestKrDocStrings))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestKernelMemMap))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestKernelAccumulator))
     return test_suite
 
 
@@ -6,6 +6,7 @@ from pysnptools.pstreader.psthdf5 import PstHdf5 # noqa E402, F401
 from pysnptools.pstreader._oneshot import _OneShot # noqa E402, F401
 from pysnptools.pstreader.pstnpz import PstNpz # noqa E402, F401
 from pysnptools.pstreader.pstmemmap import PstMemMap # noqa E402, F401
+from pysnptools.pstreader.pstchunked import PstChunked # noqa E402, F401
 from pysnptools.pstreader._mergerows import _MergeRows # noqa E402, F401
 from pysnptools.pstreader._mergecols import _MergeCols # noqa E402, F401
 
@@ -0,0 +1,127 @@
+import numpy as np
+
+
+class _KeyIndex(object):
+    """
+    Finds the indexes of string keys (a 1-D array, such as sid, or a 2-D array, such as iid) with vectorized NumPy calls.
+
+    Each key is hashed to a uint64 (from its characters, so the hash doesn't depend on the array's string width).
+    The hashes are sorted once and then each batch of lookups is one call to :func:`numpy.searchsorted`, with the
+    candidates checked against the keys themselves. The sorted hashes and their order can be saved as one `*.npy` file
+    and memory mapped back.
+    """
+
+    _multiplier = np.uint64(1099511628211)  # The FNV-1 64-bit prime
+
+    def __init__(self, keys, hash_and_order=None):
+        self._keys = keys
+        if hash_and_order is None:
+            hash = self._hash(keys)
+            order = np.argsort(hash, kind="stable")
+            hash_and_order = np.empty((2, len(keys)), dtype=np.uint64)
+            hash_and_order[0] = hash[order]
+            hash_and_order[1] = order
+        assert hash_and_order.shape == (2, len(keys)), "real assert"
+        self._hash_sorted = hash_and_order[0]
+        self._order = hash_and_order[1].view(np.int64)
+        self._hash_and_order = hash_and_order
+
+    @staticmethod
+    def is_supported(keys):
+        return (
+            isinstance(keys, np.ndarray)
+            and keys.dtype.kind in "US"
+            and (keys.ndim == 1 or (keys.ndim == 2 and keys.shape[1] > 0))
+        )
+
+    @staticmethod
+    def _hash(keys):
+        keys = np.ascontiguousarray(keys)
+        char_dtype = np.uint32 if keys.dtype.kind == "U" else np.uint8
+        width = keys.dtype.itemsize // np.dtype(char_dtype).itemsize
+        chars = keys.view(char_dtype).reshape(keys.shape + (width,))
+        if keys.ndim == 1:
+            chars = chars.reshape(len(keys), 1, width)
+
+        hash = np.zeros(len(keys), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for column in range(chars.shape[1]):
+                # Hash each column on its own, last character first, so that trailing NULs (string padding)
+                # don't change its hash. Then combine the column hashes.
+                column_hash = np.zeros(len(keys), dtype=np.uint64)
+                for position in range(width - 1, -1, -1):
+                    column_hash *= _KeyIndex._multiplier
+                    column_hash += chars[:, column, position]
+                hash *= _KeyIndex._multiplier
+                hash += column_hash
+                hash *= _KeyIndex._multiplier
+                hash += np.uint64(column + 1)
+        return hash
+
+    def duplicates(self):
+        """
+        Returns the (possibly empty) list of keys that appear more than once.
+        """
+        same_hash = np.flatnonzero(self._hash_sorted[1:] == self._hash_sorted[:-1])
+        # Only keys that share a hash with another key need to be compared
+        member_list = np.unique(np.concatenate([same_hash, same_hash + 1]))
+        seen = set()
+        duplicate_list = []
+        for index in self._order[member_list]:
+            key = self._keys[index]
+            hashable_key = _KeyIndex._hashable(key)
+            if hashable_key in seen:
+                duplicate_list.append(key)
+            seen.add(hashable_key)
+        return duplicate_list
+
+    def index(self, query):
+        """
+        Returns the indexes of an array of keys (of the same kind and dimension as the index's keys).
+        Raises a KeyError if any key is missing.
+        """
+        query = np.asarray(query)
+        if len(query) == 0:
+            return np.zeros(0, dtype=np.int_)
+        if len(self._keys) == 0:
+            raise KeyError(_KeyIndex._hashable(query[0]))
+        query_hash = self._hash(query)
+        position = np.minimum(
+            np.searchsorted(self._hash_sorted, query_hash), len(self._hash_sorted) - 1
+        )
+        index = self._order[position].astype(np.int_)
+        candidate = np.flatnonzero(self._hash_sorted[position] == query_hash)
+        is_same = self._keys[index[candidate]] == query[candidate]
+        if query.ndim == 2:
+            is_same = np.all(is_same, axis=1)
+        is_match = np.zeros(len(query), dtype=bool)
+        is_match[candidate[is_same]] = True
+
+        for i in np.flatnonzero(~is_match):  # Misses and (rarely) hash collisions
+            index[i] = self._index_one(query[i], query_hash[i], position[i])
+        return index
+
+    def _index_one(self, key, key_hash, position):
+        while position < len(self._hash_sorted) and self._hash_sorted[position] == key_hash:
+            index = self._order[position]
+            if np.array_equal(self._keys[index], key):
+                return index
+            position += 1
+        raise KeyError(_KeyIndex._hashable(key))
+
+    @staticmethod
+    def _hashable(key):
+        return key.item() if np.ndim(key) == 0 else tuple(key.tolist())
+
+    def save(self, filename):
+        np.save(filename, self._hash_and_order)
+
+    @staticmethod
+    def load(filename, keys):
+        """
+        Memory maps a saved index. Returns None if it doesn't fit the keys.
+        """
+        hash_and_order = np.load(filename, mmap_mode="r")
+        if hash_and_order.dtype != np.uint64 or hash_and_order.shape != (2, len(keys)):
+            return None
+        return _KeyIndex(keys, hash_and_order)
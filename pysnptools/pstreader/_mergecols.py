@@ -1,9 +1,39 @@
 import logging
 import os
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import pysnptools.util as pstutil
 from pysnptools.pstreader import PstReader
 
 
+def _route_index(index, count_list):
+    """
+    Given indexes into the concatenation of readers with **count_list** items each, returns a list of
+    (reader_index, positions, relative_index) for every reader that is indexed. 'positions' are the (increasing)
+    positions in **index** of that reader's items and 'relative_index' are the items' indexes within the reader.
+    """
+    index = np.asarray(index, dtype=np.intp)
+    start_list = np.concatenate([[0], np.cumsum(count_list)]).astype(np.intp)
+    reader_of = np.searchsorted(start_list, index, side="right") - 1
+    position = np.argsort(reader_of, kind="stable")
+    reader_index_list, first_list = np.unique(reader_of[position], return_index=True)
+    return [
+        (int(reader_index), positions, index[positions] - start_list[reader_index])
+        for reader_index, positions in zip(
+            reader_index_list, np.split(position, first_list[1:])
+        )
+    ]
+
+
+def _as_slice(positions):
+    """
+    If the increasing positions are consecutive, returns the equivalent slice, otherwise returns them.
+    """
+    if len(positions) > 0 and positions[-1] - positions[0] == len(positions) - 1:
+        return slice(int(positions[0]), int(positions[-1]) + 1)
+    return positions
+
+
 # !!! would be better to make a Transpose class that could term _mergerows into mergecols? Be sure special Bed code is still there.
 class _MergeCols(PstReader):
     def __init__(self, reader_list, cache_file=None, skip_check=False):
@@ -130,18 +160,7 @@ class _MergeCols(PstReader):
             copier.input(reader)
 
     def _create_reader_and_col_index_list(self, col_index):
-        result = []
-        start = 0
-        for reader_index in range(len(self.reader_list)):
-            stop = int(
-                start + self.col_count_list[reader_index]
-            )  # !!! shouldn't this be col_count (and check _mergerows, too)
-            is_here = (col_index >= start) * (col_index < stop)
-            if any(is_here):
-                col_index_rel = col_index[is_here] - start
-                result.append((reader_index, is_here, col_index_rel))
-            start = stop
-        return result
+        return _route_index(col_index, self.col_count_list)
 
     def _read(
         self,
@@ -203,47 +222,57 @@ class _MergeCols(PstReader):
                 order == "A" or order is None
             ):  # LATER does every _read( need code like this?
                 order = "F"
-            val = None
+            val_shape = getattr(self, "val_shape", None)
+            val = np.empty(
+                [row_index_or_none_count, col_index_or_none_count]
+                + ([] if val_shape is None else [val_shape]),
+                dtype=dtype,
+                order=order,
+            )
 
-            for reader_index, is_here, col_index_rel in reader_and_col_index_list:
-                reader = self.reader_list[reader_index]
-                if reader_index % 1 == 0:
-                    logging.info("Reading from #{0}: {1}".format(reader_index, reader))
-                piece = reader._read(
-                    row_index_or_none,
-                    col_index_rel,
-                    order,
-                    dtype,
-                    force_python_only,
-                    view_ok=True,
-                    num_threads=num_threads,
-                )
-                if val is None:
-                    if len(piece.shape) == 2:
-                        val = np.empty(
-                            [row_index_or_none_count, col_index_or_none_count],
-                            dtype=dtype,
-                            order=order,
-                        )
-                    else:
-                        val = np.empty(
-                            [
-                                row_index_or_none_count,
-                                col_index_or_none_count,
-                                self.val_shape,
-                            ],
-                            dtype=dtype,
-                            order=order,
-                        )
-                    val.fill(np.nan)  # LATER Keep this?
+            # The subreaders are read in parallel, each into its own columns of val.
+            # The threads are shared out among them.
+            num_threads = pstutil.get_num_threads(num_threads)
+            max_workers = min(num_threads, len(reader_and_col_index_list))
+            num_threads_per_reader = max(1, num_threads // max_workers)
 
-                if len(val.shape) == 2:
-                    val[:, is_here] = piece
+            def read_one(reader_index, col_positions, col_index_rel):
+                reader = self.reader_list[reader_index]
+                logging.info("Reading from #{0}: {1}".format(reader_index, reader))
+                col_positions = _as_slice(col_positions)
+                out = val[:, col_positions]
+                if (
+                    isinstance(col_positions, slice)
+                    and hasattr(reader, "_read_into")
+                    and (out.flags["F_CONTIGUOUS"] or out.flags["C_CONTIGUOUS"])
+                ):
+                    # These columns of val are contiguous, so the reader can fill them directly
+                    reader._read_into(
+                        row_index_or_none,
+                        col_index_rel,
+                        out,
+                        force_python_only,
+                        num_threads_per_reader,
+                    )
                 else:
-                    val[:, is_here, :] = piece
+                    val[:, col_positions] = reader._read(
+                        row_index_or_none,
+                        col_index_rel,
+                        order,
+                        dtype,
+                        force_python_only,
+                        view_ok=True,
+                        num_threads=num_threads_per_reader,
+                    )
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for future in [
+                    executor.submit(read_one, *reader_and_col_index)
+                    for reader_and_col_index in reader_and_col_index_list
+                ]:
+                    future.result()  # raise any exception
 
             logging.info(
                 "Ended read from {0} subreaders".format(len(reader_and_col_index_list))
             )
-            assert val is not None
             return val
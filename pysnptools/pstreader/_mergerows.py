@@ -3,7 +3,10 @@
 import logging
 import os
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import pysnptools.util as pstutil
 from pysnptools.pstreader import PstReader
+from pysnptools.pstreader._mergecols import _route_index, _as_slice
 
 
 class _MergeRows(PstReader):  # !!!why does this start with _
@@ -99,16 +102,7 @@ class _MergeRows(PstReader):  # !!!why does this start with _
             copier.input(reader)
 
     def _create_reader_and_row_index_list(self, row_index):
-        result = []
-        start = 0
-        for reader_index in range(len(self.reader_list)):  # !!!this needs test coverage
-            stop = start + self._row_count_list[reader_index]
-            is_here = (row_index >= start) * (row_index < stop)
-            if any(is_here):
-                row_index_rel = row_index[is_here] - start
-                result.append((reader_index, is_here, row_index_rel))
-            start = stop
-        return result
+        return _route_index(row_index, self._row_count_list)
 
     def _read(
         self,
@@ -164,22 +158,56 @@ class _MergeRows(PstReader):  # !!!why does this start with _
             )
             if order == "A" or order is None:
                 order = "F"
+            val_shape = getattr(self, "val_shape", None)
             val = np.empty(
-                (len(row_index), col_index_or_none_count), dtype=dtype, order=order
+                [len(row_index), col_index_or_none_count]
+                + ([] if val_shape is None else [val_shape]),
+                dtype=dtype,
+                order=order,
             )
-            for reader_index, is_here, row_index_rel in reader_and_row_index_list:
+
+            # The subreaders are read in parallel, each into its own rows of val.
+            # The threads are shared out among them.
+            num_threads = pstutil.get_num_threads(num_threads)
+            max_workers = min(num_threads, len(reader_and_row_index_list))
+            num_threads_per_reader = max(1, num_threads // max_workers)
+
+            def read_one(reader_index, row_positions, row_index_rel):
                 reader = self.reader_list[reader_index]
-                if reader_index % 1 == 0:
-                    logging.info("Reading from #{0}: {1}".format(reader_index, reader))
-                val[is_here, :] = reader._read(
-                    row_index_rel,
-                    col_index_or_none,
-                    order,
-                    dtype,
-                    force_python_only,
-                    view_ok=True,
-                    num_threads=num_threads,
-                )
+                logging.info("Reading from #{0}: {1}".format(reader_index, reader))
+                row_positions = _as_slice(row_positions)
+                out = val[row_positions, :]
+                if (
+                    isinstance(row_positions, slice)
+                    and hasattr(reader, "_read_into")
+                    and (out.flags["F_CONTIGUOUS"] or out.flags["C_CONTIGUOUS"])
+                ):
+                    # These rows of val are contiguous, so the reader can fill them directly
+                    reader._read_into(
+                        row_index_rel,
+                        col_index_or_none,
+                        out,
+                        force_python_only,
+                        num_threads_per_reader,
+                    )
+                else:
+                    val[row_positions, :] = reader._read(
+                        row_index_rel,
+                        col_index_or_none,
+                        order,
+                        dtype,
+                        force_python_only,
+                        view_ok=True,
+                        num_threads=num_threads_per_reader,
+                    )
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for future in [
+                    executor.submit(read_one, *reader_and_row_index)
+                    for reader_and_row_index in reader_and_row_index_list
+                ]:
+                    future.result()  # raise any exception
+
             logging.info(
                 "Ended read from {0} subreaders".format(len(reader_and_row_index_list))
             )
@@ -41,14 +41,49 @@ class _PstSubset(PstReader):
 
     @property
     def row_property(self):
-        self._run_once()
+        if not hasattr(self, "_row_property"):
+            self._row_property = self._internal.row_property[self._row_indexer]
         return self._row_property
 
     @property
     def col_property(self):
-        self._run_once()
+        if not hasattr(self, "_col_property"):
+            self._col_property = self._internal._col_property_of(self._col_indexer)
         return self._col_property
 
+    # The counts come from the indexers, so (for readers such as Bed that can count
+    # without parsing) reading values needn't load any row or col information.
+    @property
+    def row_count(self):
+        if not hasattr(self, "_row_count"):
+            self._row_count = _PstSubset._indexer_count(
+                self._internal.row_count, self._row_indexer, "row"
+            )
+        return self._row_count
+
+    @property
+    def col_count(self):
+        if not hasattr(self, "_col_count"):
+            self._col_count = _PstSubset._indexer_count(
+                self._internal.col_count, self._col_indexer, "col"
+            )
+        return self._col_count
+
+    @staticmethod
+    def _indexer_count(count, indexer, axis_name):
+        if isinstance(indexer, slice):
+            return len(range(*indexer.indices(count)))
+        # Check the bounds here, as indexing the row or col would, since they may never be loaded
+        if len(indexer) > 0:
+            for index in (indexer.min(), indexer.max()):
+                if not -count <= index < count:
+                    raise IndexError(
+                        "index {0} is out of bounds for {1} with size {2}".format(
+                            index, axis_name, count
+                        )
+                    )
+        return len(indexer)
+
     # Most _read's support only indexlists or None, but this one supports Slices, too.
     _read_accepts_slices = True
 
@@ -62,7 +97,6 @@ class _PstSubset(PstReader):
         view_ok,
         num_threads,
     ):
-        self._run_once()
         dtype = np.dtype(dtype)
         if hasattr(self._internal, "_read_accepts_slices"):
             assert (
@@ -122,13 +156,11 @@ class _PstSubset(PstReader):
         self._row = self._internal.row[
             self._row_indexer
         ]  # !!! would be nice if these four calls were replaced by calls to, e.g. "def _col_index(self,col_indexer)", etc that could be overridden (by for example Pairs)
-        self._col = self._internal.col[self._col_indexer]
+        self._col = self._internal._col_of(self._col_indexer)
         if self._row.dtype == self._col.dtype and np.array_equal(
             self._row, self._col
         ):  # When an object is square, keep the row and col the same object.
             self._col = self._row
-        self._row_property = self._internal.row_property[self._row_indexer]
-        self._col_property = self._internal.col_property[self._col_indexer]
 
     _slice_format = {
         (False, False, False): ":",
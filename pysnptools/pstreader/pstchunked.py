@@ -0,0 +1,409 @@
+import logging
+import os
+import shutil
+import unittest
+import doctest
+import zlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import pysnptools.util as pstutil
+from pysnptools.pstreader import PstReader, PstData
+
+_magic_number = 22892
+
+
+class PstChunked(PstReader):
+    r"""
+    A :class:`.PstReader` for reading \*.pst.chunked files from disk. The values are stored compressed, in
+    2-D chunks of rows and columns, so a read of a subset of rows, of columns, or of both decompresses only the chunks it needs.
+    The chunks are decompressed in parallel.
+
+    See :class:`.PstReader` for general examples of using PstReaders.
+
+    The file holds the row, col, row_property, and col_property information, then the chunks
+    (each compressed with zlib after its bytes are shuffled so that, for example, the high-order bytes of all its values are together),
+    then an index of where each chunk starts. The index is read once, when the information is first needed.
+
+    **Constructor:**
+        :Parameters: * **filename** (*string*) -- The PstChunked file to read.
+
+        Also see :meth:`.PstChunked.write`.
+
+        :Example:
+
+        >>> from pysnptools.pstreader import PstChunked, PstData
+        >>> import pysnptools.util as pstutil
+        >>> data1 = PstData(row=['a','b','c'],col=['y','z'],val=[[1,2],[3,4],[np.nan,6]],row_property=['A','B','C'])
+        >>> pstutil.create_directory_if_necessary("tempdir/tiny.pst.chunked")
+        >>> on_disk = PstChunked.write("tempdir/tiny.pst.chunked",data1,chunk_shape=(2,1))
+        >>> print(on_disk[1:,1].read().val)
+        [[4.]
+         [6.]]
+
+    **Methods beyond** :class:`.PstReader`
+
+    """
+
+    def __init__(self, filename):
+        super(PstChunked, self).__init__()
+        self._ran_once = False
+        self._filename = filename
+
+    def __repr__(self):
+        return "{0}('{1}')".format(self.__class__.__name__, self._filename)
+
+    @property
+    def row(self):
+        self._run_once()
+        return self._row
+
+    @property
+    def col(self):
+        self._run_once()
+        return self._col
+
+    @property
+    def row_property(self):
+        self._run_once()
+        return self._row_property
+
+    @property
+    def col_property(self):
+        self._run_once()
+        return self._col_property
+
+    @property
+    def chunk_shape(self):
+        """The number of rows and the number of columns in each chunk (except, perhaps, the last ones).
+
+        :rtype: tuple of two ints
+        """
+        self._run_once()
+        return self._chunk_shape
+
+    def _run_once(self):
+        if self._ran_once:
+            return
+        self._ran_once = True
+
+        with open(self._filename, "rb") as fp:
+            magic_number = np.load(fp)[0]
+            assert magic_number == _magic_number, "Expect file '{0}' to start with a PstChunked header".format(self._filename)
+            format = np.load(fp)[0]
+            version = np.load(fp)[0]
+            assert format == "pstchunked", "Expect format of 'pstchunked'"
+            assert version == 1, "Expect version of 1"
+            self._row = np.load(fp, allow_pickle=True)
+            self._col = np.load(fp, allow_pickle=True)
+            self._row_property = np.load(fp, allow_pickle=True)
+            self._col_property = np.load(fp, allow_pickle=True)
+            self._dtype = np.dtype(np.load(fp)[0])
+            val_shape = np.load(fp)[0]
+            self._val_shape = None if val_shape == 0 else int(val_shape)
+            self._chunk_shape = tuple(int(x) for x in np.load(fp))
+
+            # The index of chunk starts (plus the end of the last chunk) is at the end of the file, followed by its own start.
+            fp.seek(-8, os.SEEK_END)
+            index_start = int(np.frombuffer(fp.read(8), dtype="<i8")[0])
+            fp.seek(index_start)
+            self._chunk_start = np.load(fp)
+
+        if self._row.dtype == self._col.dtype and np.array_equal(self._row, self._col):
+            self._col = self._row  # If it's square, mark it so by making the col and row the same object
+
+    def copyinputs(self, copier):
+        # doesn't need to self._run_once()
+        copier.input(self._filename)
+
+    def _read(
+        self,
+        row_index_or_none,
+        col_index_or_none,
+        order,
+        dtype,
+        force_python_only,
+        view_ok,
+        num_threads,
+    ):
+        self._run_once()
+        dtype = np.dtype(dtype)
+        if order == "A":
+            order = "F"
+        row_index = (
+            np.arange(self.row_count)
+            if row_index_or_none is None
+            else np.asarray(row_index_or_none, dtype=np.intp)
+        )
+        col_index = (
+            np.arange(self.col_count)
+            if col_index_or_none is None
+            else np.asarray(col_index_or_none, dtype=np.intp)
+        )
+        extra_shape = () if self._val_shape is None else (self._val_shape,)
+        val = np.empty(
+            (len(row_index), len(col_index)) + extra_shape, dtype=dtype, order=order
+        )
+        if val.size == 0:
+            return val
+
+        row_chunk_size, col_chunk_size = self._chunk_shape
+        row_group_list = PstChunked._group_by_chunk(row_index, row_chunk_size)
+        col_group_list = PstChunked._group_by_chunk(col_index, col_chunk_size)
+        buffer = np.memmap(self._filename, dtype=np.uint8, mode="r")
+
+        def read_chunk(row_group, col_group):
+            row_chunk, row_position = row_group
+            col_chunk, col_position = col_group
+            chunk = self._decompress_chunk(buffer, row_chunk, col_chunk)
+            val[np.ix_(row_position, col_position)] = chunk[
+                np.ix_(
+                    row_index[row_position] - row_chunk * row_chunk_size,
+                    col_index[col_position] - col_chunk * col_chunk_size,
+                )
+            ]
+
+        # Each task fills a different part of val
+        with ThreadPoolExecutor(max_workers=pstutil.get_num_threads(num_threads)) as executor:
+            futures = [
+                executor.submit(read_chunk, row_group, col_group)
+                for col_group in col_group_list
+                for row_group in row_group_list
+            ]
+            for future in futures:
+                future.result()  # raise any exception
+        return val
+
+    @staticmethod
+    def _group_by_chunk(index, chunk_size):
+        """
+        Returns a list of (chunk, positions) pairs, one per chunk that the indexes touch, where 'positions' are the positions in 'index' of that chunk's indexes.
+        """
+        chunk_of = index // chunk_size
+        position = np.argsort(chunk_of, kind="stable")
+        chunk_list, start_list = np.unique(chunk_of[position], return_index=True)
+        return list(zip(chunk_list, np.split(position, start_list[1:])))
+
+    def _decompress_chunk(self, buffer, row_chunk, col_chunk):
+        row_chunk_size, col_chunk_size = self._chunk_shape
+        chunk_number = col_chunk * -(self.row_count // -row_chunk_size) + row_chunk
+        start, stop = self._chunk_start[chunk_number], self._chunk_start[chunk_number + 1]
+        shape = (
+            min(row_chunk_size, self.row_count - row_chunk * row_chunk_size),
+            min(col_chunk_size, self.col_count - col_chunk * col_chunk_size),
+        ) + (() if self._val_shape is None else (self._val_shape,))
+        shuffled = np.frombuffer(zlib.decompress(buffer[start:stop]), dtype=np.uint8)
+        # Un-shuffle the bytes, so that each value's bytes are together again
+        return (
+            shuffled.reshape(self._dtype.itemsize, -1)
+            .T.copy()
+            .view(self._dtype)
+            .reshape(shape)
+        )
+
+    @staticmethod
+    def _compress_chunk(chunk, compression_level):
+        chunk = np.ascontiguousarray(chunk)
+        shuffled = chunk.view(np.uint8).reshape(-1, chunk.dtype.itemsize).T.copy()
+        return zlib.compress(shuffled, compression_level)
+
+    @staticmethod
+    def write(
+        filename,
+        pstreader,
+        chunk_shape=(1024, 256),
+        dtype=None,
+        compression_level=1,
+        num_threads=None,
+    ):
+        """Writes a :class:`PstReader` to :class:`PstChunked` format and returns the :class:`.PstChunked`.
+
+        :param filename: the name of the file to create
+        :type filename: string
+        :param pstreader: The data that should be written to disk. It can be any :class:`PstReader`. It is read one column of chunks at a time.
+        :type pstreader: :class:`PstReader`
+        :param chunk_shape: optional -- The number of rows and the number of columns in each chunk. Default: (1024, 256)
+        :type chunk_shape: tuple of two ints
+        :param dtype: {None (default), numpy.float64, numpy.float32}, optional -- The data-type of the values on disk.
+            By default, that of the input if it is in memory, otherwise numpy.float64.
+        :type dtype: data-type
+        :param compression_level: optional -- The zlib compression level, from 0 (none) to 9 (most). Default: 1 (fastest)
+        :type compression_level: int
+        :param num_threads: optional -- The number of threads with which to read and compress data. Defaults to all available
+            processors. Can also be set with these environment variables (listed in priority order):
+            'PST_NUM_THREADS', 'NUM_THREADS', 'MKL_NUM_THREADS'.
+        :type num_threads: None or int
+        :rtype: :class:`.PstChunked`
+
+        >>> import pysnptools.util as pstutil
+        >>> from pysnptools.pstreader import PstChunked, PstData
+        >>> data1 = PstData(row=['a','b','c'],col=['y','z'],val=[[1,2],[3,4],[np.nan,6]],row_property=['A','B','C'])
+        >>> pstutil.create_directory_if_necessary("tempdir/tiny.pst.chunked")
+        >>> PstChunked.write("tempdir/tiny.pst.chunked",data1)      # Write data1 in PstChunked format
+        PstChunked('tempdir/tiny.pst.chunked')
+        """
+        PstChunked._write(
+            filename,
+            pstreader,
+            pstreader.row,
+            pstreader.col,
+            chunk_shape,
+            dtype,
+            compression_level,
+            num_threads,
+        )
+        return PstChunked(filename)
+
+    @staticmethod
+    def _write(
+        filename, pstreader, row, col, chunk_shape, dtype, compression_level, num_threads
+    ):
+        if hasattr(pstreader, "val"):
+            dtype = dtype or pstreader.val.dtype
+        else:
+            dtype = dtype or np.float64
+        dtype = np.dtype(dtype)
+        row_chunk_size, col_chunk_size = (int(x) for x in chunk_shape)
+        assert row_chunk_size > 0 and col_chunk_size > 0, "Expect chunk_shape to be positive"
+        row_count, col_count = pstreader.row_count, pstreader.col_count
+
+        temp_filename = filename + ".temp"
+        try:
+            with open(temp_filename, "wb") as fp, ThreadPoolExecutor(
+                max_workers=pstutil.get_num_threads(num_threads)
+            ) as executor:
+                np.save(fp, np.array([_magic_number]))
+                np.save(fp, np.array(["pstchunked"]))  # name of file format
+                np.save(fp, np.array([1]))  # file format version
+                np.save(fp, PstData._fixup_input(row))
+                np.save(fp, PstData._fixup_input(col))
+                np.save(fp, PstData._fixup_input(pstreader.row_property, count=row_count))
+                np.save(fp, PstData._fixup_input(pstreader.col_property, count=col_count))
+                np.save(fp, np.array([dtype.str]))
+                np.save(fp, np.array([getattr(pstreader, "val_shape", None) or 0]))
+                np.save(fp, np.array([row_chunk_size, col_chunk_size]))
+
+                chunk_start_list = []
+                for col_start in range(0, col_count, col_chunk_size):
+                    if hasattr(pstreader, "val"):  # Already in memory, so use views
+                        val = pstreader.val[:, col_start : col_start + col_chunk_size]
+                    else:
+                        val = (
+                            pstreader[:, col_start : col_start + col_chunk_size]
+                            .read(order="C", dtype=dtype, num_threads=num_threads)
+                            .val
+                        )
+                    val = val.astype(dtype, copy=False)
+                    for compressed in executor.map(
+                        lambda row_start: PstChunked._compress_chunk(
+                            val[row_start : row_start + row_chunk_size], compression_level
+                        ),
+                        range(0, row_count, row_chunk_size),
+                    ):
+                        chunk_start_list.append(fp.tell())
+                        fp.write(compressed)
+                chunk_start_list.append(fp.tell())
+
+                index_start = fp.tell()
+                np.save(fp, np.array(chunk_start_list, dtype=np.int64))
+                fp.write(np.array([index_start], dtype="<i8").tobytes())
+            if os.path.exists(filename):
+                os.remove(filename)
+            shutil.move(temp_filename, filename)
+        except BaseException:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            raise
+        logging.debug("Done writing " + filename)
+
+
+class TestPstChunked(unittest.TestCase):
+    def test_read_and_write(self):
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+        np.random.seed(0)
+        val = np.random.randint(0, 3, size=(23, 17)).astype(np.float64)
+        val[val == 2] = np.nan
+        pstdata = PstData(
+            row=["r{0}".format(i) for i in range(23)],
+            col=["c{0}".format(i) for i in range(17)],
+            val=val,
+            row_property=np.arange(23),
+        )
+        filename = "tempdir/pstchunked/test.pst.chunked"
+        pstutil.create_directory_if_necessary(filename)
+        for chunk_shape in [(1, 1), (5, 4), (100, 100)]:
+            for source in [pstdata, PstData(row=pstdata.row, col=pstdata.col, val=pstdata.val)[:, :]]:
+                on_disk = PstChunked.write(filename, source, chunk_shape=chunk_shape, num_threads=2)
+                assert on_disk.chunk_shape == chunk_shape
+                assert np.array_equal(on_disk.row, pstdata.row)
+                assert np.array_equal(on_disk.col, pstdata.col)
+                assert PstData.allclose(on_disk.read(), PstData(row=pstdata.row, col=pstdata.col, val=val, row_property=on_disk.row_property))
+                for row_index, col_index in [
+                    (None, [3]),
+                    ([22, 0, 5, 5], None),
+                    ([7, 1], [16, 2, 2, 9]),
+                    (np.s_[::3], np.s_[::-2]),
+                ]:
+                    for order, dtype in [("F", np.float64), ("C", np.float32), ("A", np.float64)]:
+                        row_index = np.s_[:] if row_index is None else row_index
+                        col_index = np.s_[:] if col_index is None else col_index
+                        result = on_disk[row_index, col_index].read(order=order, dtype=dtype)
+                        expected = val[row_index][:, col_index]
+                        assert result.val.dtype == dtype
+                        assert result.val.flags["C_CONTIGUOUS" if order == "C" else "F_CONTIGUOUS"]
+                        np.testing.assert_array_equal(result.val, expected.astype(dtype))
+
+        empty = PstChunked.write(filename, pstdata[:0, :])
+        assert empty.read().val.shape == (0, 17)
+        os.chdir(old_dir)
+
+    def test_only_needed_chunks(self):
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+        pstdata = PstData(row=np.arange(100), col=np.arange(60), val=np.arange(6000.0).reshape(100, 60))
+        filename = "tempdir/pstchunked/needed.pst.chunked"
+        pstutil.create_directory_if_necessary(filename)
+        on_disk = PstChunked.write(filename, pstdata, chunk_shape=(10, 20))
+
+        decompressed = []
+        original = on_disk._decompress_chunk
+
+        def counting_decompress_chunk(buffer, row_chunk, col_chunk):
+            decompressed.append((row_chunk, col_chunk))
+            return original(buffer, row_chunk, col_chunk)
+
+        on_disk._decompress_chunk = counting_decompress_chunk
+        assert np.array_equal(on_disk[[5, 95], 25:45].read().val, pstdata.val[[5, 95], 25:45])
+        assert sorted(decompressed) == [(0, 1), (0, 2), (9, 1), (9, 2)]
+        os.chdir(old_dir)
+
+    def test_doctest(self):
+        import pysnptools.pstreader.pstchunked as mod
+
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+        result = doctest.testmod(mod, optionflags=doctest.ELLIPSIS)
+        os.chdir(old_dir)
+        assert result.failed == 0, "failed doc test: " + __file__
+
+
+def getTestSuite():
+    """
+    set up composite test suite
+    """
+
+    test_suite = unittest.TestSuite([])
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestPstChunked))
+    return test_suite
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    suites = getTestSuite()
+    r = unittest.TextTestRunner(failfast=True)
+    ret = r.run(suites)
+    assert ret.wasSuccessful()
+
+    result = doctest.testmod(optionflags=doctest.ELLIPSIS)
+    assert result.failed == 0, "failed doc test: " + __file__
@@ -131,6 +131,7 @@ class PstData(PstReader):
 
         """
         try:
+            self, value = PstData._in_memory(self), PstData._in_memory(value)
             return (
                 PstData._allclose(self.row, value.row, equal_nan=True)
                 and PstData._allclose(self.col, value.col, equal_nan=True)
@@ -145,6 +146,13 @@ class PstData(PstReader):
         except Exception:
             return False
 
+    @staticmethod
+    def _in_memory(pstdata):
+        # A PstData whose values aren't in memory (for example, a DistMemMap of quantized values) has no 'val', so read them
+        if hasattr(pstdata, "val"):
+            return pstdata
+        return pstdata.read(order="A", view_ok=True)
+
     @staticmethod
     def _allclose(a, b, equal_nan=True):
         if not equal_nan:
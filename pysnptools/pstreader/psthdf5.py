@@ -3,10 +3,16 @@ try:
 except Exception:
     pass
 
+import itertools
 import logging
+import zlib
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import pysnptools.util as pstutil
 from pysnptools.pstreader import PstReader
 from pysnptools.pstreader.pstdata import PstData
+from pysnptools.pstreader.pstchunked import PstChunked
 
 
 class PstHdf5(PstReader):
@@ -246,6 +252,123 @@ class PstHdf5(PstReader):
                     opposite_order,
                 )
 
+    def _raw_chunks_ok(self):
+        # If the only filters are HDF5's byte shuffle and gzip (zlib), we can read the raw chunks and
+        # un-shuffle and decompress them ourselves, in parallel.
+        val_in_file = self.val_in_file
+        return (
+            val_in_file.compression in {None, "gzip"}
+            and not val_in_file.fletcher32
+            and val_in_file.scaleoffset is None
+            and val_in_file.dtype.kind == "f"
+        )
+
+    def _decode_values(self, filter_mask, raw, flat_index):
+        """
+        Returns the values at flat_index (into the C-order chunk) of a raw chunk.
+        """
+        val_in_file = self.val_in_file
+        # A chunk may skip a filter (e.g. when compression didn't help). The bits of filter_mask follow the pipeline order: shuffle, then gzip.
+        if val_in_file.compression == "gzip":
+            gzip_bit = 1 if val_in_file.shuffle else 0
+            if not filter_mask & (1 << gzip_bit):
+                raw = zlib.decompress(raw)
+        if not val_in_file.shuffle or filter_mask & 1:
+            return np.frombuffer(raw, dtype=val_in_file.dtype)[flat_index]
+        # The shuffle filter stores byte 0 of every value, then byte 1 of every value, etc., so
+        # gather just the bytes of the values needed.
+        itemsize = val_in_file.dtype.itemsize
+        shuffled = np.frombuffer(raw, dtype=np.uint8).reshape(itemsize, -1)
+        unshuffled = np.empty(flat_index.shape + (itemsize,), dtype=np.uint8)
+        for i in range(itemsize):
+            unshuffled[..., i] = shuffled[i][flat_index]
+        return unshuffled.view(val_in_file.dtype)[..., 0]
+
+    def _read_chunks(self, val, row_index, col_index, num_threads):
+        """
+        Fills val by reading only the HDF5 chunks that the requested rows and cols intersect.
+        The raw chunks are read on this thread and then decoded and copied to val on a pool of threads.
+        Only the needed values of a chunk are un-shuffled.
+        """
+        val_in_file = self.val_in_file
+        chunk_shape = val_in_file.chunks
+        index_list = [row_index, col_index]
+        if self._val_shape is not None:
+            index_list.append(np.arange(self._val_shape))
+        # For each of val's axes (row, col, and maybe the 3 values), the corresponding axis in the file
+        if not self.is_col_major:
+            file_axis_list = list(range(len(index_list)))
+        else:
+            file_axis_list = list(reversed(range(len(index_list))))
+
+        # For each axis, a list of (chunk start in file, positions in val, indexes in the chunk).
+        # The positions and indexes are shaped to broadcast like numpy.ix_.
+        group_list_list = []
+        for axis, (index, file_axis) in enumerate(zip(index_list, file_axis_list)):
+            chunk_size = chunk_shape[file_axis]
+            broadcast_shape = [1] * len(index_list)
+            broadcast_shape[axis] = -1
+            group_list_list.append(
+                [
+                    (
+                        chunk * chunk_size,
+                        position.reshape(broadcast_shape),
+                        (index[position] - chunk * chunk_size).reshape(broadcast_shape),
+                    )
+                    for chunk, position in PstChunked._group_by_chunk(index, chunk_size)
+                ]
+            )
+
+        # The number of values between neighbors along each file axis of a (C-order) chunk
+        file_stride = np.cumprod((chunk_shape[1:] + (1,))[::-1])[::-1]
+
+        def copy_chunk(group_list, filter_mask, raw, chunk_in_file):
+            position = tuple(group[1] for group in group_list)
+            if chunk_in_file is None:
+                flat_index = sum(
+                    group[2] * file_stride[file_axis]
+                    for group, file_axis in zip(group_list, file_axis_list)
+                )
+                val[position] = self._decode_values(filter_mask, raw, flat_index)
+            else:
+                chunk = np.transpose(chunk_in_file, file_axis_list)
+                val[position] = chunk[tuple(group[2] for group in group_list)]
+
+        raw_chunks_ok = self._raw_chunks_ok()
+        max_workers = pstutil.get_num_threads(num_threads)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            for group_list in itertools.product(*group_list_list):
+                start_in_file = [0] * len(file_axis_list)
+                for group, file_axis in zip(group_list, file_axis_list):
+                    start_in_file[file_axis] = group[0]
+                filter_mask, raw, chunk_in_file = 0, None, None
+                if raw_chunks_ok:
+                    try:
+                        filter_mask, raw = val_in_file.id.read_direct_chunk(
+                            tuple(start_in_file)
+                        )
+                    except Exception:  # e.g. a chunk that was never written, so holds only fill values
+                        pass
+                if raw is None:  # Let HDF5 read and decode the chunk
+                    chunk_in_file = val_in_file[
+                        tuple(
+                            slice(start, start + chunk_size)
+                            for start, chunk_size in zip(start_in_file, chunk_shape)
+                        )
+                    ]
+                if max_workers == 1:
+                    copy_chunk(group_list, filter_mask, raw, chunk_in_file)
+                    continue
+                # Each task fills a different part of val
+                pending.append(
+                    executor.submit(copy_chunk, group_list, filter_mask, raw, chunk_in_file)
+                )
+                if len(pending) > 4 * max_workers:  # Limit the number of chunks in memory
+                    pending.popleft().result()
+            while pending:
+                pending.popleft().result()
+
     def _read(
         self,
         row_index_or_none,
@@ -295,7 +418,6 @@ class PstHdf5(PstReader):
                 dtype=dtype,
                 order=order,
             )
-        val.fill(np.nan)  # LATER Keep this?
 
         matches_order = self.is_col_major == (order == "F")
         is_simple = (
@@ -332,7 +454,16 @@ class PstHdf5(PstReader):
             )
             self._read_direct(val, order, selection)
 
-        # case 4 some cols and some rows -- use blocks
+        # case 4 some cols and some rows -- if the file is chunked, read just the chunks needed
+        elif self.val_in_file.chunks is not None:
+            self._read_chunks(
+                val,
+                np.asarray(row_index_list, dtype=np.intp),
+                np.asarray(col_index_list, dtype=np.intp),
+                num_threads,
+            )
+
+        # case 5 some cols and some rows in an unchunked file -- use blocks
         else:
             block_size = min(self._block_size, col_index_count)
             block, block_order = self._create_block(block_size, order, dtype)
@@ -404,7 +535,13 @@ class PstHdf5(PstReader):
             and hdf5_dtype[0] == "f"
         ), "Expect hdf5_dtype to be None or to start with 'f', e.g. 'f4' for single, 'f8' for double"
 
-        val = (pstdata.val.T) if col_major else pstdata.val
+        pstdata = PstData._in_memory(pstdata)
+        return PstHdf5._write(filename, pstdata, pstdata.val, hdf5_dtype, col_major)
+
+    @staticmethod
+    def _write(filename, pstdata, val, hdf5_dtype, col_major):
+        # Like 'write', but the values come from 'val' (which may be, for example, quantized) rather than pstdata.val
+        val = (val.T) if col_major else val
 
         def any_u_to_a(possible_unicode):
             # If it's any kind of string, encode it as ascii
@@ -1,3 +1,4 @@
+import io
 import logging
 import numpy as np
 import unittest
@@ -8,6 +9,7 @@ import pysnptools.util as pstutil
 from pysnptools.pstreader import PstReader, PstData
 
 _magic_number = 22891
+_alignment = 64  # Values start at a multiple of this many bytes into the file, so views of them are aligned for BLAS
 
 
 class PstMemMap(PstData):
@@ -171,18 +173,16 @@ class PstMemMap(PstData):
         row_property = PstData._fixup_input(row_property, count=len(row))
         col_property = PstData._fixup_input(col_property, count=len(col))
 
-        with open(filename, "wb") as fp:
-            np.save(fp, np.array([_magic_number]))
-            np.save(fp, np.array(["pstmemmap"]))  # name of file format
-            np.save(fp, np.array([2]))  # file format version
-            np.save(fp, row)
-            np.save(fp, col)
-            np.save(fp, row_property)
-            np.save(fp, col_property)
-            np.save(fp, np.array([self._dtype]))
-            np.save(fp, np.array([self._order]))
-            np.save(fp, np.array([val_shape]))
-            self._offset = fp.tell()
+        self._offset = PstMemMap._write_header(
+            filename,
+            row,
+            col,
+            row_property,
+            col_property,
+            order,
+            self._dtype,
+            val_shape,
+        )
 
         logging.info("About to start allocating memmap '{0}'".format(filename))
         shape = (
@@ -213,6 +213,37 @@ class PstMemMap(PstData):
             name="np.memmap('{0}')".format(filename),
         )
 
+    @staticmethod
+    def _write_header(
+        filename, row, col, row_property, col_property, order, dtype, val_shape
+    ):
+        """
+        Creates the file with just its header and returns the offset at which the values start.
+        """
+        with open(filename, "wb") as fp:
+            np.save(fp, np.array([_magic_number]))
+            np.save(fp, np.array(["pstmemmap"]))  # name of file format
+            np.save(fp, np.array([2]))  # file format version
+            np.save(fp, row)
+            np.save(fp, col)
+            np.save(fp, row_property)
+            np.save(fp, col_property)
+            # Pad the end of the header so that the values are aligned. The dtype is saved as a (pickle-free) bytes string,
+            # widened one byte at a time. NumPy drops the trailing NULs, so readers see just the dtype.
+            dtype_str = np.dtype(dtype).str
+            for pad_count in range(256):
+                end = io.BytesIO()
+                np.save(
+                    end,
+                    np.array([dtype_str], dtype="S{0}".format(len(dtype_str) + pad_count)),
+                )
+                np.save(end, np.array([order]))
+                np.save(end, np.array([val_shape]))
+                if (fp.tell() + end.tell()) % _alignment == 0:
+                    break
+            fp.write(end.getvalue())
+            return fp.tell()
+
     def _run_once(self):
         if self._ran_once:
             return
@@ -242,7 +273,7 @@ class PstMemMap(PstData):
                 col = np.load(fp, allow_pickle=True)
                 row_property = np.load(fp, allow_pickle=True)
                 col_property = np.load(fp, allow_pickle=True)
-                self._dtype = np.load(fp, allow_pickle=True)[0]
+                self._dtype = np.dtype(np.load(fp, allow_pickle=True)[0])
                 self._order = np.load(fp, allow_pickle=True)[0]
                 val_shape = np.load(fp, allow_pickle=True)[0]
                 self._offset = fp.tell()
@@ -289,6 +320,17 @@ class PstMemMap(PstData):
         num_threads,
     ):
         dtype = np.dtype(dtype)
+        row_slice = PstMemMap._as_slice(row_index_or_none)
+        col_slice = PstMemMap._as_slice(col_index_or_none)
+        if row_slice is not None and col_slice is not None:
+            # Ranges (with any step) of rows and cols are a view of the memmap, so no values are copied unless needed.
+            val = self.val[row_slice, col_slice]
+            if not PstReader._array_properties_are_ok(val, order, dtype):
+                return val.astype(dtype, order="K" if order == "A" else order)
+            if not view_ok:
+                val = val.copy(order="K")
+            return val
+
         force_python_only = True  # Memmap arrays may not be aligned to Rust's standards, so process via Python
         val, shares_memory = self._apply_sparray_or_slice_to_val(
             self.val,
@@ -303,6 +345,31 @@ class PstMemMap(PstData):
             val = val.copy(order="K")
         return val
 
+    # _read can return views of the memmap (when view_ok=True), so blocks of values can be used without copying
+    _reads_views = True
+
+    @staticmethod
+    def _as_slice(index_or_none):
+        """
+        Returns a slice equivalent to the index (None, a slice, or a list or ndarray of indexes), or None if there isn't one.
+        (Lists with negative indexes, which count from the end, return None.)
+        """
+        if index_or_none is None:
+            return slice(None)
+        if isinstance(index_or_none, slice):
+            return index_or_none
+        index = np.asarray(index_or_none)
+        if len(index) == 0:
+            return slice(0, 0)
+        if index.min() < 0:
+            return None
+        start = int(index[0])
+        step = int(index[1]) - start if len(index) > 1 else 1
+        if step == 0 or (len(index) > 2 and not np.all(np.diff(index) == step)):
+            return None
+        stop = int(index[-1]) + step
+        return slice(start, stop if stop >= 0 else None, step)
+
     @staticmethod
     def _order(pstdata):
         if pstdata.val.flags["F_CONTIGUOUS"]:
@@ -458,6 +525,63 @@ class TestPstMemMap(unittest.TestCase):
         a.read(order="C", view_ok=True)
         os.chdir(old_dir)
 
+    def test_views(self):
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+        filename = "tempdir/views.pst.memmap"
+        pstutil.create_directory_if_necessary(filename)
+
+        val = np.arange(60.0).reshape(6, 10)
+        pstreader = PstMemMap.write(
+            filename, PstData(row=range(6), col=range(10), val=val)
+        )
+        assert pstreader.offset % 64 == 0 and pstreader.val.flags["ALIGNED"]
+
+        # The header is aligned for any sizes of row, col, and dtype, and can be read without pickle.
+        # (Except for a val_shape of None, as for 2-D values, which has always been saved as an object array.)
+        for row_count, col_count, dtype, order, val_shape in [
+            (1, 1, np.float32, "F", None),
+            (7, 3, np.float64, "C", 3),
+            (6, 11, np.float32, "F", 2),
+            (65, 2, np.float64, "C", None),
+        ]:
+            pstreader2 = PstMemMap.empty(
+                ["r" * i for i in range(1, row_count + 1)],
+                range(col_count),
+                filename + "2",
+                order=order,
+                dtype=dtype,
+                val_shape=val_shape,
+            )
+            assert pstreader2.offset % 64 == 0 and pstreader2.val.dtype == dtype
+            with open(filename + "2", "rb") as fp:
+                header = [np.load(fp, allow_pickle=False) for _ in range(9)]
+                assert np.load(fp, allow_pickle=val_shape is None)[0] == val_shape
+                assert fp.tell() == pstreader2.offset
+            assert np.dtype(header[7][0]) == dtype and header[8][0] == order
+            pstreader2.flush()
+
+        for row_index, col_index, is_view in [
+            (np.s_[:], np.s_[2:7], True),
+            (np.s_[1:5], [3, 4, 5], True),
+            ([5, 3, 1], np.s_[::-2], True),
+            ([0, 2, 1], np.s_[:], False),
+            ([-1], [-1], False),
+            ([-1, -2], np.s_[:], False),
+            ([5, -1], [2, -3], False),
+            ([2, 1, 0], [-10, -9], False),
+        ]:
+            subreader = pstreader[row_index, col_index]
+            expected = val[row_index][:, col_index]
+            view = subreader.read(order="A", view_ok=True).val
+            assert np.array_equal(view, expected)
+            assert np.shares_memory(view, pstreader.val) == is_view
+            copy = subreader.read(order="A").val
+            assert np.array_equal(copy, expected)
+            assert not np.shares_memory(copy, pstreader.val)
+            assert subreader.read(order="C", view_ok=True).val.flags["C_CONTIGUOUS"]
+        os.chdir(old_dir)
+
 
 def getTestSuite():
     """
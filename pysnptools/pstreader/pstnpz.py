@@ -1,6 +1,7 @@
 import numpy as np
 import logging
 from pysnptools.pstreader import PstReader
+from pysnptools.pstreader.pstdata import PstData
 
 
 class PstNpz(PstReader):
@@ -151,6 +152,7 @@ class PstNpz(PstReader):
         >>> PstNpz.write("tempdir/tiny.pst.npz",data1)          # Write data in PstNz format
         PstNpz('tempdir/tiny.pst.npz')
         """
+        pstdata = PstData._in_memory(pstdata)
         np.savez(
             filename,
             row=pstdata.row,
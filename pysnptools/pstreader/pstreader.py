@@ -3,6 +3,7 @@ from itertools import *  # noqa: F403
 import logging
 import pysnptools.util as pstutil
 import numbers
+from pysnptools.pstreader._keyindex import _KeyIndex
 
 try:
     pass
@@ -63,6 +64,8 @@ class PstReader(object):
         :class:`.PstHdf5`                  binary, floats                     Yes                    .pst.hdf5,.snp.hdf5,
                                                                                                      .kernel.hdf5
         :class:`.PstMemMap`                mem-mapped floats                  Yes                    .pst.memmap,.snp.memmap
+        :class:`.PstChunked`               compressed floats                  Yes (by chunk)         .pst.chunked,.snp.chunked,
+                                                                                                     .dist.chunked
         various :class:`.SnpReader`        varies                             varies                 varies
         various :class:`.KernelReader`     varies                             varies                 varies
         ================================== ================================== ====================== =====================
@@ -508,6 +511,7 @@ class PstReader(object):
         :rtype: ndarray of int
 
         This method (to the degree practical) reads only row and col data from the disk, not matrix value data. Moreover, the row and col data is read from file only once.
+        When the rows are strings, the first call builds a hash index with NumPy, and each call then looks up all its rows with one vectorized search.
 
         :Example:
 
@@ -518,6 +522,10 @@ class PstReader(object):
         >>> print(on_disk.row_to_index([[b'POP1',b'44'],[b'POP1',b'12']])) #Find the indexes for two rows.
         [2 1]
         """
+        index = self._vectorized_to_index(True, list)
+        if index is not None:
+            return index
+
         if not hasattr(self, "_row_to_index"):
             self._row_to_index = {}
             for index, item in enumerate(self.row):
@@ -541,6 +549,7 @@ class PstReader(object):
         :rtype: ndarray of int
 
         This method (to the degree practical) reads only row and col data from the disk, not matrix value data. Moreover, the row and col data is read from file only once.
+        When the cols are strings, the first call builds a hash index with NumPy, and each call then looks up all its cols with one vectorized search.
 
         :Example:
 
@@ -551,6 +560,10 @@ class PstReader(object):
         >>> print(on_disk.col_to_index([b'1_10',b'1_13'])) #Find the indexes for two cols.
         [2 9]
         """
+        index = self._vectorized_to_index(False, list)
+        if index is not None:
+            return index
+
         if not hasattr(self, "_col_to_index"):
             logging.debug("Creating _col_to_index")
             col_set = None
@@ -580,6 +593,44 @@ class PstReader(object):
         )
         return index
 
+    # When the rows (or cols) are strings, lookups go through a vectorized _KeyIndex
+    # instead of a Python dictionary. Returns None when that can't be used.
+    def _vectorized_to_index(self, is_row, key_list):
+        if not isinstance(key_list, (np.ndarray, list, tuple)):
+            return None
+        key_index = self._key_index(is_row)
+        if key_index is None:
+            return None
+        query = np.asarray(key_list)
+        if len(query) == 0:
+            return np.zeros(0, dtype=np.int_)
+        if query.dtype.kind not in "US" or query.dtype.kind != key_index._keys.dtype.kind or query.ndim != key_index._keys.ndim:
+            return None
+        return key_index.index(query)
+
+    def _key_index(self, is_row):
+        attribute = "_row_key_index" if is_row else "_col_key_index"
+        if not hasattr(self, attribute):
+            keys = self.row if is_row else self.col
+            key_index = None
+            if _KeyIndex.is_supported(keys):
+                logging.debug("Creating {0}".format(attribute))
+                key_index = self._make_key_index(is_row, keys)
+                duplicate_list = key_index.duplicates()
+                if is_row and len(duplicate_list) > 0:
+                    raise Exception(
+                        "Expect row to appear in data only once. ({0})".format(
+                            _KeyIndex._hashable(duplicate_list[0])
+                        )
+                    )
+                assert len(duplicate_list) == 0, "Expect col to appear in data only once."
+            setattr(self, attribute, key_index)
+        return getattr(self, attribute)
+
+    def _make_key_index(self, is_row, keys):
+        # Readers backed by files (for example, Bed) can override this to persist the index.
+        return _KeyIndex(keys)
+
     @staticmethod
     def _makekey(item):
         if isinstance(item, str):
@@ -611,6 +662,14 @@ class PstReader(object):
             return True
         return isinstance(index_or_none, slice) and index_or_none == slice(None)
 
+    # Subsets get their col information through these two methods, so that a reader
+    # (for example, Bed) can load only the cols wanted.
+    def _col_of(self, col_indexer):
+        return self.col[col_indexer]
+
+    def _col_property_of(self, col_indexer):
+        return self.col_property[col_indexer]
+
     @staticmethod
     def _make_sparray_or_slice(indexer):
         if indexer is None:
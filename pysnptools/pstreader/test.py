@@ -378,6 +378,56 @@ class TestPstReader(unittest.TestCase):
         val2 = reader[0, 0].read()
         assert val1 == val2
 
+    def test_hdf5_chunks(self):
+        import h5py
+
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+        np.random.seed(0)
+        val = np.random.random((50, 40))
+        val[val < 0.1] = np.nan
+        pstdata = PstData(row=range(50), col=range(40), val=val)
+        for filter_kwargs in [
+            {"shuffle": True},
+            {"shuffle": True, "compression": "gzip"},
+            {"compression": "gzip"},
+            {"compression": "lzf"},
+        ]:
+            for col_major in [True, False]:
+                output = "tempdir/pstreader/chunks.{0}.{1}.pst.hdf5".format(
+                    "_".join(filter_kwargs), col_major
+                )
+                create_directory_if_necessary(output)
+                PstHdf5.write(output, pstdata, col_major=col_major)
+                with h5py.File(output, "a") as h5:  # Rewrite 'val' with small chunks and the filters
+                    del h5["val"]
+                    h5.create_dataset(
+                        "val",
+                        data=val.T if col_major else val,
+                        chunks=(7, 6),
+                        **filter_kwargs
+                    )
+                    h5["val"].attrs["col-major"] = col_major
+                reader = PstHdf5(output)
+                reader._run_once()
+                assert reader.val_in_file.chunks == (7, 6)
+                for row_index, col_index in [
+                    ([3, 49, 0, 3], [39, 2]),
+                    (np.s_[::3], np.s_[::-5]),
+                    (np.s_[10:12], np.s_[:]),
+                ]:
+                    for order in ["F", "C", "A"]:
+                        for num_threads in [1, 3]:
+                            result = reader[row_index, col_index].read(
+                                order=order, dtype=np.float32, num_threads=num_threads
+                            )
+                            np.testing.assert_array_equal(
+                                result.val,
+                                val[row_index][:, col_index].astype(np.float32),
+                            )
+                reader.flush()
+        os.chdir(old_dir)
+
     def test_respect_read_inputs(self):
         from pysnptools.pstreader import _MergeRows, _MergeCols
 
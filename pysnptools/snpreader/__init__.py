@@ -36,6 +36,8 @@ from pysnptools.snpreader.snpmemmap import SnpMemMap  # noqa: E402, F401
 from pysnptools.snpreader._mergesids import _MergeSIDs  # noqa: E402, F401
 from pysnptools.snpreader._mergeiids import _MergeIIDs  # noqa: E402, F401
 from pysnptools.snpreader.snpgen import SnpGen  # noqa: E402, F401
+from pysnptools.snpreader.snpsparse import SnpSparse  # noqa: E402, F401
+from pysnptools.snpreader.snpchunked import SnpChunked  # noqa: E402, F401
 from pysnptools.snpreader.distributedbed import DistributedBed, _Distributed1Bed  # noqa: E402, F401
 
 __all__ = [
@@ -55,6 +57,8 @@ __all__ = [
     "_MergeSIDs",
     "_MergeIIDs",
     "SnpGen",
+    "SnpSparse",
+    "SnpChunked",
     "DistributedBed",
     "_Distributed1Bed",
 ]
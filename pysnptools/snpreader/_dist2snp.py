@@ -6,12 +6,21 @@ from pysnptools.snpreader import SnpReader
 
 
 class _Dist2Snp(SnpReader):
-    def __init__(self, snpreader, max_weight=2.0, block_size=None):
+    def __init__(
+        self,
+        snpreader,
+        max_weight=2.0,
+        block_size=None,
+        memory_budget=None,
+        hard_call=False,
+    ):
         super(_Dist2Snp, self).__init__()
 
         self.distreader = snpreader
         self.max_weight = max_weight
         self.block_size = block_size
+        self.memory_budget = memory_budget
+        self.hard_call = hard_call
 
     @property
     def row(self):
@@ -28,6 +37,16 @@ class _Dist2Snp(SnpReader):
         s = "{0}.as_snp(".format(self.distreader)
         if self.block_size is not None:
             s += "block_size={0}".format(self.block_size)
+        if self.memory_budget is not None:
+            s += "{0}memory_budget={1}".format(
+                "," if self.block_size is not None else "", repr(self.memory_budget)
+            )
+        if self.hard_call:
+            s += "{0}hard_call=True".format(
+                ","
+                if self.block_size is not None or self.memory_budget is not None
+                else ""
+            )
         s += ")"
         return s
 
@@ -45,64 +64,59 @@ class _Dist2Snp(SnpReader):
         view_ok,
         num_threads,
     ):
-        from pysnptools.distreader import DistReader
-
         dtype = np.dtype(dtype)
 
         assert (
             row_index_or_none is None and col_index_or_none is None
         )  # real assert because indexing should already be pushed to the inner distreader
 
-        weights = np.array([0, 0.5, 1], dtype=dtype) * self.max_weight
+        block_size = self.block_size
+        if block_size is None and self.memory_budget is not None:
+            # Room for the expected values and a block of distributions (three values per individual and SNP)
+            block_size = SnpReader._budget_block_size(
+                self.memory_budget,
+                self.sid_count,
+                bytes_per_sid=3 * self.iid_count * dtype.itemsize,
+                fixed_bytes=self.iid_count * self.sid_count * dtype.itemsize,
+                description=f"the {self.iid_count:,} x {self.sid_count:,} expected values",
+            )
 
         # Do all-at-once (not in blocks) if 1. No block size is given or 2. The #ofSNPs < Min(block_size,iid_count)
-        if self.block_size is None or (
-            self.sid_count <= self.block_size or self.sid_count <= self.iid_count
+        # (With a memory budget, only if all the SNPs fit in a block.)
+        if order == "A":
+            order = "F"
+        if block_size is None or (
+            self.sid_count <= block_size
+            or (self.memory_budget is None and self.sid_count <= self.iid_count)
         ):
-            distdata = DistReader._as_distdata(
-                self.distreader,
-                dtype=dtype,
-                order=order,
-                force_python_only=force_python_only,
-                num_threads=num_threads,
-            )
-            val = (distdata.val * weights).sum(axis=-1)
-            has_right_order = order = (
-                "A"
-                or (order == "C" and val.flags["C_CONTIGUOUS"])
-                or (order == "F" and val.flags["F_CONTIGUOUS"])
-            )
-            assert has_right_order
+            val = np.empty([self.iid_count, self.sid_count], dtype=dtype, order=order)
+            self._read_into(None, None, val, force_python_only, num_threads)
             return val
         else:  # Do in blocks
             t0 = time.time()
-            if order == "A":
-                order = "F"
             val = np.zeros(
                 [self.iid_count, self.sid_count], dtype=dtype, order=order
             )  # LATER should use empty or fillnan
 
             logging.info(
                 "reading {0} distribution data in blocks of {1} SNPs and finding expected values (for {2} individuals)".format(
-                    self.sid_count, self.block_size, self.iid_count
+                    self.sid_count, block_size, self.iid_count
                 )
             )
             ct = 0
             ts = time.time()
 
-            for start in range(0, self.sid_count, self.block_size):
-                ct += self.block_size
-                distdata = self.distreader[:, start : start + self.block_size].read(
-                    order=order,
-                    dtype=dtype,
-                    force_python_only=force_python_only,
-                    view_ok=True,
-                    num_threads=num_threads,
-                )  # a view is always OK, because we'll allocate memory in the next step
-                val[:, start : start + self.block_size] = (distdata.val * weights).sum(
-                    axis=-1
+            for start in range(0, self.sid_count, block_size):
+                ct += block_size
+                stop = min(start + block_size, self.sid_count)
+                self._read_into(
+                    None,
+                    np.arange(start, stop, dtype=np.intp),
+                    val[:, start:stop],
+                    force_python_only,
+                    num_threads,
                 )
-                if ct % self.block_size == 0:
+                if ct % block_size == 0:
                     diff = time.time() - ts
                     if diff > 5:
                         logging.info("read %s SNPs in %.2f seconds" % (ct, diff))
@@ -112,12 +126,32 @@ class _Dist2Snp(SnpReader):
 
             return val
 
+    def _read_into(
+        self,
+        iid_index_or_none,
+        sid_index_or_none,
+        out,
+        force_python_only,
+        num_threads,
+    ):
+        self.distreader._read_snp_into(
+            iid_index_or_none,
+            sid_index_or_none,
+            self.max_weight,
+            self.hard_call,
+            out,
+            force_python_only,
+            num_threads,
+        )
+
     def __getitem__(self, iid_indexer_and_snp_indexer):
         row_index_or_none, col_index_or_none = iid_indexer_and_snp_indexer
         return _Dist2Snp(
             self.distreader[row_index_or_none, col_index_or_none],
             max_weight=self.max_weight,
             block_size=self.block_size,
+            memory_budget=self.memory_budget,
+            hard_call=self.hard_call,
         )
 
     @property
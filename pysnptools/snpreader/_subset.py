@@ -4,3 +4,16 @@ from pysnptools.pstreader._subset import _PstSubset
 class _SnpSubset(_PstSubset,SnpReader):
     def __init__(self, *args, **kwargs):
         super(_SnpSubset, self).__init__(*args, **kwargs)
+
+    @property
+    def _reads_int8(self):
+        return self._internal._reads_int8
+
+    def _read_into(self, iid_index_or_none, sid_index_or_none, out, force_python_only, num_threads):
+        composed_iid_index_or_none = _PstSubset.compose_indexer_with_index_or_none(
+            self._internal.row_count, self._row_indexer, self.row_count, iid_index_or_none
+        )
+        composed_sid_index_or_none = _PstSubset.compose_indexer_with_index_or_none(
+            self._internal.col_count, self._col_indexer, self.col_count, sid_index_or_none
+        )
+        self._internal._read_into(composed_iid_index_or_none, composed_sid_index_or_none, out, force_python_only, num_threads)
@@ -1,9 +1,13 @@
+import os
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from itertools import *  # noqa: F403
 import logging
-from bed_reader import open_bed, to_bed
+from bed_reader import open_bed, to_bed, read_f64, read_f32, read_i8, get_num_threads
 from pysnptools.snpreader import SnpReader
 from pysnptools.snpreader import SnpData
+from pysnptools.pstreader._keyindex import _KeyIndex
 import warnings
 
 
@@ -38,6 +42,10 @@ class Bed(SnpReader):
                      * **bim_filename** (optional, *string*) -- The `*.bim` file to read. Defaults to the bed filename with the suffix replaced.
                      * **chrom_map** (optional, *dictionary*) -- A dictionary from non-numeric chromosome names to numbers. Defaults to the PLINK
                             mapping, namely, :data:`plink_chrom_map`.
+                     * **metadata_cache** (optional, *bool*) -- If True, the :attr:`SnpReader.sid` and :attr:`SnpReader.pos` information parsed
+                            from the '.bim' file is saved in a binary sidecar (the '.bim' file's name plus '.npz'). Later readers load
+                            it from there instead of re-parsing. The sidecar is keyed to the size and modification time of the '.bim' file.
+                            The hash index used by :meth:`SnpReader.sid_to_index` is saved, too, and memory mapped back. Defaults to False.
 
     **Constants**
 
@@ -55,6 +63,9 @@ class Bed(SnpReader):
 
         When reading, any chromosome and position values of 0 (the PLINK standard for missing) will be represented in :attr:`pos` as NaN.
 
+        The '.fam' and '.bim' files are parsed only when their information is needed. Finding :attr:`SnpReader.iid_count` and :attr:`SnpReader.sid_count`
+        needs only a fast line count, and reading SNP values (including of a subset) needs only the counts.
+
         :Example:
 
         >>> from pysnptools.snpreader import Bed
@@ -82,6 +93,7 @@ class Bed(SnpReader):
         fam_filename=None,
         bim_filename=None,
         chrom_map=plink_chrom_map,
+        metadata_cache=False,
     ):
         super(Bed, self).__init__()
 
@@ -106,6 +118,7 @@ class Bed(SnpReader):
         self._num_threads = num_threads
         self._open_bed = None
         self.chrom_map = chrom_map
+        self._metadata_cache = metadata_cache
 
     def __repr__(self):
         return "{0}('{1}',count_A1={2})".format(
@@ -160,43 +173,191 @@ class Bed(SnpReader):
     def col(self):
         """*same as* :attr:`sid`"""
         if not hasattr(self, "_col"):
-            self._open_bed_if_needed()
-            self._col = self._open_bed.sid
+            if self._metadata_cache and self._original_sid is None:
+                self._col = self._read_bim_cache("sid")
+            else:
+                self._open_bed_if_needed()
+                self._col = self._open_bed.sid
         return self._col
 
     @property
     def col_property(self):
         """*same as* :attr:`pos`"""
         if not hasattr(self, "_col_property"):
-            self._open_bed_if_needed()
-
-            chromosome = self._open_bed.chromosome
-            intersection = self.chrom_map.keys() & chromosome
-            for key in intersection:
-                chromosome[chromosome == key] = self.chrom_map[key]
+            if self._metadata_cache and self._original_pos is None:
+                self._col_property = self._read_bim_cache("pos")
+            else:
+                self._col_property = self._pos_from_open_bed()
+        return self._col_property
 
-            self._col_property = np.array(
-                [
-                    self._open_bed.chromosome.astype("float"),
-                    self._open_bed.cm_position,
-                    self._open_bed.bp_position,
-                ]
-            ).T  # LATER: Could copy in batches to use less memory
-            self._col_property[self._col_property == 0] = np.nan
+    # Counting lines in the *.fam and *.bim files is much faster than parsing them.
+    @property
+    def row_count(self):
+        if hasattr(self, "_row"):
+            return len(self._row)
+        self._open_bed_if_needed()
+        return self._open_bed.iid_count
 
-        return self._col_property
+    @property
+    def col_count(self):
+        if hasattr(self, "_col"):
+            return len(self._col)
+        self._open_bed_if_needed()
+        return self._open_bed.sid_count
+
+    def _col_of(self, col_indexer):
+        index = self._few_bim_lines(col_indexer, hasattr(self, "_col") or self._original_sid is not None)
+        if index is None:
+            return self.col[col_indexer]
+        return self._parse_bim_lines(index)[0]
+
+    def _col_property_of(self, col_indexer):
+        index = self._few_bim_lines(col_indexer, hasattr(self, "_col_property") or self._original_pos is not None)
+        if index is None:
+            return self.col_property[col_indexer]
+        return self._parse_bim_lines(index)[1]
+
+    def _few_bim_lines(self, col_indexer, is_loaded):
+        """
+        If only a few of many lines of the *.bim file are wanted (and nothing is already loaded or cached), returns their indexes. Otherwise, returns None.
+        """
+        if is_loaded or self._metadata_cache:
+            return None
+        col_count = self.col_count
+        if isinstance(col_indexer, slice):
+            index_range = range(col_count)[col_indexer]
+            if len(index_range) * 10 >= col_count:
+                return None
+            return np.arange(index_range.start, index_range.stop, index_range.step, dtype=np.intp)
+        if len(col_indexer) * 10 >= col_count:
+            return None
+        return np.where(col_indexer < 0, col_indexer + col_count, col_indexer)
+
+    # The byte offset of every _bim_lines_per_offset'th line of the *.bim file is kept, so finding a line reads at most this many others.
+    _bim_lines_per_offset = 1024
+    _bim_scan_chunk_size = 2**22
+
+    def _bim_offsets_through(self, bim_filename, block_index):
+        """
+        Returns the byte offsets of lines 0, K, 2K, ... of the *.bim file (K is _bim_lines_per_offset), through the offset of
+        the block of lines after block_index (if any). The file is scanned only as far as needed, and each part only once.
+        """
+        if not hasattr(self, "_bim_offsets"):
+            self._bim_offsets = [0]
+            self._bim_scanned = (0, 0)  # The number of bytes scanned and of the lines that end in them
+        position, line_count = self._bim_scanned
+        file_size = os.path.getsize(bim_filename)
+        if len(self._bim_offsets) < block_index + 2 and position < file_size:
+            bim_bytes = np.memmap(bim_filename, dtype=np.uint8, mode="r")
+            while len(self._bim_offsets) < block_index + 2 and position < file_size:
+                chunk = bim_bytes[position : position + self._bim_scan_chunk_size]
+                line_end = np.flatnonzero(chunk == ord("\n")) + position
+                # Line number line_count+1+j starts just after the j'th line end
+                first = -(line_count + 1) % self._bim_lines_per_offset
+                self._bim_offsets.extend((line_end[first :: self._bim_lines_per_offset] + 1).tolist())
+                line_count += len(line_end)
+                position += len(chunk)
+            del bim_bytes
+            self._bim_scanned = (position, line_count)
+        return self._bim_offsets
+
+    def _parse_bim_lines(self, index):
+        bim_filename = self.bim_filename or SnpReader._name_of_other_file(
+            self.filename, remove_suffix="bed", add_suffix="bim"
+        )
+        lines_per_offset = self._bim_lines_per_offset
+        offsets = self._bim_offsets_through(bim_filename, int(index.max()) // lines_per_offset if len(index) > 0 else 0)
+
+        sid = np.empty(len(index), dtype=object)
+        pos = np.empty((len(index), 3), dtype=np.float64)
+        block_index, lines = None, None
+        with open(bim_filename, "rb") as fp:
+            for i in np.argsort(index, kind="stable"):  # So each block of lines is read just once
+                if index[i] // lines_per_offset != block_index:
+                    block_index = index[i] // lines_per_offset
+                    fp.seek(offsets[block_index])
+                    if block_index + 1 < len(offsets):
+                        lines = fp.read(offsets[block_index + 1] - offsets[block_index]).split(b"\n")
+                    else:
+                        lines = fp.read().split(b"\n")
+                fields = lines[index[i] % lines_per_offset].decode().split()
+                sid[i] = fields[1]
+                chromosome = self.chrom_map.get(fields[0], fields[0])
+                pos[i] = [float(chromosome), np.float32(fields[2]), int(fields[3])]  # As bed_reader parses them
+        pos[pos == 0] = np.nan
+        return np.array(sid.tolist(), dtype="str"), pos
+
+    def _pos_from_open_bed(self):
+        self._open_bed_if_needed()
+
+        chromosome = self._open_bed.chromosome
+        intersection = self.chrom_map.keys() & chromosome
+        for key in intersection:
+            chromosome[chromosome == key] = self.chrom_map[key]
+
+        pos = np.array(
+            [
+                self._open_bed.chromosome.astype("float"),
+                self._open_bed.cm_position,
+                self._open_bed.bp_position,
+            ]
+        ).T  # LATER: Could copy in batches to use less memory
+        pos[pos == 0] = np.nan
+        return pos
+
+    def _read_bim_cache(self, name):
+        bim_filename = self.bim_filename or SnpReader._name_of_other_file(
+            self.filename, remove_suffix="bed", add_suffix="bim"
+        )
+        cache_filename = str(bim_filename) + ".npz"
+        stat = os.stat(bim_filename)
+        key = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+        chrom_map = repr(sorted(self.chrom_map.items()))
+
+        if os.path.exists(cache_filename):
+            with np.load(cache_filename, allow_pickle=False) as npz:
+                if np.array_equal(npz["key"], key) and str(npz["chrom_map"]) == chrom_map:
+                    return npz[name]  # Loads just this array
+            logging.info("Cache '{0}' is out of date, so re-parsing".format(cache_filename))
+
+        self._open_bed_if_needed()
+        arrays = {"sid": self._open_bed.sid, "pos": self._pos_from_open_bed()}
+        temp_filename = cache_filename + ".temp"
+        with open(temp_filename, "wb") as fp:
+            np.savez(fp, key=key, chrom_map=chrom_map, **arrays)
+        if os.path.exists(self._sid_index_filename()):  # It goes with the old cache
+            os.remove(self._sid_index_filename())
+        os.replace(temp_filename, cache_filename)
+        return arrays[name]
+
+    def _sid_index_filename(self):
+        bim_filename = self.bim_filename or SnpReader._name_of_other_file(
+            self.filename, remove_suffix="bed", add_suffix="bim"
+        )
+        return str(bim_filename) + ".sid_index.npy"
+
+    def _make_key_index(self, is_row, keys):
+        # With metadata_cache, the sid index is saved next to the cache and memory mapped back.
+        if is_row or not self._metadata_cache or self._original_sid is not None:
+            return SnpReader._make_key_index(self, is_row, keys)
+        index_filename = self._sid_index_filename()
+        if os.path.exists(index_filename):
+            key_index = _KeyIndex.load(index_filename, keys)
+            if key_index is not None:
+                return key_index
+        key_index = SnpReader._make_key_index(self, is_row, keys)
+        temp_filename = index_filename + ".temp.npy"
+        key_index.save(temp_filename)
+        os.replace(temp_filename, index_filename)
+        return key_index
 
     def _run_once(self):
         if self._ran_once:
             return
         self._ran_once = True
 
-        self.row
-        self.col
-        self.col_property
-        assert self._open_bed is not None  # real assert
-
-        self._assert_iid_sid_pos(check_val=False)
+        # Reading values needs only the counts, so the *.fam and *.bim files are parsed only if their information is requested.
+        self._open_bed_if_needed()
 
     def __del__(self):
         pass
@@ -219,6 +380,133 @@ class Bed(SnpReader):
             )
         )
 
+    def read_snp_stats(self, cache=True, block_size=None, num_threads=None):
+        """Returns per-SNP allele counts, missing counts, means and standard deviations, reading them from
+        a sidecar file when possible.
+
+        :param cache: optional -- If True (default), the statistics are saved in a sidecar file next to the `*.bed` file
+            (its name is the `*.bed` file's name plus '.stats.npz') and later calls read them from there. The sidecar is
+            keyed to the size and modification time of the `*.bed` file, so if the `*.bed` file changes, the statistics
+            are recomputed.
+        :type cache: bool
+
+        :param block_size: optional -- The number of SNPs to read at a time when computing the statistics. Defaults
+            to a block of about 16MB of int8 genotypes.
+        :type block_size: int
+
+        :param num_threads: optional -- The number of threads with which to read data. Defaults to all available processors.
+        :type num_threads: None or int
+
+        :rtype: dictionary from 'sid', 'allele_count', 'missing_count', 'mean', and 'std' to ndarrays
+
+        Counts are of the allele that this :class:`Bed` counts (see **count_A1**). As with :class:`.Unit`, a standard
+        deviation of zero is reported as infinity.
+
+        >>> from pysnptools.snpreader import Bed
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bed_fn = example_file("pysnptools/examples/toydata.5chrom.*", "*.bed")
+        >>> stats = Bed(bed_fn, count_A1=False).read_snp_stats(cache=False)
+        >>> print(stats['sid'][0], stats['allele_count'][0], stats['missing_count'][0], '{0:.6f}'.format(stats['std'][0]))
+        null_0 606 0 0.695022
+        """
+        self._run_once()
+
+        stats_filename = self.filename + ".stats.npz"
+        key = Bed._stats_key(self.filename, self.iid_count, self.sid_count)
+
+        stats = None
+        if cache and os.path.exists(stats_filename):
+            with np.load(stats_filename, allow_pickle=False) as npz:
+                if np.array_equal(npz["key"], key):
+                    stats = {name: npz[name] for name in ["allele_count", "missing_count", "mean", "std"]}
+                    cached_count_A1 = bool(npz["count_A1"])
+            if stats is None:
+                logging.info("Sidecar '{0}' is out of date, so recomputing".format(stats_filename))
+
+        if stats is None:
+            stats = self._compute_snp_stats(block_size, num_threads)
+            cached_count_A1 = self.count_A1
+            if cache:
+                temp_filename = stats_filename + ".temp"
+                with open(temp_filename, "wb") as fp:
+                    np.savez(fp, key=key, count_A1=self.count_A1, **stats)
+                os.replace(temp_filename, stats_filename)
+
+        if cached_count_A1 != self.count_A1:  # Count the other allele
+            observed = self.iid_count - stats["missing_count"]
+            stats["allele_count"] = 2 * observed - stats["allele_count"]
+            stats["mean"] = 2.0 - stats["mean"]
+
+        stats["sid"] = self.sid
+        return stats
+
+    def trained_standardizer(self, standardizer=None, cache=True, block_size=None, num_threads=None):
+        """Returns a constant :class:`.Standardizer` (:class:`.UnitTrained` or :class:`.BetaTrained`) trained on every individual
+        in the file, without reading any genotypes when the sidecar of :meth:`read_snp_stats` is up to date.
+
+        :param standardizer: optional -- :class:`.Unit` (default) or :class:`.Beta`.
+        :type standardizer: :class:`.Standardizer`
+
+        The other parameters are as in :meth:`read_snp_stats`.
+
+        :rtype: :class:`.UnitTrained` or :class:`.BetaTrained`
+
+        Because the result is constant, it can be applied to any subset of this :class:`Bed`, skipping the statistics pass
+        for the subset, when full-cohort statistics are acceptable.
+
+        >>> from pysnptools.snpreader import Bed
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bed_fn = example_file("pysnptools/examples/toydata.5chrom.*", "*.bed")
+        >>> bed = Bed(bed_fn, count_A1=False)
+        >>> trained = bed.trained_standardizer(cache=False)
+        >>> kerneldata = bed[:100,:].read_kernel(trained) # Kernel of the first 100 individuals, standardized with everyone's statistics
+        >>> print('{0:.6f}'.format(kerneldata.val[0,0]))
+        9923.069928
+        """
+        from pysnptools.standardizer import Unit, Beta, UnitTrained, BetaTrained
+
+        if standardizer is None:
+            standardizer = Unit()
+        stats = self.read_snp_stats(cache=cache, block_size=block_size, num_threads=num_threads)
+        stats2 = np.array([stats["mean"], stats["std"]]).T
+        if type(standardizer) is Unit:
+            return UnitTrained(stats["sid"], stats2)
+        if type(standardizer) is Beta:
+            return BetaTrained(standardizer.a, standardizer.b, stats["sid"], stats2)
+        raise ValueError(
+            "Expect standardizer to be Unit() or Beta(...), not {0}".format(standardizer)
+        )
+
+    @staticmethod
+    def _stats_key(filename, iid_count, sid_count):
+        stat = os.stat(filename)
+        return np.array([stat.st_size, stat.st_mtime_ns, iid_count, sid_count], dtype=np.int64)
+
+    def _compute_snp_stats(self, block_size, num_threads):
+        from pysnptools.standardizer import Standardizer
+
+        if block_size is None:
+            block_size = max(1, 2**24 // max(1, self.iid_count))
+
+        allele_count = np.empty(self.sid_count, dtype=np.int64)
+        missing_count = np.empty(self.sid_count, dtype=np.int64)
+        stats = np.empty((self.sid_count, 2), dtype=np.float64)
+        start = 0
+        for snpdata in self.iter_blocks(block_size, dtype=np.int8, num_threads=num_threads, prefetch=True):
+            stop = start + snpdata.sid_count
+            count, sum1 = Standardizer._stats_from_int8(snpdata.val, stats[start:stop])
+            allele_count[start:stop] = sum1
+            missing_count[start:stop] = self.iid_count - count
+            start = stop
+        assert start == self.sid_count, "real assert"
+
+        return {
+            "allele_count": allele_count,
+            "missing_count": missing_count,
+            "mean": stats[:, 0].copy(),
+            "std": stats[:, 1].copy(),
+        }
+
     @staticmethod
     def write(
         filename,
@@ -228,26 +516,34 @@ class Bed(SnpReader):
         _require_float32_64=True,
         num_threads=None,
         reverse_chrom_map={},
+        block_size=None,
     ):
-        """Writes a :class:`SnpData` to Bed format and returns the :class:`.Bed`.
+        """Writes a :class:`SnpData` (or any :class:`.SnpReader`) to Bed format and returns the :class:`.Bed`.
 
         :param filename: the name of the file to create
         :type filename: string
-        :param snpdata: The in-memory data that should be written to disk.
-        :type snpdata: :class:`SnpData`
+        :param snpdata: The data that should be written to disk. If it is a :class:`.SnpReader` that is not in memory (or if **block_size** is given),
+            it is read in blocks of SNPs and the blocks are encoded in parallel and appended, in order, to the `*.bed` file.
+            So, the data never needs to fit in memory.
+        :type snpdata: :class:`SnpData` or :class:`.SnpReader`
         :param count_A1: Tells if it should count the number of A1 alleles (the PLINK standard) or the number of A2 alleles. False is the current default, but in the future the default will change to True.
         :type count_A1: bool
         :param force_python_only: Defaults to False. Tells to use Python code rather than faster Rust code. (Might be useful for debugging).
+            When writing in blocks, the blocks are always encoded with NumPy code, and this is passed on to the reads of the blocks.
         :type force_python_only: bool
         :param _require_float32_64: Defaults to True. Requires that snpdata's dtype is float32 or float64. (False is useful for writing int8 data.)
         :type _require_float32_64: bool
-        :param num_threads: Maximum number of threads to use. Currently ignored and number of threads is 1.
+        :param num_threads: Maximum number of threads to use. Defaults to all available processors.
         :type num_threads: int
         :param reverse_chrom_map: Dictionary from chromosome number to chromsome string to write in the `*.bim` file. Defaults to empty dictionary.
         :type reverse_chrom_map: dictionary
+        :param block_size: optional -- The number of SNPs to read and encode at a time when writing in blocks. Defaults to a block of
+            about 16 million values. At most one block per thread, plus the block being read, is in memory at once.
+        :type block_size: int
         :rtype: :class:`.Bed`
 
         Any :attr:`pos` values of NaN will be written as 0, the PLINK standard for missing chromosome and position values.
+        Values must be 0, 1, 2, or missing.
 
         >>> from pysnptools.snpreader import Pheno, Bed
         >>> import pysnptools.util as pstutil
@@ -263,6 +559,9 @@ class Bed(SnpReader):
         dtype('int8')
         >>> Bed.write("tempdir/everyother.bed",snpdata_int,count_A1=False,_require_float32_64=False)
         Bed('tempdir/everyother.bed',count_A1=False)
+        >>> # Can write from any SnpReader, in blocks of SNPs, without reading all the data into memory.
+        >>> Bed.write("tempdir/everyother.bed",Bed(bed_fn,count_A1=False)[:,::2],count_A1=False,block_size=100)
+        Bed('tempdir/everyother.bed',count_A1=False)
         """
 
         if isinstance(filename, SnpData) and isinstance(
@@ -292,21 +591,34 @@ class Bed(SnpReader):
             for key in intersection:
                 chromosome[chromosome == key] = reverse_chrom_map[key]
 
-        to_bed(
-            filename,
-            val=snpdata.val,
-            properties={
-                "fid": snpdata.iid[:, 0],
-                "iid": snpdata.iid[:, 1],
-                "sid": snpdata.sid,
-                "chromosome": chromosome.copy(),
-                "cm_position": snpdata.pos[:, 1].copy(),
-                "bp_position": snpdata.pos[:, 2].copy(),
-            },
-            count_A1=count_A1,
-            force_python_only=force_python_only,
-            num_threads=num_threads,
-        )
+        properties = {
+            "fid": snpdata.iid[:, 0],
+            "iid": snpdata.iid[:, 1],
+            "sid": snpdata.sid,
+            "chromosome": chromosome.copy(),
+            "cm_position": snpdata.pos[:, 1].copy(),
+            "bp_position": snpdata.pos[:, 2].copy(),
+        }
+
+        if isinstance(snpdata, SnpData) and block_size is None:
+            to_bed(
+                filename,
+                val=snpdata.val,
+                properties=properties,
+                count_A1=count_A1,
+                force_python_only=force_python_only,
+                num_threads=num_threads,
+            )
+        else:
+            Bed._write_in_blocks(
+                filename,
+                snpdata,
+                chromosome,
+                count_A1,
+                block_size,
+                force_python_only,
+                num_threads,
+            )
 
         return Bed(filename, count_A1=count_A1)
 
@@ -339,6 +651,328 @@ class Bed(SnpReader):
 
         return val
 
+    _reads_int8 = True
+
+    _reader_by_dtype = {
+        np.dtype(np.float64): read_f64,
+        np.dtype(np.float32): read_f32,
+        np.dtype(np.int8): read_i8,
+    }
+
+    def _read_into(
+        self,
+        iid_index_or_none,
+        sid_index_or_none,
+        out,
+        force_python_only,
+        num_threads,
+    ):
+        self._run_once()
+
+        reader = Bed._reader_by_dtype.get(out.dtype)
+        if (
+            force_python_only
+            or reader is None
+            or 0 in out.shape
+            or not (out.flags["F_CONTIGUOUS"] or out.flags["C_CONTIGUOUS"])
+        ):
+            return SnpReader._read_into(
+                self,
+                iid_index_or_none,
+                sid_index_or_none,
+                out,
+                force_python_only,
+                num_threads,
+            )
+
+        # Decode straight into the caller's buffer, skipping the allocation that open_bed.read would do.
+        iid_index = np.arange(self.iid_count, dtype=np.intp) if iid_index_or_none is None else np.ascontiguousarray(iid_index_or_none, dtype=np.intp)
+        sid_index = np.arange(self.sid_count, dtype=np.intp) if sid_index_or_none is None else np.ascontiguousarray(sid_index_or_none, dtype=np.intp)
+        reader(
+            str(self._open_bed.location.as_posix()),
+            {},
+            iid_count=self.iid_count,
+            sid_count=self.sid_count,
+            is_a1_counted=self.count_A1,
+            iid_index=iid_index,
+            sid_index=sid_index,
+            val=out,
+            num_threads=get_num_threads(self._num_threads if num_threads is None else num_threads),
+        )
+
+    def _read_kernel(
+        self,
+        standardizer,
+        block_size=None,
+        order="A",
+        dtype=np.float64,
+        force_python_only=False,
+        view_ok=False,
+        return_trained=False,
+        num_threads=None,
+        memory_budget=None,
+    ):
+        """
+        With Unit or Beta standardization, computes the kernel straight from the 2-bit packed genotypes. See :meth:`_read_kernel_packed`.
+        """
+        import pysnptools.util as pstutil
+        import pysnptools.standardizer as stdizer
+
+        dtype = np.dtype(dtype)
+        if (
+            type(standardizer) in [stdizer.Unit, stdizer.Beta]
+            and not force_python_only
+            and pstutil.array_module() is np
+            and dtype in (np.float64, np.float32)
+            and self.iid_count > 0
+            and self.sid_count > 0
+            and self._is_snp_major()
+        ):
+            if block_size is None and memory_budget is not None:
+                byte_count = -(self.iid_count // -4)
+                # Room for the kernel and, for each of two (prefetched) blocks, its bytes, their positions in its lookup table,
+                # the table itself, and its tile of values. Plus, a contiguous copy of a tile.
+                block_size = SnpReader._budget_block_size(
+                    memory_budget,
+                    self.sid_count,
+                    bytes_per_sid=2 * (byte_count * (1 + 8) + 256 * 4 * dtype.itemsize + 4 * byte_count * dtype.itemsize)
+                    + 4 * byte_count * dtype.itemsize,
+                    fixed_bytes=self.iid_count * self.iid_count * dtype.itemsize,
+                    description=f"the {self.iid_count:,} x {self.iid_count:,} kernel",
+                )
+            K, trained_standardizer = self._read_kernel_packed(
+                standardizer, block_size, order, dtype, num_threads
+            )
+            if return_trained:
+                return K, trained_standardizer
+            else:
+                return K
+
+        return SnpReader._read_kernel(
+            self,
+            standardizer,
+            block_size=block_size,
+            order=order,
+            dtype=dtype,
+            force_python_only=force_python_only,
+            view_ok=view_ok,
+            return_trained=return_trained,
+            num_threads=num_threads,
+            memory_budget=memory_budget,
+        )
+
+    def _is_snp_major(self):
+        with open(self.filename, "rb") as fp:
+            return fp.read(3) == bytes([0b01101100, 0b00011011, 0b00000001])
+
+    # For each byte value, the 2-bit code of each of its four individuals (the first individual in the lowest bits)
+    _code_of_byte = (
+        np.arange(256, dtype=np.uint8)[:, np.newaxis] >> np.array([0, 2, 4, 6], dtype=np.uint8)
+    ) & 3
+    # For each byte value, how many of its individuals have each code
+    _code_count_of_byte = (_code_of_byte[:, :, np.newaxis] == np.arange(4)).sum(axis=1)
+
+    def _read_kernel_packed(self, standardizer, block_size, order, dtype, num_threads):
+        """
+        Returns the kernel and trained standardizer, working directly from the bytes of the *.bed file.
+
+        For each block of SNPs, the per-SNP genotype counts come from a histogram of its bytes (four individuals per byte),
+        giving the mean and stddev. Each SNP then has only four possible standardized values, one per 2-bit code, so a
+        256 x 4 table per SNP turns each byte into the standardized values of its four individuals in one lookup.
+        The tile of standardized values is multiplied into the kernel (while the next block is decoded on a background thread).
+        """
+        import pysnptools.standardizer as stdizer
+
+        iid_count, sid_count = self.iid_count, self.sid_count
+        byte_count = -(iid_count // -4)
+        if block_size is None:
+            block_size = max(1, 2**26 // (4 * byte_count * dtype.itemsize))
+        block_size = min(block_size, sid_count)
+        if order == "A":
+            order = "C"
+        packed = np.memmap(
+            self.filename, dtype=np.uint8, mode="r", offset=3, shape=(sid_count, byte_count)
+        )
+        # The genotype of each 2-bit code, NaN for missing
+        if self.count_A1:
+            genotype_of_code = np.array([2.0, np.nan, 1.0, 0.0])
+        else:
+            genotype_of_code = np.array([0.0, np.nan, 1.0, 2.0])
+        genotype_of_code_0 = np.nan_to_num(genotype_of_code)
+
+        def stats_and_tile(start):
+            stop = min(start + block_size, sid_count)
+            snp_count = stop - start
+            bytes_ = np.asarray(packed[start:stop])
+            row_offset = np.arange(snp_count, dtype=np.intp)[:, np.newaxis] * 256
+
+            # Count the codes of each SNP. The unused codes of the last byte are left out.
+            full_byte_count = iid_count // 4
+            histogram = np.bincount(
+                (row_offset + bytes_[:, :full_byte_count]).ravel(),
+                minlength=snp_count * 256,
+            ).reshape(snp_count, 256)
+            code_count = histogram @ Bed._code_count_of_byte
+            for position in range(iid_count - 4 * full_byte_count):
+                code_count[np.arange(snp_count), Bed._code_of_byte[bytes_[:, -1], position]] += 1
+
+            observed_count = iid_count - code_count[:, 1]
+            if np.any(observed_count == 0):
+                raise ValueError("No individual observed for the SNP.")
+            sum1 = code_count @ genotype_of_code_0
+            sum2 = code_count @ genotype_of_code_0**2
+            mean = sum1 / observed_count
+            std = np.sqrt(np.maximum(sum2 / observed_count - mean * mean, 0.0))
+            std[std == 0.0] = np.inf
+
+            if type(standardizer) is stdizer.Unit:
+                weight = 1.0 / std
+            else:
+                import scipy.stats as st
+
+                maf = mean / 2.0
+                maf[maf > 0.5] = 1.0 - maf[maf > 0.5]
+                weight = st.beta.pdf(maf, standardizer.a, standardizer.b)
+
+            # Each SNP's standardized value for each code (0 for missing) and then for each byte
+            value_of_code = np.nan_to_num(
+                (genotype_of_code - mean[:, np.newaxis]) * weight[:, np.newaxis]
+            ).astype(dtype)
+            value_of_byte = value_of_code[:, Bed._code_of_byte].reshape(snp_count * 256, 4)
+            tile = value_of_byte[row_offset + bytes_].reshape(snp_count, 4 * byte_count)
+            stats = np.array([mean, std]).T
+            # SNP-major tile, so its transpose is an iid x sid F-order block
+            return stats, tile[:, :iid_count].T
+
+        logging.info(
+            f"adding up the kernel of {sid_count:,} SNPs (for {iid_count:,} individuals) from packed genotypes in blocks of {block_size:,}"
+        )
+        K = np.zeros((iid_count, iid_count), dtype=dtype, order=order)
+        stats_list = []
+        is_triangle_only = False
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(stats_and_tile, 0)
+            for start in range(0, sid_count, block_size):
+                stats, val = future.result()
+                if start + block_size < sid_count:
+                    future = executor.submit(stats_and_tile, start + block_size)
+                stats_list.append(stats)
+                is_triangle_only = SnpReader._syrk_accumulate(K, val)
+        if is_triangle_only:
+            SnpReader._fill_lower_from_upper(K)
+
+        stats = np.concatenate(stats_list)
+        if type(standardizer) is stdizer.Unit:
+            trained_standardizer = stdizer.UnitTrained(self.sid, stats)
+        else:
+            trained_standardizer = stdizer.BetaTrained(
+                standardizer.a, standardizer.b, self.sid, stats
+            )
+        return K, trained_standardizer
+
+
+    @staticmethod
+    def _write_in_blocks(
+        filename,
+        snpreader,
+        chromosome,
+        count_A1,
+        block_size,
+        force_python_only,
+        num_threads,
+    ):
+        iid_count, sid_count = snpreader.iid_count, snpreader.sid_count
+        if block_size is None:
+            block_size = max(1, 2**24 // max(1, iid_count))
+        num_threads = get_num_threads(num_threads)
+        dtype = np.int8 if snpreader._reads_int8 else np.float32
+
+        # Blocks are read, in order, on this thread and encoded on the pool. Encoded blocks
+        # are appended in order, so at most num_threads blocks are waiting in 'pending'.
+        temp_filename = filename + ".temp"
+        try:
+            with open(temp_filename, "wb") as fp, ThreadPoolExecutor(
+                max_workers=num_threads
+            ) as executor:
+                fp.write(
+                    bytes([0b01101100, 0b00011011, 0b00000001])
+                )  # magic numbers and SNP major
+                pending = deque()
+                for start in range(0, sid_count, block_size):
+                    if isinstance(snpreader, SnpData):  # Already in memory, so encode views
+                        val = snpreader.val[:, start : start + block_size]
+                    else:
+                        val = (
+                            snpreader[:, start : start + block_size]
+                            .read(
+                                order="F",
+                                dtype=dtype,
+                                _require_float32_64=False,
+                                force_python_only=force_python_only,
+                                num_threads=num_threads,
+                            )
+                            .val
+                        )
+                    pending.append(executor.submit(Bed._encode_block, val, count_A1))
+                    while len(pending) > num_threads:
+                        fp.write(pending.popleft().result())
+                while pending:
+                    fp.write(pending.popleft().result())
+            os.replace(temp_filename, filename)
+        except BaseException:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            raise
+
+        # Only after the *.bed file is complete, so that an illegal value leaves no *.fam or *.bim file behind
+        SnpReader._write_fam(snpreader, filename, remove_suffix="bed")
+        SnpReader._write_map_or_bim(
+            snpreader,
+            filename,
+            remove_suffix="bed",
+            add_suffix="bim",
+            chromosome=chromosome,
+            alleles=("A1", "A2"),  # As bed_reader's to_bed writes them
+        )
+
+    @staticmethod
+    def _encode_block(val, count_A1):
+        """
+        Encodes an iid x sid block of 0, 1, 2, and missing (NaN or, for int8, -127) values
+        into the SNP-major bytes of a *.bed file, four individuals per byte.
+        """
+        iid_count, sid_count = val.shape
+        if val.dtype == np.int8:
+            genotype = val
+        else:
+            missing = np.isnan(val)
+            with np.errstate(invalid="ignore"):
+                genotype = np.where(missing, -127, val).astype(np.int8)
+                if not np.all(missing | ((genotype == val) & (val >= 0))):
+                    raise ValueError(
+                        "Attempt to write illegal value to .bed file. Only 0,1,2,missing allowed."
+                    )
+
+        # Look up each value's 2-bit code. (-127 is 129 as a uint8.)
+        code_table = np.full(256, 0xFF, dtype=np.uint8)
+        if count_A1:
+            code_table[[0, 1, 2, 129]] = [0b11, 0b10, 0b00, 0b01]
+        else:
+            code_table[[0, 1, 2, 129]] = [0b00, 0b10, 0b11, 0b01]
+        iid_count_div4 = -(iid_count // -4)
+        codes = np.zeros((sid_count, iid_count_div4 * 4), dtype=np.uint8)
+        codes[:, :iid_count] = code_table[genotype.view(np.uint8).T]
+        if codes.max(initial=0) == 0xFF:
+            raise ValueError(
+                "Attempt to write illegal value to .bed file. Only 0,1,2,missing allowed."
+            )
+
+        # The first individual goes in the lowest two bits of each byte.
+        codes = codes.reshape(sid_count, iid_count_div4, 4)
+        packed = codes[:, :, 0] | (codes[:, :, 1] << 2)
+        packed |= codes[:, :, 2] << 4
+        packed |= codes[:, :, 3] << 6
+        return packed.tobytes()
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
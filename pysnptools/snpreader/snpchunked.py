@@ -0,0 +1,112 @@
+from pysnptools.pstreader import PstChunked
+from pysnptools.snpreader import SnpReader
+import logging
+import numpy as np
+
+
+class SnpChunked(PstChunked, SnpReader):
+    r"""
+    A :class:`.SnpReader` for reading \*.snp.chunked files from disk.
+
+    See :class:`.SnpReader` for general examples of using SnpReaders.
+
+    The SnpChunked format stores val, iid, sid, and pos information. The values are compressed in 2-D chunks of
+    individuals and SNPs, so reading a subset of individuals, of SNPs, or of both, decompresses only the chunks needed.
+    See :class:`.PstChunked` for details.
+
+    **Constructor:**
+        :Parameters: * **filename** (*string*) -- The SnpChunked file to read.
+
+        Also see :meth:`.SnpChunked.write`.
+
+        :Example:
+
+        >>> from pysnptools.snpreader import SnpChunked, Bed
+        >>> import pysnptools.util as pstutil
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bed_file = example_file("pysnptools/examples/toydata.5chrom.*","*.bed")
+        >>> pstutil.create_directory_if_necessary("tempdir/toydata.snp.chunked")
+        >>> data_on_disk = SnpChunked.write("tempdir/toydata.snp.chunked",Bed(bed_file,count_A1=False),dtype='float32')
+        >>> print((data_on_disk.iid_count, data_on_disk.sid_count))
+        (500, 10000)
+        >>> print(data_on_disk[::10,5000:5002].read().val.mean())
+        1.88
+
+    **Methods beyond** :class:`.SnpReader`
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(SnpChunked, self).__init__(*args, **kwargs)
+
+    @property
+    def row(self):
+        self._run_once()
+        if self._row.dtype.type is not np.str_:
+            self._row = np.array(self._row, dtype="str")
+        return self._row
+
+    @property
+    def col(self):
+        self._run_once()
+        if self._col.dtype.type is not np.str_:
+            self._col = np.array(self._col, dtype="str")
+        return self._col
+
+    @staticmethod
+    def write(
+        filename,
+        snpreader,
+        chunk_shape=(1024, 256),
+        dtype=None,
+        compression_level=1,
+        num_threads=None,
+    ):
+        """Writes a :class:`SnpReader` to SnpChunked format and returns the :class:`.SnpChunked`
+
+        :param filename: the name of the file to create
+        :type filename: string
+        :param snpreader: The data that should be written to disk. It can be any :class:`SnpReader`, for example, :class:`.Bed`.
+            It is read one column of chunks at a time.
+        :type snpreader: :class:`SnpReader`
+        :param chunk_shape: optional -- The number of individuals and the number of SNPs in each chunk. Default: (1024, 256)
+        :type chunk_shape: tuple of two ints
+        :param dtype: {None (default), numpy.float64, numpy.float32}, optional -- The data-type of the values on disk.
+            By default, that of the input if it is in memory, otherwise numpy.float64.
+        :type dtype: data-type
+        :param compression_level: optional -- The zlib compression level, from 0 (none) to 9 (most). Default: 1 (fastest)
+        :type compression_level: int
+        :param num_threads: optional -- The number of threads with which to read and compress data. Defaults to all available
+            processors. Can also be set with these environment variables (listed in priority order):
+            'PST_NUM_THREADS', 'NUM_THREADS', 'MKL_NUM_THREADS'.
+        :type num_threads: None or int
+        :rtype: :class:`.SnpChunked`
+
+        >>> from pysnptools.snpreader import SnpChunked, Bed
+        >>> import pysnptools.util as pstutil
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bed_file = example_file("pysnptools/examples/toydata.5chrom.*","*.bed")
+        >>> snpdata = Bed(bed_file,count_A1=False)[:,:10].read()     # Read first 10 snps from Bed format
+        >>> pstutil.create_directory_if_necessary("tempdir/toydata10.snp.chunked")
+        >>> SnpChunked.write("tempdir/toydata10.snp.chunked",snpdata)          # Write data in SnpChunked format
+        SnpChunked('tempdir/toydata10.snp.chunked')
+        """
+        PstChunked._write(
+            filename,
+            snpreader,
+            np.array(snpreader.row, dtype="str"),
+            np.array(snpreader.col, dtype="str"),
+            chunk_shape,
+            dtype,
+            compression_level,
+            num_threads,
+        )
+        return SnpChunked(filename)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    import doctest
+
+    doctest.testmod(optionflags=doctest.ELLIPSIS)
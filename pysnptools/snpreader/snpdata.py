@@ -251,6 +251,7 @@ class SnpData(PstData, SnpReader):
         view_ok=False,
         return_trained=False,
         num_threads=None,
+        memory_budget=None,
     ):
         """
         The method creates a kernel for the in-memory SNP data. It handles these cases
@@ -265,10 +266,11 @@ class SnpData(PstData, SnpReader):
             time.time()
             # is_worth_logging = train.val.shape[0] * train.val.shape[1] * test.val.shape[0] > 1e9
             # if is_worth_logging: logging.info("  _read_kernel about to multiply train{0} x test{1}".format(train.val.shape,test.val.shape))
-            if order == "F":  # numpy's 'dot' always returns 'C' order
-                K = (train.val.dot(train.val.T)).T
-            else:
-                K = train.val.dot(train.val.T)
+            xp = pstutil.get_array_module(train.val)
+            # The kernel is symmetric, so fill in just one triangle (with a symmetric rank-k update) and then copy it across.
+            K = xp.zeros([train.iid_count, train.iid_count], dtype=dtype, order="C" if order == "C" else "F")
+            if SnpReader._syrk_accumulate(K, train.val):
+                SnpReader._fill_lower_from_upper(K)
             assert PstReader._array_properties_are_ok(K, order, dtype), "internal error: K is not of the expected order or dtype"
             # if is_worth_logging: logging.info("  _read_kernel took %.2f seconds" % (time.time()-ts))
             if return_trained:
@@ -286,6 +288,35 @@ class SnpData(PstData, SnpReader):
                 view_ok=view_ok,
                 return_trained=return_trained,
                 num_threads=num_threads,
+                memory_budget=memory_budget,
+            )
+
+    def _read_into(
+        self,
+        iid_index_or_none,
+        sid_index_or_none,
+        out,
+        force_python_only,
+        num_threads,
+    ):
+        # When the request is a run of consecutive sids, copy straight from a slice of val (for SnpMemMap, straight from the page cache).
+        if (
+            iid_index_or_none is None
+            and sid_index_or_none is not None
+            and len(sid_index_or_none) > 0
+            and sid_index_or_none[-1] - sid_index_or_none[0] == len(sid_index_or_none) - 1
+            and np.all(np.diff(sid_index_or_none) == 1)
+        ):
+            start = sid_index_or_none[0]
+            out[...] = self.val[:, start : start + len(sid_index_or_none)]
+        else:
+            SnpReader._read_into(
+                self,
+                iid_index_or_none,
+                sid_index_or_none,
+                out,
+                force_python_only,
+                num_threads,
             )
 
     def __repr__(self):
@@ -285,6 +285,38 @@ class TestSnpMemMap(unittest.TestCase):
 
         os.chdir(old_dir)
 
+    def test_views(self):
+        from pysnptools.snpreader import SnpData, SnpMemMap
+        from pysnptools.standardizer import Identity, Unit
+
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+        np.random.seed(0)
+        snpdata = SnpData(
+            iid=[["fam0", "iid{0}".format(i)] for i in range(20)],
+            sid=["snp{0}".format(i) for i in range(25)],
+            val=np.random.randint(0, 3, size=(20, 25)) * 1.0,
+        )
+        filename = "tempdir/views.snp.memmap"
+        pstutil.create_directory_if_necessary(filename)
+        snpreader = SnpMemMap.write(filename, snpdata, order="F")  # so blocks of SNPs are contiguous
+
+        start = 0
+        for block in snpreader.iter_blocks(7, view_ok=True):
+            assert np.shares_memory(block.val, snpreader.val)
+            assert np.array_equal(block.val, snpdata.val[:, start : start + 7])
+            start += block.sid_count
+        for block in snpreader.iter_blocks(7):
+            assert not np.shares_memory(block.val, snpreader.val)
+
+        for standardizer in [Identity(), Unit()]:
+            expected = snpdata.read_kernel(standardizer).val
+            assert np.allclose(
+                snpreader.read_kernel(standardizer, block_size=7).val, expected
+            )
+            assert np.array_equal(snpreader.val, snpdata.val)  # Unchanged
+        os.chdir(old_dir)
+
 
 def getTestSuite():
     """
@@ -1,5 +1,6 @@
 import numpy as np
 import logging
+from pysnptools.util._posindex import _PosIndex
 import time
 import pysnptools.util as pstutil
 from pysnptools.pstreader import PstReader
@@ -62,6 +63,7 @@ class SnpReader(PstReader):
             :class:`.SnpNpz`          binary, floats      No                     .snp.npz           Yes
             :class:`.SnpHdf5`         binary, floats      Yes (by sid or iid)    .snp.hdf5          Yes
             :class:`.SnpMemMap`       mem-mapped floats   Yes                    .snp.memmap        Yes
+            :class:`.SnpChunked`      compressed floats   Yes (by chunk)         .snp.chunked       Yes
             :class:`.SnpGen`          generated values    Yes (by sid)           *n/a*              *n/a*
             ========================= =================== ====================== ================== ======================
 
@@ -69,7 +71,7 @@ class SnpReader(PstReader):
         Methods & Properties:
 
             Every SnpReader, such as :class:`.Bed` and :class:`.SnpData`, has these properties: :attr:`iid`, :attr:`iid_count`, :attr:`sid`, :attr:`sid_count`,
-            :attr:`pos` and these methods: :meth:`read`, :meth:`iid_to_index`, :meth:`sid_to_index`, :meth:`read_kernel`. See below for details.
+            :attr:`pos` and these methods: :meth:`read`, :meth:`iid_to_index`, :meth:`sid_to_index`, :meth:`region`, :meth:`read_kernel`. See below for details.
 
             :class:`.SnpData` is a SnpReader so it supports the above properties and methods. In addition, it supports property :attr:`.SnpData.val`,
             method :meth:`.SnpData.standardize`, and equality testing.
@@ -421,6 +423,33 @@ class SnpReader(PstReader):
     ):
         raise NotImplementedError
 
+    def _read_into(
+        self,
+        iid_index_or_none,
+        sid_index_or_none,
+        out,
+        force_python_only,
+        num_threads,
+    ):
+        """
+        Like '_read' except that the values are written into 'out', a preallocated 'C' or 'F' ndarray.
+        Readers that can decode straight into a buffer (for example, :class:`.Bed`) override this.
+        """
+        order = "F" if out.flags["F_CONTIGUOUS"] else "C"
+        val = self._read(
+            iid_index_or_none,
+            sid_index_or_none,
+            order,
+            out.dtype,
+            force_python_only,
+            True,  # a view is OK because we copy into 'out' right away
+            num_threads,
+        )
+        out[...] = val
+
+    # True if the reader can read genotypes directly into int8 (with -127 for missing). See :meth:`_read_kernel`.
+    _reads_int8 = False
+
     # !!check that views always return contiguous memory by default
     def read(
         self,
@@ -543,6 +572,34 @@ class SnpReader(PstReader):
         """
         return self.col_to_index(list)
 
+    def region(self, region):
+        """Returns a :class:`.SnpReader` for the SNPs in one or more genomic regions. No SNP values are read.
+
+        :param region: A region string, such as ``'1:1000000-2000000'`` (1-based, with both ends inclusive), ``'1:1000000'`` (one position),
+            or ``'1'`` (a whole chromosome). Or, a dictionary from chromosome number to an :class:`.IntRangeSet` (or any *ranges input*)
+            of base-pair positions, such as ``{1: IntRangeSet('1000000:2000001')}``. Or, a list of these.
+        :type region: string, dictionary, or list
+
+        :rtype: :class:`.SnpReader` (a subset of this reader, in its original SNP order)
+
+        The first call sorts the SNPs by chromosome and base-pair position. After that, each region is found with a binary search.
+        SNPs with a missing chromosome or position are never in a region.
+
+        :Example:
+
+        >>> from pysnptools.snpreader import Bed
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bedfile = example_file("pysnptools/examples/toydata.5chrom.*","*.bed")
+        >>> snp_on_disk = Bed(bedfile,count_A1=False)
+        >>> print(snp_on_disk.region("1:100-199").sid_count) # The SNPs on chromosome 1 from position 100 through 199
+        100
+        >>> print(snp_on_disk.region(["2", "3:1-10"]).sid_count) # All of chromosome 2 and the start of chromosome 3
+        3622
+        """
+        if not hasattr(self, "_pos_index"):
+            self._pos_index = _PosIndex(self.pos)
+        return self[:, self._pos_index.index(region)]
+
     def __getitem__(self, iid_indexer_and_snp_indexer):
         from pysnptools.snpreader._subset import _SnpSubset
 
@@ -558,6 +615,7 @@ class SnpReader(PstReader):
         force_python_only=False,
         view_ok=False,
         num_threads=None,
+        memory_budget=None,
     ):
         """Returns a :class:`KernelData` such that the :meth:`KernelData.val` property will be a ndarray of the standardized SNP values multiplied with their transposed selves.
 
@@ -568,11 +626,19 @@ class SnpReader(PstReader):
         :param block_size: optional -- Default of None (meaning to load all). Suggested number of sids to read into memory at a time.
         :type block_size: int or None
 
+        :param memory_budget: optional -- Instead of **block_size**, the approximate memory to use, as a number of bytes or as a string
+            such as "8GB" or "500MB". The block size is derived from it, after setting aside room for the kernel itself. The plan is logged.
+            A budget that can't hold the kernel raises a ValueError.
+        :type memory_budget: int, string, or None
+
         :rtype: class:`KernelData`
 
         Calling the method again causes the SNP values to be re-read and allocates a new class:`KernelData`.
 
         When applied to an read-from-disk SnpReader, such as :class:`.Bed`, the method can save memory by reading (and standardizing) the data in blocks.
+        While one block is multiplied into the kernel, the next block is read on a background thread, so two blocks are in memory at a time.
+        With :class:`.Bed` and :class:`.Unit` or :class:`.Beta` standardization, blocks are read as int8 genotypes and converted to floats
+        only a tile at a time, just before they are multiplied into the kernel.
 
         :Example:
 
@@ -590,12 +656,290 @@ class SnpReader(PstReader):
 
         from pysnptools.kernelreader import SnpKernel
 
-        snpkernel = SnpKernel(self, standardizer=standardizer, block_size=block_size)
+        snpkernel = SnpKernel(
+            self,
+            standardizer=standardizer,
+            block_size=block_size,
+            memory_budget=memory_budget,
+        )
         kerneldata = snpkernel.read(
             order, dtype, force_python_only, view_ok, num_threads
         )
         return kerneldata
 
+    def read_loco_kernels(
+        self,
+        standardizer=None,
+        block_size=None,
+        dtype=np.float64,
+        folder=None,
+        force_python_only=False,
+        num_threads=None,
+    ):
+        """Reads the SNP data once and returns a leave-one-chromosome-out (LOCO) kernel for every chromosome.
+
+        The kernel of each chromosome (as given by :attr:`pos` [:,0]) is accumulated separately.
+        Each LOCO kernel is then the total of these partial kernels minus the partial kernel of its chromosome.
+
+        :param standardizer: -- (required) Specify standardization to be applied before the matrix multiply. Any :class:`.Standardizer` may be used.
+            Some choices include :class:`Standardizer.Identity` (do nothing), :class:`.Unit` (make values for each SNP have mean zero and
+            standard deviation 1.0) and :class:`Beta`.
+        :type standardizer: :class:`.Standardizer`
+
+        :param block_size: optional -- Default of None (meaning to load all). Suggested number of sids to read into memory at a time.
+        :type block_size: int or None
+
+        :param dtype: {numpy.float64 (default), numpy.float32}, optional -- The data-type for the kernel values.
+        :type dtype: data-type
+
+        :param folder: optional -- Default of None (meaning in memory). If given, the total and partial kernels are
+            kept in :class:`.KernelMemMap` files in this folder.
+        :type folder: string or None
+
+        :param force_python_only: optional -- If False (default), may use outside library code. If True, requests that the read
+            be done without outside library code.
+        :type force_python_only: bool
+
+        :param num_threads: optional -- The number of threads with which to read and standardize data. Defaults to all available
+            processors. Can also be set with these environment variables (listed in priority order):
+            'PST_NUM_THREADS', 'NUM_THREADS', 'MKL_NUM_THREADS'.
+        :type num_threads: None or int
+
+        :rtype: dictionary from chromosome to :class:`.KernelReader`
+
+        The returned kernels compute their values (total minus partial) only when read. One partial kernel per chromosome,
+        plus the total, is kept (in memory or in **folder**). Use, for example, :meth:`.KernelMemMap.write` to save a LOCO kernel to disk.
+
+        :Example:
+
+        >>> from pysnptools.snpreader import Bed
+        >>> from pysnptools.standardizer import Unit
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bedfile = example_file("pysnptools/examples/toydata.5chrom.*","*.bed")
+        >>> snp_on_disk = Bed(bedfile,count_A1=False) # Specify SNP data on disk
+        >>> loco_dict = snp_on_disk.read_loco_kernels(Unit(),block_size=1000)
+        >>> print(sorted(loco_dict.keys()))
+        [1.0, 2.0, 3.0, 4.0, 5.0]
+        >>> kerneldata1 = loco_dict[1.0].read() # The kernel of the SNPs not on chromosome 1
+        >>> print((int(kerneldata1.iid_count), '{0:.6f}'.format(kerneldata1.val[0,0])))
+        (500, '7147.629864')
+        """
+        assert standardizer is not None, "'standardizer' must be provided"
+        from pysnptools.kernelreader import KernelData, KernelMemMap
+        from pysnptools.kernelreader._loco import _LocoKernel
+
+        dtype = np.dtype(dtype)
+        chrom = self.pos[:, 0]
+        assert not np.isnan(chrom).any(), "Expect every sid to have a chromosome (pos[:,0])"
+        chrom_list = [float(c) for c in np.unique(chrom)]
+
+        def empty_kernel(name):
+            if folder is None:
+                return KernelData(
+                    iid=self.iid,
+                    val=np.zeros((self.iid_count, self.iid_count), dtype=dtype, order="F"),
+                    name=name,
+                )
+            filename = "{0}/{1}.kernel.memmap".format(folder, name)
+            pstutil.create_directory_if_necessary(filename)
+            return KernelMemMap.empty(self.iid, filename, order="F", dtype=dtype)
+
+        partial_dict = {c: empty_kernel("chrom{0:g}".format(c)) for c in chrom_list}
+        logging.info(
+            f"reading {self.sid_count:,} SNPs in blocks of {block_size or self.sid_count:,} and adding up {len(chrom_list):,} per-chromosome kernels"
+        )
+
+        is_triangle_only = False
+        start = 0
+        view_ok = type(standardizer) is stdizer.Identity  # Then, blocks of a SnpMemMap need not be copied
+        for snpdata in self.iter_blocks(
+            block_size or max(self.sid_count, 1),
+            order="F",
+            dtype=dtype,
+            standardizer=None if view_ok else standardizer,
+            force_python_only=force_python_only,
+            num_threads=num_threads,
+            prefetch=block_size is not None,
+            view_ok=view_ok,
+        ):
+            block_chrom = chrom[start : start + snpdata.sid_count]
+            start += snpdata.sid_count
+            # Each run of consecutive SNPs on the same chromosome is a contiguous slice of the 'F' block.
+            break_list = [0] + list(np.flatnonzero(block_chrom[1:] != block_chrom[:-1]) + 1) + [len(block_chrom)]
+            for run_start, run_stop in zip(break_list[:-1], break_list[1:]):
+                is_triangle_only = SnpReader._syrk_accumulate(
+                    partial_dict[block_chrom[run_start]].val,
+                    snpdata.val[:, run_start:run_stop],
+                )
+
+        total = empty_kernel("total")
+        for partial in partial_dict.values():
+            if is_triangle_only:
+                SnpReader._fill_lower_from_upper(partial.val)
+            total.val += partial.val
+        if folder is not None:
+            for kernel in [total] + list(partial_dict.values()):
+                kernel.flush()
+
+        return {c: _LocoKernel(total, partial_dict[c], c) for c in chrom_list}
+
+    def iter_blocks(
+        self,
+        sid_block_size,
+        order="F",
+        dtype=np.float64,
+        standardizer=None,
+        return_trained=False,
+        force_python_only=False,
+        num_threads=None,
+        prefetch=False,
+        view_ok=False,
+    ):
+        """Generates :class:`.SnpData`'s, each with the SNP values of (at most) **sid_block_size** consecutive sids.
+
+        :param sid_block_size: The number of sids to read into memory at a time.
+        :type sid_block_size: int
+
+        :param order: {'F' (default), 'C'}, optional -- Specify the order of each block's ndarray.
+        :type order: string
+
+        :param dtype: {numpy.float64 (default), numpy.float32}, optional -- The data-type for each block's ndarray.
+             (For :class:`Bed`, only, it can also be numpy.int8.)
+        :type dtype: data-type
+
+        :param standardizer: optional -- If given, each block is standardized, in place, before it is generated.
+        :type standardizer: :class:`.Standardizer`
+
+        :param return_trained: If true, generates pairs of the block and a constant :class:`.Standardizer` trained on the block.
+        :type return_trained: bool
+
+        :param force_python_only: optional -- If False (default), may use outside library code. If True, requests that the read
+            be done without outside library code.
+        :type force_python_only: bool
+
+        :param num_threads: optional -- The number of threads with which to read data. Defaults to all available
+            processors. Can also be set with these environment variables (listed in priority order):
+            'PST_NUM_THREADS', 'NUM_THREADS', 'MKL_NUM_THREADS'.
+        :type num_threads: None or int
+
+        :param prefetch: optional -- If False (default), reads each block when it is requested. If True, reads (and standardizes)
+            the next block on a background thread while the current block is in use. This overlaps disk work with computation
+            at the cost of a second buffer.
+        :type prefetch: bool
+
+        :param view_ok: optional -- If False (default), each block is copied into an ndarray allocated by this method. If True,
+            and there is no **standardizer**, a reader that can, such as :class:`.SnpMemMap`, generates views of its own memory
+            instead, with no copying. Such a block must not be changed.
+        :type view_ok: bool
+
+        :rtype: generator of :class:`.SnpData` (or of pairs of :class:`.SnpData` and :class:`.Standardizer`)
+
+        To keep memory use constant, one ndarray (two, with **prefetch**) is allocated and then re-filled for each block. So, a block's values
+        are only good until the next block is requested. Use :meth:`.SnpData.read` to copy a block that you wish to keep.
+
+        :Example:
+
+        >>> from pysnptools.snpreader import Bed
+        >>> from pysnptools.standardizer import Unit
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bedfile = example_file("tests/datasets/all_chr.maf0.001.N300.*","*.bed")
+        >>> snp_on_disk = Bed(bedfile,count_A1=False) # Specify SNP data on disk
+        >>> for snpdata in snp_on_disk.iter_blocks(500, standardizer=Unit()):
+        ...     print(snpdata.sid_count, '{0:.6f}'.format(snpdata.val[0,0]))
+        500 0.229416
+        500 -2.024114
+        15 -0.313914
+        """
+        from pysnptools.snpreader import SnpData
+
+        dtype = np.dtype(dtype)
+        if order == "A":
+            order = "F"
+        assert order in {"F", "C"}, "Expect order to be 'F', 'C', or 'A'"
+        assert sid_block_size > 0, "Expect sid_block_size to be positive"
+
+        iid = self.iid
+        sid = self.sid
+        pos = self.pos
+        start_stop_list = [
+            (start, min(start + sid_block_size, self.sid_count))
+            for start in range(0, self.sid_count, sid_block_size)
+        ]
+        # With prefetch, the next block is read into the second buffer while the caller works on the first.
+        buffer_list = [None, None] if prefetch else [None]
+
+        # A reader whose _read can return views of its memory (e.g. a memmap) needs no buffers.
+        read_views = view_ok and standardizer is None and getattr(self, "_reads_views", False)
+
+        def read_block(block_index):
+            start, stop = start_stop_list[block_index]
+            if read_views:
+                val = self._read(
+                    None,
+                    slice(start, stop),
+                    order,
+                    dtype,
+                    force_python_only,
+                    True,
+                    num_threads,
+                )
+                snpdata = SnpData(
+                    iid,
+                    sid[start:stop],
+                    val,
+                    pos=pos[start:stop],
+                    name="{0}[:,{1}:{2}]".format(self, start, stop),
+                    _require_float32_64=False,
+                )
+                return snpdata, stdizer.Identity()
+            buffer_index = block_index % len(buffer_list)
+            buffer = buffer_list[buffer_index]
+            # The last block may be shorter. It gets its own allocation so that every block is a single contiguous segment.
+            if buffer is None or buffer.shape[1] != stop - start:
+                buffer = np.empty((len(iid), stop - start), dtype=dtype, order=order)
+                buffer_list[buffer_index] = buffer
+            self._read_into(
+                None,
+                np.arange(start, stop, dtype=np.intp),
+                buffer,
+                force_python_only,
+                num_threads,
+            )
+            snpdata = SnpData(
+                iid,
+                sid[start:stop],
+                buffer,
+                pos=pos[start:stop],
+                name="{0}[:,{1}:{2}]".format(self, start, stop),
+                _require_float32_64=False,
+            )
+            if standardizer is not None:
+                return snpdata.standardize(
+                    standardizer,
+                    return_trained=True,
+                    force_python_only=force_python_only,
+                    num_threads=num_threads,
+                )
+            return snpdata, stdizer.Identity()
+
+        def result(snpdata_and_trained):
+            return snpdata_and_trained if return_trained else snpdata_and_trained[0]
+
+        if not prefetch or read_views:  # (Nothing to prefetch from a view. The OS pages it in as it is used.)
+            for block_index in range(len(start_stop_list)):
+                yield result(read_block(block_index))
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(read_block, 0) if start_stop_list else None
+            for block_index in range(len(start_stop_list)):
+                snpdata_and_trained = future.result()
+                if block_index + 1 < len(start_stop_list):
+                    future = executor.submit(read_block, block_index + 1)
+                yield result(snpdata_and_trained)
+
     def kernel(
         self,
         standardizer,
@@ -653,6 +997,55 @@ class SnpReader(PstReader):
             standardizer, block_size=block_size, num_threads=num_threads
         )
 
+    @staticmethod
+    def _syrk_accumulate(K, val, alpha=1.0):
+        """
+        Adds alpha times val times its transpose into the upper triangle of the square K, in place.
+        Returns True if only that triangle was updated, in which case, call :meth:`_fill_lower_from_upper` once all blocks are added.
+
+        Uses the BLAS symmetric rank-k update, so only half of the product is computed and no temporary kernel is allocated.
+        Falls back to a general 'dot' for other array modules (e.g. cupy) and other dtypes.
+        """
+        xp = pstutil.get_array_module(K)
+        if (
+            xp is np
+            and K.dtype in (np.float64, np.float32)
+            and val.dtype == K.dtype
+            and (K.flags["F_CONTIGUOUS"] or K.flags["C_CONTIGUOUS"])
+            and K.flags["ALIGNED"]  # (a memory-mapped K may not be. Then BLAS would work on a copy.)
+        ):
+            from scipy.linalg.blas import get_blas_funcs
+
+            syrk = get_blas_funcs("syrk", (K,))
+            # K is symmetric so its transpose (a free view) can stand in when K is 'C' order.
+            # (Then the upper triangle of K_f is the lower triangle of K. _fill_lower_from_upper knows this.)
+            K_f = K if K.flags["F_CONTIGUOUS"] else K.T
+            if val.flags["F_CONTIGUOUS"]:
+                result = syrk(alpha, val, beta=1.0, c=K_f, trans=0, lower=0, overwrite_c=1)
+            else:
+                result = syrk(alpha, np.ascontiguousarray(val).T, beta=1.0, c=K_f, trans=1, lower=0, overwrite_c=1)
+            assert result is K_f or np.shares_memory(result, K_f), "real assert"
+            return True
+        if alpha == 1.0:
+            K += val.dot(val.T)
+        else:
+            K += alpha * val.dot(val.T)
+        return False
+
+    @staticmethod
+    def _fill_lower_from_upper(K, row_block_size=1000):
+        """
+        Copies the triangle written by :meth:`_syrk_accumulate` to the other triangle, in place, in blocks of rows to bound temporary memory.
+        """
+        K_f = K if K.flags["F_CONTIGUOUS"] else K.T
+        n = K_f.shape[0]
+        for start in range(0, n, row_block_size):
+            stop = min(start + row_block_size, n)
+            # Rows start:stop, columns 0:stop of the lower triangle come from the matching columns of the upper triangle
+            block = K_f[start:stop, :stop]
+            lower = np.tri(stop - start, stop, k=start - 1, dtype=bool)
+            block[lower] = K_f[:stop, start:stop].T[lower]
+
     @staticmethod
     def _as_snpdata(
         snpreader, standardizer, force_python_only, order, dtype, num_threads
@@ -691,14 +1084,26 @@ class SnpReader(PstReader):
         view_ok=False,
         return_trained=False,
         num_threads=None,
+        memory_budget=None,
     ):
         """
         Will respect the cupy environment variable.
         """
         dtype = np.dtype(dtype)
+        if block_size is None and memory_budget is not None:
+            # Room for the kernel and two (prefetched) blocks of SNP values
+            block_size = SnpReader._budget_block_size(
+                memory_budget,
+                self.sid_count,
+                bytes_per_sid=2 * self.iid_count * dtype.itemsize,
+                fixed_bytes=self.iid_count * self.iid_count * dtype.itemsize,
+                description=f"the {self.iid_count:,} x {self.iid_count:,} kernel",
+            )
         # Do all-at-once (not in blocks) if 1. No block size is given or 2. The #ofSNPs < Min(block_size,iid_count)
+        # (With a memory budget, only if all the SNPs fit in a block.)
         if block_size is None or (
-            self.sid_count <= block_size or self.sid_count <= self.iid_count
+            self.sid_count <= block_size
+            or (memory_budget is None and self.sid_count <= self.iid_count)
         ):
             train_data, trained_standardizer = SnpReader._as_snpdata(
                 self,
@@ -723,12 +1128,29 @@ class SnpReader(PstReader):
 
         else:  # Do in blocks
             xp = pstutil.array_module()
-            # Set the default order to 'C' because with kernels any order is fine and the Python .dot method likes 'C' best.
+            # Set the default order to 'C' because with kernels (which are symmetric) any order is fine.
             if order == "A":
                 order = "C"
             t0 = time.time()
             K = xp.zeros([self.iid_count, self.iid_count], dtype=dtype, order=order)
             trained_standardizer_list = []
+
+            if (
+                self._reads_int8
+                and xp is np
+                and not force_python_only
+                and type(standardizer) in [stdizer.Unit, stdizer.Beta]
+            ):
+                # Keep the genotypes as int8 until they are multiplied. See _read_kernel_int8
+                trained_standardizer_list = self._read_kernel_int8(
+                    K, standardizer, block_size, num_threads
+                )
+                logging.info("%.2f seconds elapsed" % (time.time() - t0))
+                if return_trained:
+                    return K, standardizer._merge_trained(trained_standardizer_list)
+                else:
+                    return K
+
             logging.info(
                 f"reading {self.sid_count:,} SNPs in blocks of {block_size:,} and adding up kernels (for {self.iid_count:,} individuals) with {xp.__name__}."
             )
@@ -736,33 +1158,34 @@ class SnpReader(PstReader):
             ct = 0
             ts = time.time()
             diff_last = 0
+            is_triangle_only = False
+            # With no standardization, a reader such as SnpMemMap can give views of its values, so they are multiplied in with no copying.
+            view_ok = type(standardizer) is stdizer.Identity and xp is np
 
-            for start in range(0, self.sid_count, block_size):
+            for train_data, trained_standardizer in self.iter_blocks(
+                block_size,
+                order="F",
+                dtype=dtype,
+                standardizer=None if view_ok else standardizer,
+                return_trained=True,
+                force_python_only=force_python_only,
+                num_threads=num_threads,
+                prefetch=True,  # read the next block while this one is multiplied into K
+                view_ok=view_ok,
+            ):
                 ct += block_size
-                train_data, trained_standardizer = SnpReader._as_snpdata(
-                    self[:, start : start + block_size],
-                    standardizer=standardizer,
-                    dtype=dtype,
-                    order="A",
-                    force_python_only=force_python_only,
-                    num_threads=num_threads,
-                )
                 trained_standardizer_list.append(trained_standardizer)
-                K += train_data._read_kernel(
-                    stdizer.Identity(),
-                    block_size=None,
-                    order=order,
-                    dtype=dtype,
-                    force_python_only=force_python_only,
-                    view_ok=False,
-                    num_threads=num_threads,
-                )
+                # Add this block's contribution into K's upper triangle. No per-block kernel is allocated.
+                is_triangle_only = SnpReader._syrk_accumulate(K, train_data.val)
                 if ct % block_size == 0:
                     diff = time.time() - ts
                     if diff > 1 and diff - diff_last > 5:
                         logging.info(f"read {ct:,} SNPs in {diff:.2f} seconds")
                         diff_last = diff
 
+            if is_triangle_only:
+                SnpReader._fill_lower_from_upper(K)
+
             t1 = time.time()
             logging.info("%.2f seconds elapsed" % (t1 - t0))
 
@@ -773,6 +1196,178 @@ class SnpReader(PstReader):
             else:
                 return K
 
+    def _read_kernel_int8(self, K, standardizer, block_size, num_threads):
+        """
+        Adds the kernel of the SNPs into K while keeping the genotypes in int8, an eighth (or quarter) the memory of float64 (or float32).
+
+        Each block of SNPs is read as int8. Then, one tile of the block at a time is converted to K's dtype, standardized
+        (which also finds the tile's Unit or Beta statistics), and multiplied into K. A tile uses no more memory than its int8 block.
+        Returns the list of trained standardizers, one per tile.
+        """
+        from pysnptools.snpreader import SnpData
+
+        dtype = K.dtype
+        tile_size = max(1, block_size // dtype.itemsize)
+        trained_standardizer_list = []
+        is_triangle_only = False
+        tile = None
+        for snpdata in self.iter_blocks(
+            block_size,
+            order="F",
+            dtype=np.int8,
+            num_threads=num_threads,
+            prefetch=True,
+        ):
+            for start in range(0, snpdata.sid_count, tile_size):
+                stop = min(start + tile_size, snpdata.sid_count)
+                genotypes = snpdata.val[:, start:stop]
+                if tile is None or tile.shape[1] != stop - start:
+                    tile = np.empty((snpdata.iid_count, stop - start), dtype=dtype, order="F")
+                tile[...] = genotypes
+                tile[genotypes == -127] = np.nan
+                _, trained = SnpData(
+                    snpdata.iid, snpdata.sid[start:stop], tile, pos=snpdata.pos[start:stop]
+                ).standardize(standardizer, return_trained=True, num_threads=num_threads)
+                trained_standardizer_list.append(trained)
+                is_triangle_only = SnpReader._syrk_accumulate(K, tile)
+
+        if is_triangle_only:
+            SnpReader._fill_lower_from_upper(K)
+        return trained_standardizer_list
+
+    @staticmethod
+    def _budget_block_size(memory_budget, sid_count, bytes_per_sid, fixed_bytes, description):
+        """
+        Returns the largest block size (a number of SNPs, at most sid_count) such that **fixed_bytes** (for the output)
+        plus **bytes_per_sid** for each SNP in a block fits in the memory budget. Logs the plan.
+        """
+        memory_budget = pstutil._memory_budget_bytes(memory_budget)
+        bytes_per_sid = max(bytes_per_sid, 1)
+        block_size = min((memory_budget - fixed_bytes) // bytes_per_sid, max(sid_count, 1))
+        if block_size < 1:
+            raise ValueError(
+                f"memory_budget of {memory_budget:,} bytes is too small for {description}. It must be at least {fixed_bytes + bytes_per_sid:,} bytes."
+            )
+        logging.info(
+            f"memory_budget of {memory_budget:,} bytes: {fixed_bytes:,} bytes for {description}, leaving room to read {block_size:,} of {sid_count:,} SNPs at a time"
+        )
+        return block_size
+
+    @staticmethod
+    def _kernel_block_plan(iid_count, sid_count, itemsize, memory_budget):
+        """
+        Given a memory budget (in bytes), returns a (block_size, iid_block_size) pair for :meth:`_read_kernel_into`.
+
+        Half the budget goes to the two (prefetched) SNP blocks and half to the row panel of the kernel.
+        """
+        memory_budget = pstutil._memory_budget_bytes(memory_budget)
+        half = memory_budget // 2
+        block_size = min(half // (2 * iid_count * itemsize), max(sid_count, 1))
+        iid_block_size = min(half // (iid_count * itemsize), iid_count)
+        if block_size < 1 or iid_block_size < 1:
+            raise ValueError(
+                f"memory_budget of {memory_budget:,} bytes is too small for {iid_count:,} individuals. It must be at least {4 * iid_count * itemsize:,} bytes."
+            )
+        logging.info(
+            f"memory_budget of {memory_budget:,} bytes: panels of {iid_block_size:,} kernel rows and blocks of {block_size:,} SNPs"
+        )
+        return block_size, iid_block_size
+
+    def _read_kernel_into(
+        self,
+        K,
+        standardizer,
+        block_size,
+        iid_block_size,
+        force_python_only=False,
+        num_threads=None,
+        return_trained=False,
+    ):
+        """
+        Fills the square K (typically a memory-mapped ndarray) with the kernel, one panel of **iid_block_size** rows at a time.
+
+        Only one panel (iid_block_size x iid_count) and two SNP blocks (iid_count x block_size) are in memory at once.
+        The first pass over the SNPs trains the standardizer, block by block. Each later pass reads only the
+        individuals at and after its panel and applies the trained statistics, filling its rows and, by symmetry, its columns.
+        """
+        iid_count = self.iid_count
+        assert K.shape == (iid_count, iid_count), "K must be iid_count x iid_count"
+        dtype = K.dtype
+        iid_block_size = min(iid_block_size, iid_count) or 1
+        panel_count = (iid_count + iid_block_size - 1) // iid_block_size
+        logging.info(
+            f"filling {iid_count:,} x {iid_count:,} kernel in {panel_count:,} panel(s) of {iid_block_size:,} rows, "
+            + f"each reading {self.sid_count:,} SNPs in blocks of {block_size:,}"
+        )
+
+        use_gemm = dtype in (np.float64, np.float32)
+        if use_gemm:
+            from scipy.linalg.blas import get_blas_funcs
+
+            gemm = get_blas_funcs("gemm", dtype=dtype)
+
+        trained_standardizer_list = []
+        t0 = time.time()
+        for panel_start in range(0, iid_count, iid_block_size):
+            panel_stop = min(panel_start + iid_block_size, iid_count)
+            reader = self if panel_start == 0 else self[panel_start:, :]
+            panel = np.zeros(
+                (panel_stop - panel_start, iid_count - panel_start),
+                dtype=dtype,
+                order="F",
+            )
+            for block_index, snpdata in enumerate(
+                reader.iter_blocks(
+                    block_size,
+                    order="F",
+                    dtype=dtype,
+                    force_python_only=force_python_only,
+                    num_threads=num_threads,
+                    prefetch=True,
+                    view_ok=type(standardizer) is stdizer.Identity,  # (Identity doesn't change the values)
+                )
+            ):
+                if panel_start == 0:
+                    snpdata, trained = snpdata.standardize(
+                        standardizer,
+                        return_trained=True,
+                        force_python_only=force_python_only,
+                        num_threads=num_threads,
+                    )
+                    trained_standardizer_list.append(trained)
+                else:
+                    # Standardize with the statistics learned on all the individuals in the first pass
+                    trained_standardizer_list[block_index].standardize(
+                        snpdata,
+                        force_python_only=force_python_only,
+                        num_threads=num_threads,
+                    )
+                val = snpdata.val
+                if use_gemm:
+                    result = gemm(
+                        1.0,
+                        val[: panel_stop - panel_start],
+                        val,
+                        beta=1.0,
+                        c=panel,
+                        trans_b=1,
+                        overwrite_c=1,
+                    )
+                    assert result is panel or np.shares_memory(result, panel), "real assert"
+                else:
+                    panel += val[: panel_stop - panel_start].dot(val.T)
+            K[panel_start:panel_stop, panel_start:] = panel
+            K[panel_start:, panel_start:panel_stop] = panel.T
+            logging.info(
+                f"filled kernel rows {panel_start:,} to {panel_stop:,} of {iid_count:,} ({time.time() - t0:.2f} seconds elapsed)"
+            )
+            del panel
+
+        if return_trained:
+            return K, standardizer._merge_trained(trained_standardizer_list)
+        else:
+            return K
+
     def copyinputs(self, copier):
         raise NotImplementedError
 
@@ -811,7 +1406,11 @@ class SnpReader(PstReader):
                 )
 
     @staticmethod
-    def _write_map_or_bim(snpdata, basefilename, remove_suffix, add_suffix):
+    def _write_map_or_bim(
+        snpdata, basefilename, remove_suffix, add_suffix, chromosome=None, alleles=("A", "C")
+    ):
+        # 'chromosome', if given, is written instead of pos[:,0] (for example, strings such as 'X')
+        # 'alleles' are the (placeholder) allele columns written on every line
         mapfile = SnpReader._name_of_other_file(basefilename, remove_suffix, add_suffix)
         with open(mapfile, "w") as map_filepointer:
             for sid_index, sid in enumerate(snpdata.sid):
@@ -819,8 +1418,20 @@ class SnpReader(PstReader):
                 posrow[
                     posrow != posrow
                 ] = 0  # Fill missing with zero as per the PLINK standard
+                chrom = float(posrow[0])
+                if chromosome is not None:
+                    chrom = chromosome[sid_index]
+                    chrom = 0.0 if chrom != chrom else chrom
                 map_filepointer.write(
-                    "%r\t%s\t%r\t%d\tA\tC\n" % (posrow[0], sid, posrow[1], posrow[2])
+                    "%s\t%s\t%r\t%d\t%s\t%s\n"
+                    % (
+                        chrom if isinstance(chrom, str) else repr(float(chrom)),
+                        sid,
+                        float(posrow[1]),
+                        posrow[2],
+                        alleles[0],
+                        alleles[1],
+                    )
                 )
 
     @staticmethod
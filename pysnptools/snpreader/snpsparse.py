@@ -0,0 +1,443 @@
+import logging
+import os
+import unittest
+import doctest
+import numpy as np
+import scipy.sparse as sparse
+import pysnptools.util as pstutil
+from pysnptools.snpreader import SnpReader
+
+
+class SnpSparse(SnpReader):
+    r"""
+    A :class:`.SnpReader` for reading \*.snp.sparse.npz files from disk. The SNP values are stored
+    sparsely, column by column (that is, in Compressed Sparse Column (CSC) format, one column per SNP), so
+    data, such as exome or whole-genome rare-variant panels, in which most values are 0 takes little space on disk and in memory.
+    Missing values are stored as NaN (and so take space).
+
+    See :class:`.SnpReader` for general examples of using SnpReaders.
+
+    Reading values densifies only the requested individuals and SNPs. :meth:`.SnpReader.read_kernel` with
+    :class:`.Unit`, :class:`.Beta` or (when no values are missing) :class:`.Identity` standardization
+    is computed from the sparse values, without densifying the SNPs.
+
+    **Constructor:**
+        :Parameters: * **filename** (*string*) -- The SnpSparse file to read.
+
+        :Example:
+
+        >>> from pysnptools.snpreader import SnpSparse, Bed
+        >>> import pysnptools.util as pstutil
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bed_file = example_file("pysnptools/examples/toydata.5chrom.*","*.bed")
+        >>> pstutil.create_directory_if_necessary("tempdir/toydata.snp.sparse.npz")
+        >>> data_on_disk = SnpSparse.write("tempdir/toydata.snp.sparse.npz", Bed(bed_file,count_A1=False))
+        >>> print((data_on_disk.iid_count, data_on_disk.sid_count))
+        (500, 10000)
+
+    **Methods beyond** :class:`.SnpReader`
+
+    """
+
+    def __init__(self, filename):
+        super(SnpSparse, self).__init__()
+        self._ran_once = False
+        self._filename = filename
+
+    def __repr__(self):
+        return "{0}('{1}')".format(self.__class__.__name__, self._filename)
+
+    @property
+    def row(self):
+        self._run_once()
+        return self._row
+
+    @property
+    def col(self):
+        self._run_once()
+        return self._col
+
+    @property
+    def col_property(self):
+        self._run_once()
+        return self._col_property
+
+    def _run_once(self):
+        if self._ran_once:
+            return
+        self._ran_once = True
+
+        with np.load(self._filename) as data:
+            self._row = np.array(data["row"], dtype="str")
+            self._col = np.array(data["col"], dtype="str")
+            self._col_property = data["col_property"]
+            self._matrix = sparse.csc_matrix(
+                (data["data"], data["indices"], data["indptr"]),
+                shape=tuple(data["shape"]),
+            )
+        self._stats = None
+
+    def copyinputs(self, copier):
+        # doesn't need to self._run_once()
+        copier.input(self._filename)
+
+    def _read(
+        self,
+        iid_index_or_none,
+        sid_index_or_none,
+        order,
+        dtype,
+        force_python_only,
+        view_ok,
+        num_threads,
+    ):
+        self._run_once()
+        dtype = np.dtype(dtype)
+        if order == "A":
+            order = "F"
+
+        # Select SNPs first: picking columns of a CSC matrix touches only their values.
+        matrix = self._matrix
+        if sid_index_or_none is not None:
+            matrix = matrix[:, sid_index_or_none]
+        if iid_index_or_none is not None:
+            matrix = matrix[iid_index_or_none, :]
+        return matrix.astype(dtype).toarray(order=order)
+
+    def _snp_stats(self):
+        """
+        Returns the (sid_count x 2) array of the mean and stddev of each SNP (over its non-missing values),
+        found with one weighted bincount of the stored values. As with the other standardizers, a stddev of zero is reported as infinity.
+        """
+        self._run_once()
+        if self._stats is None:
+            matrix = self._matrix
+            iid_count, sid_count = matrix.shape
+            sid_of_value = np.repeat(np.arange(sid_count), np.diff(matrix.indptr))
+            value = matrix.data.astype(np.float64)
+            is_missing = np.isnan(value)
+            observed_count = iid_count - np.bincount(
+                sid_of_value[is_missing], minlength=sid_count
+            )
+            is_observed = ~is_missing
+            sum1 = np.bincount(
+                sid_of_value[is_observed], weights=value[is_observed], minlength=sid_count
+            )
+            sum2 = np.bincount(
+                sid_of_value[is_observed],
+                weights=value[is_observed] ** 2,
+                minlength=sid_count,
+            )
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = sum1 / observed_count
+                std = np.sqrt(np.maximum(sum2 / observed_count - mean * mean, 0.0))
+            std[std == 0.0] = np.inf
+            self._stats = np.array([mean, std]).T
+        return self._stats
+
+    def trained_standardizer(self, standardizer=None):
+        """Returns a constant :class:`.Standardizer` (:class:`.UnitTrained` or :class:`.BetaTrained`) trained on every individual
+        in the file. The statistics come from the sparse values, without densifying any SNPs.
+
+        :param standardizer: optional -- :class:`.Unit` (default) or :class:`.Beta`.
+        :type standardizer: :class:`.Standardizer`
+
+        :rtype: :class:`.UnitTrained` or :class:`.BetaTrained`
+
+        >>> from pysnptools.snpreader import SnpSparse
+        >>> snp_sparse = SnpSparse("tempdir/toydata.snp.sparse.npz") # Written by the example above
+        >>> trained = snp_sparse.trained_standardizer()
+        >>> print('{0:.6f} {1:.6f}'.format(*trained.stats[0]))
+        1.212000 0.695022
+        """
+        from pysnptools.standardizer import Unit, Beta, UnitTrained, BetaTrained
+
+        if standardizer is None:
+            standardizer = Unit()
+        if type(standardizer) is Unit:
+            return UnitTrained(self.sid, self._snp_stats())
+        if type(standardizer) is Beta:
+            return BetaTrained(standardizer.a, standardizer.b, self.sid, self._snp_stats())
+        raise ValueError(
+            "Expect standardizer to be Unit() or Beta(...), not {0}".format(standardizer)
+        )
+
+    def _read_kernel(
+        self,
+        standardizer,
+        block_size=None,
+        order="A",
+        dtype=np.float64,
+        force_python_only=False,
+        view_ok=False,
+        return_trained=False,
+        num_threads=None,
+        memory_budget=None,
+    ):
+        """
+        Computes the kernel from the sparse values when the standardizer is Unit, Beta, or (with no missing values) Identity.
+        Otherwise, uses the general (dense, blocked) method.
+
+        Standardizing a SNP subtracts its mean, m, multiplies by a weight, w (1/stddev or the beta pdf of its minor allele frequency),
+        and sets missing values to 0. That is the same as filling missing values with m, giving X. So, with S = X diag(w)
+        (as sparse as X), u = S(m*w), and c = sum((m*w)**2), the kernel is S S' - u 1' - 1 u' + c.
+        """
+        import pysnptools.standardizer as stdizer
+
+        self._run_once()
+        dtype = np.dtype(dtype)
+        matrix = self._matrix
+        is_missing = np.isnan(matrix.data)
+        if (
+            pstutil.array_module() is not np
+            or type(standardizer) not in [stdizer.Unit, stdizer.Beta, stdizer.Identity]
+            or (type(standardizer) is stdizer.Identity and is_missing.any())
+        ):
+            return SnpReader._read_kernel(
+                self,
+                standardizer,
+                block_size=block_size,
+                order=order,
+                dtype=dtype,
+                force_python_only=force_python_only,
+                view_ok=view_ok,
+                return_trained=return_trained,
+                num_threads=num_threads,
+                memory_budget=memory_budget,
+            )
+
+        iid_count, sid_count = matrix.shape
+        if type(standardizer) is stdizer.Identity:
+            mean = np.zeros(sid_count)
+            weight = np.ones(sid_count)
+            trained_standardizer = stdizer.Identity()
+        else:
+            stats = self._snp_stats()
+            mean, std = stats[:, 0].copy(), stats[:, 1]
+            if type(standardizer) is stdizer.Unit:
+                weight = 1.0 / std
+                trained_standardizer = stdizer.UnitTrained(self.sid, stats)
+            else:
+                import scipy.stats as st
+
+                maf = mean / 2.0
+                maf[maf > 0.5] = 1.0 - maf[maf > 0.5]
+                weight = st.beta.pdf(maf, standardizer.a, standardizer.b)
+                trained_standardizer = stdizer.BetaTrained(
+                    standardizer.a, standardizer.b, self.sid, stats
+                )
+            # A SNP with no variation (or no values) standardizes to all zeros
+            is_zero = ~np.isfinite(std) | ~np.isfinite(mean)
+            weight[is_zero] = 0.0
+            mean[is_zero] = 0.0
+
+        sid_of_value = np.repeat(np.arange(sid_count), np.diff(matrix.indptr))
+        value = matrix.data.astype(np.float64)
+        value[is_missing] = mean[sid_of_value[is_missing]]
+        value *= weight[sid_of_value]
+        scaled = sparse.csc_matrix(
+            (value, matrix.indices, matrix.indptr), shape=matrix.shape
+        )
+
+        logging.info(
+            f"adding up the sparse kernel of {sid_count:,} SNPs ({matrix.nnz:,} stored values) for {iid_count:,} individuals"
+        )
+        K = np.zeros((iid_count, iid_count), dtype=np.float64)
+        # Bound the sparse product's temporary memory by multiplying block_size SNPs at a time
+        block_size = block_size or max(sid_count, 1)
+        for start in range(0, sid_count, block_size):
+            block = scaled[:, start : start + block_size].tocsr()
+            K += (block @ block.T).toarray()
+
+        mean_weight = mean * weight
+        u = scaled @ mean_weight
+        K -= u[:, np.newaxis]
+        K -= u[np.newaxis, :]
+        K += mean_weight @ mean_weight
+
+        K = np.asarray(K, dtype=dtype, order="C" if order == "A" else order)
+        if return_trained:
+            return K, trained_standardizer
+        else:
+            return K
+
+    @staticmethod
+    def write(filename, snpreader, block_size=None, num_threads=None):
+        """Writes a :class:`SnpReader` to SnpSparse format and returns the :class:`.SnpSparse`.
+
+        The SNPs are read (and made sparse) in blocks, so the dense data never needs to fit in memory.
+
+        :param filename: the name of the file to create
+        :type filename: string
+        :param snpreader: The data that should be written to disk. It can be any :class:`SnpReader`, for example, a :class:`Bed`.
+        :type snpreader: :class:`SnpReader`
+        :param block_size: optional -- The number of SNPs to read at once. The default reads about 16 million values at once.
+        :type block_size: number
+        :param num_threads: optional -- The number of threads with which to read data. Defaults to all available
+            processors. Can also be set with these environment variables (listed in priority order):
+            'PST_NUM_THREADS', 'NUM_THREADS', 'MKL_NUM_THREADS'.
+        :type num_threads: None or int
+        :rtype: :class:`.SnpSparse`
+
+        >>> from pysnptools.snpreader import SnpSparse, Bed
+        >>> import pysnptools.util as pstutil
+        >>> from pysnptools.util import example_file # Download and return local file name
+        >>> bed_file = example_file("pysnptools/examples/toydata.5chrom.*","*.bed")
+        >>> pstutil.create_directory_if_necessary("tempdir/toydata10.snp.sparse.npz")
+        >>> SnpSparse.write("tempdir/toydata10.snp.sparse.npz",Bed(bed_file,count_A1=False)[:,:10])
+        SnpSparse('tempdir/toydata10.snp.sparse.npz')
+        """
+        iid_count, sid_count = snpreader.iid_count, snpreader.sid_count
+        if block_size is None:
+            block_size = max(1, 2**24 // max(1, iid_count))
+        # Bed can give int8 genotypes (-127 for missing), an eighth the memory of float64
+        is_int8 = snpreader._reads_int8
+
+        data_list = []
+        indices_list = []
+        indptr = np.zeros(sid_count + 1, dtype=np.int64)
+        start = 0
+        for snpdata in snpreader.iter_blocks(
+            block_size,
+            order="F",
+            dtype=np.int8 if is_int8 else np.float32,
+            num_threads=num_threads,
+            prefetch=True,
+        ):
+            val = snpdata.val
+            if is_int8:
+                genotypes = val
+                val = val.astype(np.float32, order="F")
+                val[genotypes == -127] = np.nan
+            block = sparse.csc_matrix(val)  # (copies, so iter_blocks may re-use its buffer)
+            stop = start + snpdata.sid_count
+            indptr[start + 1 : stop + 1] = indptr[start] + block.indptr[1:]
+            data_list.append(block.data.astype(np.float32, copy=False))
+            indices_list.append(block.indices.astype(np.int32, copy=False))
+            start = stop
+
+        np.savez(
+            filename,
+            row=np.array(snpreader.row, dtype="S"),
+            col=np.array(snpreader.col, dtype="S"),
+            col_property=snpreader.col_property,
+            shape=np.array([iid_count, sid_count], dtype=np.int64),
+            data=np.concatenate(data_list) if data_list else np.zeros(0, dtype=np.float32),
+            indices=np.concatenate(indices_list) if indices_list else np.zeros(0, dtype=np.int32),
+            indptr=indptr,
+        )
+        logging.debug("Done writing " + filename)
+        return SnpSparse(filename)
+
+
+class TestSnpSparse(unittest.TestCase):
+    @staticmethod
+    def _rare_snpdata(seed=0, iid_count=60, sid_count=300):
+        from pysnptools.snpreader import SnpData
+
+        rng = np.random.RandomState(seed)
+        val = np.zeros((iid_count, sid_count))
+        is_set = rng.rand(iid_count, sid_count) < 0.03
+        val[is_set] = rng.choice([1.0, 2.0], size=is_set.sum())
+        val[rng.rand(iid_count, sid_count) < 0.01] = np.nan
+        val[:, 3] = 2.0  # no variation
+        val[2:, 4] = np.nan  # mostly missing
+        val[:, 5] = 1.0
+        val[0, 5] = np.nan  # no variation, plus a missing value
+        return SnpData(
+            iid=[["fam", "iid{0}".format(i)] for i in range(iid_count)],
+            sid=["sid{0}".format(i) for i in range(sid_count)],
+            val=val,
+            pos=np.array([[1, 0, i + 1] for i in range(sid_count)], dtype=float),
+        )
+
+    def _write(self, snpreader, name, **kwargs):
+        filename = "tempdir/snpsparse/{0}.snp.sparse.npz".format(name)
+        pstutil.create_directory_if_necessary(filename)
+        return SnpSparse.write(filename, snpreader, **kwargs)
+
+    def test_read(self):
+        snpdata = self._rare_snpdata()
+        snp_sparse = self._write(snpdata, "read", block_size=7)
+        assert np.array_equal(snp_sparse.iid, snpdata.iid)
+        assert np.array_equal(snp_sparse.sid, snpdata.sid)
+        assert np.array_equal(snp_sparse.pos, snpdata.pos)
+        assert snp_sparse.read().allclose(snpdata, equal_nan=True)
+        iid_index, sid_index = [5, 0, 5, 59], [299, 4, 10, 3, 10]
+        for order in ["F", "C", "A"]:
+            for dtype in [np.float32, np.float64]:
+                subset = snp_sparse[iid_index, sid_index].read(order=order, dtype=dtype)
+                assert subset.val.dtype == dtype
+                assert subset.allclose(
+                    snpdata[iid_index, sid_index].read(dtype=dtype), equal_nan=True
+                )
+
+    def test_write_from_bed(self):
+        from pysnptools.snpreader import Bed
+
+        bed = Bed(
+            os.path.dirname(os.path.realpath(__file__))
+            + "/../../tests/datasets/all_chr.maf0.001.N300",
+            count_A1=False,
+        )
+        snp_sparse = self._write(bed, "from_bed", block_size=100)
+        assert snp_sparse.read().allclose(bed.read(), equal_nan=True)
+
+    def test_kernel(self):
+        from pysnptools.standardizer import Unit, Beta, Identity
+
+        snpdata = self._rare_snpdata()
+        snp_sparse = self._write(snpdata, "kernel")
+        for standardizer in [Unit(), Beta(1, 25), Beta(2, 3)]:
+            for block_size in [None, 17]:
+                expected = snpdata.read_kernel(standardizer, block_size=block_size)
+                kerneldata = snp_sparse.read_kernel(standardizer, block_size=block_size)
+                assert np.allclose(kerneldata.val, expected.val), standardizer
+
+            K, trained = snp_sparse._read_kernel(standardizer, return_trained=True)
+            _, expected_trained = snpdata.read().standardize(standardizer, return_trained=True)
+            assert np.allclose(trained.stats, expected_trained.stats, equal_nan=True)
+            assert np.array_equal(trained.sid, snpdata.sid)
+
+        # Identity is computed sparsely only without missing values
+        no_missing = snpdata[:, 6:].read()
+        no_missing.val[np.isnan(no_missing.val)] = 0
+        snp_sparse = self._write(no_missing, "identity")
+        K = snp_sparse._read_kernel(Identity(), order="F", dtype=np.float32)
+        assert K.dtype == np.float32 and K.flags["F_CONTIGUOUS"]
+        assert np.allclose(K, no_missing.val.dot(no_missing.val.T))
+
+    def test_trained_standardizer(self):
+        from pysnptools.standardizer import Unit, Beta
+
+        snpdata = self._rare_snpdata()
+        snp_sparse = self._write(snpdata, "trained")
+        for standardizer in [Unit(), Beta(1, 25)]:
+            trained = snp_sparse.trained_standardizer(standardizer)
+            expected = snpdata.read().standardize(standardizer)
+            actual = snp_sparse[:, ::-1].read().standardize(trained)[:, ::-1].read()
+            assert np.allclose(actual.val, expected.val)
+        with self.assertRaises(ValueError):
+            snp_sparse.trained_standardizer(snp_sparse)
+
+
+def getTestSuite():
+    """
+    set up composite test suite
+    """
+
+    test_suite = unittest.TestSuite([])
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSnpSparse))
+    return test_suite
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    suites = getTestSuite()
+    r = unittest.TextTestRunner(failfast=True)
+    ret = r.run(suites)
+    assert ret.wasSuccessful()
+
+    result = doctest.testmod(optionflags=doctest.ELLIPSIS)
+    assert result.failed == 0, "failed doc test: " + __file__
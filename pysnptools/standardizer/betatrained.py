@@ -36,6 +36,7 @@ class BetaTrained(Standardizer):
         self.b=b
         self.sid=sid
         self.stats=stats
+        self.sid_to_index = None
 
     def __repr__(self):
         return "{0}(a={1},b={2},stats={3},sid={4})".format(self.__class__.__name__,self.a,self.b,self.stats,self.sid)
@@ -50,12 +51,18 @@ class BetaTrained(Standardizer):
 
         if hasattr(snps,"val"):
             val = snps.val
-            assert np.array_equal(self.sid,snps.sid), "sid in training and use must be the same and in the same order"
+            if len(self.sid) == len(snps.sid) and np.array_equal(self.sid, snps.sid):
+                stats = self.stats
+            else: # Each of snps' sids must be in the training sids, but they may be a subset and in any order
+                if getattr(self, "sid_to_index", None) is None:
+                    self.sid_to_index = {sid: index for index, sid in enumerate(self.sid)}
+                stats = np.array([self.stats[self.sid_to_index[sid]] for sid in snps.sid])
         else:
             warnings.warn("standardizing an nparray instead of a SnpData is deprecated", DeprecationWarning) #LATER test coverage
             val = snps
+            stats = self.stats
 
-        self._standardize_unit_and_beta(val, is_beta=True, a=self.a, b=self.b, apply_in_place=True,use_stats=True,stats=self.stats, num_threads=num_threads,
+        self._standardize_unit_and_beta(val, is_beta=True, a=self.a, b=self.b, apply_in_place=True,use_stats=True,stats=stats, num_threads=num_threads,
                                        force_python_only=force_python_only)
         if return_trained:
             return snps, self
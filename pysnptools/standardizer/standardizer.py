@@ -118,34 +118,29 @@ class Standardizer(object):
         """
         xp = pstutil.get_array_module(snps)
 
-        assert (
-            snps.flags["C_CONTIGUOUS"] or snps.flags["F_CONTIGUOUS"]
-        ), "Expect snps to be order 'C' or order 'F'"
-
-        # Make sure stats is the same type as snps. Because we might be creating a new array, we return it
+        # Make sure stats is the same type as snps (or, if snps is not float32 or float64, is float64).
+        # Because we might be creating a new array, we return it
+        stats_dtype = (
+            snps.dtype if snps.dtype in [np.float64, np.float32] else np.float64
+        )
+        stats_order = "C" if snps.flags["C_CONTIGUOUS"] else "F"
         if stats is None:
-            stats = xp.empty(
-                [snps.shape[1], 2],
-                dtype=snps.dtype,
-                order="F" if snps.flags["F_CONTIGUOUS"] else "C",
-            )
+            stats = xp.empty([snps.shape[1], 2], dtype=stats_dtype, order=stats_order)
         elif not (
-            stats.dtype == snps.dtype  # stats must have the same dtype as snps
+            stats.dtype == stats_dtype  # stats must have the same dtype as snps
             and (stats.flags["OWNDATA"])  # stats must own its data
-            and (snps.flags["C_CONTIGUOUS"] and stats.flags["C_CONTIGUOUS"])
-            or (
-                snps.flags["F_CONTIGUOUS"] and stats.flags["F_CONTIGUOUS"]
+            and (
+                (snps.flags["C_CONTIGUOUS"] and stats.flags["C_CONTIGUOUS"])
+                or (snps.flags["F_CONTIGUOUS"] and stats.flags["F_CONTIGUOUS"])
             )  # stats must have the same order as snps
         ):
-            stats = xp.array(
-                stats,
-                dtype=snps.dtype,
-                order="F" if snps.flags["F_CONTIGUOUS"] else "C",
-            )
+            stats = xp.array(stats, dtype=stats_dtype, order=stats_order)
         assert stats.shape == (snps.shape[1], 2), "stats must have size [sid_count,2]"
 
-        if not force_python_only and xp is np:
-            num_threads = get_num_threads(num_threads)
+        if xp is np and (
+            not force_python_only or snps.dtype not in [np.float64, np.float32]
+        ):
+            num_threads = 1 if force_python_only else get_num_threads(num_threads)
 
             if snps.dtype == np.float64:
                 if (snps.flags["F_CONTIGUOUS"] or snps.flags["C_CONTIGUOUS"]) and (
@@ -162,10 +157,6 @@ class Standardizer(object):
                         num_threads,
                     )
                     return stats
-                else:
-                    logging.info(
-                        "Array is not contiguous, so will standardize with python only instead of C++"
-                    )
             elif snps.dtype == np.float32:
                 if (snps.flags["F_CONTIGUOUS"] or snps.flags["C_CONTIGUOUS"]) and (
                     snps.flags["OWNDATA"] or snps.base.nbytes == snps.nbytes
@@ -181,15 +172,14 @@ class Standardizer(object):
                         num_threads,
                     )
                     return stats
-                else:
-                    logging.info(
-                        "Array is not contiguous, so will standardize with python only instead of C++"
-                    )
-            else:
-                logging.info(
-                    "Array type is not float64 or float32, so will standardize with python only instead of C++"
-                )
 
+            logging.info(
+                "Array is not a single contiguous segment of float64 or float32, so will standardize with multithreaded numpy instead of C++"
+            )
+            Standardizer._standardize_unit_and_beta_threaded(
+                snps, is_beta, a, b, apply_in_place, use_stats, stats, num_threads
+            )
+            return stats
 
         if is_beta:
             Standardizer._standardize_beta_python(
@@ -202,6 +192,75 @@ class Standardizer(object):
             )
             return stats
 
+    @staticmethod
+    def _standardize_unit_and_beta_threaded(
+        snps, is_beta, a, b, apply_in_place, use_stats, stats, num_threads
+    ):
+        """
+        Runs the Python standardizer on blocks of sids, one block per task on a pool of threads. (NumPy releases the GIL, so the blocks run in parallel.)
+        Works on any strides. Blocks that are not float64 or float32 are worked on as copies with the dtype of stats (float64).
+        With int8, -127 means missing and, because standardized values can't be stored in int8, only the stats can be found.
+        They are found, exactly, from integer sums of the values, so no float copy is made.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        is_float = snps.dtype in [np.float64, np.float32]
+        assert is_float or not apply_in_place or snps.dtype.kind == "f", (
+            "snps must be a float in order to standardize in place."
+        )
+        sid_count = snps.shape[1]
+        # A few blocks per thread balances the load. Blocks are at most 1000 sids to bound the memory of any copies.
+        block_size = max(1, min(1000, -(-sid_count // (num_threads * 4))))
+
+        def standardize_block(start):
+            stop = min(start + block_size, sid_count)
+            block = snps[:, start:stop]
+            if snps.dtype == np.int8:
+                if not use_stats:
+                    Standardizer._stats_from_int8(block, stats[start:stop])
+                return
+            if is_float:
+                work = block
+            else:
+                work = block.astype(stats.dtype)
+            if is_beta:
+                Standardizer._standardize_beta_python(
+                    work, a, b, apply_in_place, use_stats=use_stats, stats=stats[start:stop]
+                )
+            else:
+                Standardizer._standardize_unit_python(
+                    work, apply_in_place, use_stats=use_stats, stats=stats[start:stop]
+                )
+            if apply_in_place and work is not block:
+                block[...] = work
+
+        if num_threads <= 1 or sid_count <= block_size:
+            for start in range(0, sid_count, block_size):
+                standardize_block(start)
+        else:
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                # 'list' so that any exception is raised here
+                list(executor.map(standardize_block, range(0, sid_count, block_size)))
+
+    @staticmethod
+    def _stats_from_int8(block, stats):
+        """
+        Fills stats with the mean and stddev of each column of an int8 block (-127 means missing), computed from integer sums.
+        As with the other standardizers, a stddev of zero is reported as infinity.
+        Returns each column's count of non-missing values and sum of values.
+        """
+        observed = block != -127
+        count = observed.sum(axis=0)
+        sum1 = block.sum(axis=0, dtype=np.int64, where=observed)
+        sum2 = np.square(block, dtype=np.int16).sum(axis=0, dtype=np.int64, where=observed)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = sum1 / count
+            std = np.sqrt(np.maximum(sum2 / count - mean * mean, 0.0))
+        std[std == 0.0] = np.inf
+        stats[:, 0] = mean
+        stats[:, 1] = std
+        return count, sum1
+
     @staticmethod
     def _standardize_unit_python(snps, apply_in_place, use_stats, stats):
         """
@@ -19,8 +19,12 @@ from pysnptools.kernelreader.test import TestKrDocStrings
 from pysnptools.pstreader.test import TestPstReader
 from pysnptools.pstreader.test import TestPstDocStrings
 from pysnptools.pstreader.pstmemmap import TestPstMemMap
+from pysnptools.pstreader.pstchunked import TestPstChunked
 from pysnptools.snpreader.snpmemmap import TestSnpMemMap
+from pysnptools.kernelreader.kernelmemmap import TestKernelMemMap
+from pysnptools.kernelreader.kernelaccumulator import TestKernelAccumulator
 from pysnptools.snpreader.snpgen import TestSnpGen
+from pysnptools.snpreader.snpsparse import TestSnpSparse
 from pysnptools.snpreader.distributedbed import TestDistributedBed
 from pysnptools.util.generate import TestGenerate
 from pysnptools.util._example_file import TestExampleFile
@@ -33,6 +37,7 @@ from pysnptools.distreader.test import TestDistReaders
 import unittest
 import os.path
 import time
+import warnings
 
 
 class TestPySnpTools(unittest.TestCase):
@@ -566,12 +571,69 @@ class TestPySnpTools(unittest.TestCase):
                 np.random.seed(0)
                 x = np.array(np.random.randint(3, size=[60, 100]), dtype=dtype)
                 x2 = x[:, ::2]
-                _ = np.array(x2)
-                # LATER what's this about? It doesn't do non-contiguous?
-                # assert not x2.flags['C_CONTIGUOUS'] and not x2.flags['F_CONTIGUOUS'] #set up to test non contiguous
-                # assert x2b.flags['C_CONTIGUOUS'] or x2b.flags['F_CONTIGUOUS'] #set up to test non contiguous
-                # a,b = std.standardize(x2b),std.standardize(x2)
-                # np.testing.assert_array_almost_equal(a,b)
+                x2b = np.array(x2)
+                assert (
+                    not x2.flags["C_CONTIGUOUS"] and not x2.flags["F_CONTIGUOUS"]
+                )  # set up to test non contiguous
+                assert (
+                    x2b.flags["C_CONTIGUOUS"] or x2b.flags["F_CONTIGUOUS"]
+                )  # set up to test non contiguous
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", DeprecationWarning)
+                    a, b = std.standardize(x2b), std.standardize(x2)
+                np.testing.assert_array_almost_equal(a, b)
+                assert np.array_equal(x[:, 1::2], np.array(x[:, 1::2], dtype=int))  # untouched
+
+    def test_threaded_std(self):
+        from pysnptools.standardizer import Standardizer
+
+        snpreader = Bed(
+            self.currentFolder + "/examples/toydata.5chrom.bed", count_A1=False
+        )
+        val = snpreader.read().val
+        val[::7, ::3] = np.nan
+        for is_beta in [False, True]:
+            expected = val.copy()
+            expected_stats = Standardizer._standardize_unit_and_beta(
+                expected, is_beta, 1, 25, True, False, None, None
+            )
+            for num_threads in [1, 3]:
+                # A strided view of float64
+                big = np.full((val.shape[0], val.shape[1] * 2), 7.0, order="F")
+                big[:, ::2] = val
+                stats = Standardizer._standardize_unit_and_beta(
+                    big[:, ::2], is_beta, 1, 25, True, False, None, num_threads
+                )
+                np.testing.assert_array_almost_equal(big[:, ::2], expected, decimal=10)
+                np.testing.assert_array_almost_equal(stats, expected_stats, decimal=10)
+                assert np.all(big[:, 1::2] == 7.0)
+
+                # Applying trained stats to a strided view
+                big[:, ::2] = val
+                Standardizer._standardize_unit_and_beta(
+                    big[:, ::2], is_beta, 1, 25, True, True, expected_stats, num_threads
+                )
+                np.testing.assert_array_almost_equal(big[:, ::2], expected, decimal=10)
+
+                # float16 is standardized in place
+                val16 = val.astype(np.float16)
+                stats = Standardizer._standardize_unit_and_beta(
+                    val16, is_beta, 1, 25, True, False, None, num_threads
+                )
+                assert stats.dtype == np.float64
+                np.testing.assert_array_almost_equal(stats, expected_stats, decimal=10)
+                np.testing.assert_allclose(val16, expected, atol=0.02)
+
+                # int8 (-127 is missing) gives stats
+                val8 = np.where(np.isnan(val), -127, val).astype(np.int8)
+                stats = Standardizer._standardize_unit_and_beta(
+                    val8, is_beta, 1, 25, False, False, None, num_threads
+                )
+                np.testing.assert_array_almost_equal(stats, expected_stats, decimal=10)
+                with self.assertRaises(AssertionError):
+                    Standardizer._standardize_unit_and_beta(
+                        val8, is_beta, 1, 25, True, False, None, num_threads
+                    )
 
     def c_reader(self, snpreader):
         """
@@ -783,6 +845,397 @@ class TestPySnpTools(unittest.TestCase):
         result5 = result4.read(view_ok=True)
         self.assertTrue(np.may_share_memory(result4.val, result5.val))
 
+    def test_iter_blocks(self):
+        snpreader = Bed(
+            self.currentFolder + "/../tests/datasets/all_chr.maf0.001.N300.bed",
+            count_A1=False,
+        )
+        for reader in [snpreader, snpreader[::2, 5:900:3], snpreader.read()]:
+            expected = reader.read()
+            for order, prefetch in [("F", False), ("C", False), ("F", True)]:
+                for dtype in [np.float64, np.float32]:
+                    val_list = []
+                    for snpdata in reader.iter_blocks(
+                        37, order=order, dtype=dtype, prefetch=prefetch
+                    ):
+                        assert snpdata.val.dtype == dtype
+                        assert snpdata.val.flags[order + "_CONTIGUOUS"]
+                        assert np.array_equal(
+                            snpdata.sid, expected.sid[len(val_list) * 37:][: snpdata.sid_count]
+                        )
+                        val_list.append(snpdata.val.copy())
+                    np.testing.assert_array_almost_equal(
+                        np.concatenate(val_list, axis=1), expected.val, decimal=6
+                    )
+
+        # Standardizing each block matches standardizing all at once
+        expected = snpreader.read().standardize(Unit())
+        val_list = []
+        trained_list = []
+        for snpdata, trained in snpreader.iter_blocks(
+            100, standardizer=Unit(), return_trained=True, prefetch=True
+        ):
+            val_list.append(snpdata.val.copy())
+            trained_list.append(trained)
+        np.testing.assert_array_almost_equal(
+            np.concatenate(val_list, axis=1), expected.val, decimal=10
+        )
+        assert sum(len(trained.sid) for trained in trained_list) == snpreader.sid_count
+
+    def test_read_loco_kernels(self):
+        snpreader = Bed(self.currentFolder + "/examples/toydata.5chrom.bed", count_A1=False)
+        # With these block sizes, blocks span chromosome boundaries and chromosomes are split across blocks
+        for reader in [snpreader, snpreader[::2, ::-3]]:
+            chrom = reader.pos[:, 0]
+            for standardizer, dtype, block_size, folder in [
+                (Unit(), np.float64, None, None),
+                (Unit(), np.float64, 50, None),
+                (Beta(1, 25), np.float32, 77, self.currentFolder + "/tempdir/loco"),
+            ]:
+                loco_dict = reader.read_loco_kernels(
+                    standardizer, block_size=block_size, dtype=dtype, folder=folder
+                )
+                assert sorted(loco_dict.keys()) == sorted(set(chrom))
+                for c, loco in loco_dict.items():
+                    expected = reader[:, chrom != c].read_kernel(standardizer)
+                    assert np.array_equal(loco.iid, reader.iid)
+                    np.testing.assert_allclose(
+                        loco.read(dtype=dtype).val,
+                        expected.val,
+                        rtol=1e-4 if dtype == np.float32 else 1e-10,
+                        atol=1e-2 if dtype == np.float32 else 1e-8,
+                    )
+                    np.testing.assert_allclose(
+                        loco[3:9, ::-2].read().val,
+                        expected[3:9, ::-2].read().val,
+                        rtol=1e-4 if dtype == np.float32 else 1e-10,
+                        atol=1e-2 if dtype == np.float32 else 1e-8,
+                    )
+
+    def test_read_kernel_int8(self):
+        from pysnptools.snpreader import SnpData, SnpReader
+
+        snpdata = Bed(
+            self.currentFolder + "/../tests/datasets/all_chr.maf0.001.N300.bed",
+            count_A1=False,
+        ).read()
+        snpdata.val[::7, ::3] = np.nan
+        output = self.currentFolder + "/tempdir/missing.bed"
+        create_directory_if_necessary(output)
+        bed = Bed.write(output, snpdata, count_A1=False)
+        assert bed._reads_int8 and bed[::2, 3:]._reads_int8 and not snpdata._reads_int8
+
+        for standardizer in [Unit(), Beta(1, 25)]:
+            for dtype in [np.float64, np.float32]:
+                for reader, snpdata2 in [(bed, snpdata), (bed[::2, 3:], snpdata[::2, 3:].read())]:
+                    expected, expected_trained = SnpData(
+                        iid=snpdata2.iid, sid=snpdata2.sid, val=snpdata2.val.astype(dtype)
+                    )._read_kernel(standardizer, dtype=dtype, return_trained=True)
+                    for block_size in [40, 1000]:
+                        # (The general method, since a whole Bed has its own. See test_bed_packed_kernel.)
+                        kernel, trained = SnpReader._read_kernel(
+                            reader, standardizer, block_size=block_size, dtype=dtype, return_trained=True
+                        )
+                        assert kernel.dtype == dtype
+                        np.testing.assert_allclose(
+                            kernel, expected, rtol=1e-5 if dtype == np.float32 else 1e-10,
+                            atol=1e-2 if dtype == np.float32 else 1e-8
+                        )
+                        assert type(trained) is type(expected_trained)
+                        assert np.array_equal(trained.sid, expected_trained.sid)
+                        np.testing.assert_allclose(trained.stats, expected_trained.stats, rtol=1e-6)
+
+    def test_bed_snp_stats(self):
+        from pysnptools.standardizer import UnitTrained, BetaTrained
+
+        snpdata = Bed(
+            self.currentFolder + "/../tests/datasets/all_chr.maf0.001.N300.bed",
+            count_A1=False,
+        ).read()
+        snpdata.val[::7, ::3] = np.nan
+        snpdata.val[:, 5] = 1
+        output = self.currentFolder + "/tempdir/snpstats.bed"
+        create_directory_if_necessary(output)
+        Bed.write(output, snpdata, count_A1=False)
+        if os.path.exists(output + ".stats.npz"):
+            os.remove(output + ".stats.npz")
+
+        for count_A1 in [False, True, False]:
+            bed = Bed(output, count_A1=count_A1)
+            expected = bed.read()
+            stats = bed.read_snp_stats(block_size=7)
+            assert os.path.exists(output + ".stats.npz")
+            assert np.array_equal(stats["sid"], bed.sid)
+            assert np.array_equal(stats["missing_count"], np.isnan(expected.val).sum(axis=0))
+            assert np.array_equal(stats["allele_count"], np.nansum(expected.val, axis=0))
+            assert stats["std"][5] == np.inf
+
+            for standardizer, trained_type in [(Unit(), UnitTrained), (Beta(1, 25), BetaTrained)]:
+                trained = bed.trained_standardizer(standardizer)
+                assert type(trained) is trained_type
+                _, expected_trained = expected.read().standardize(standardizer, return_trained=True)
+                np.testing.assert_allclose(trained.stats, expected_trained.stats, rtol=1e-10)
+                subset = bed[::2, 3:]
+                np.testing.assert_allclose(
+                    subset.read_kernel(trained).val,
+                    subset.read().standardize(expected_trained).val.dot(subset.read().standardize(expected_trained).val.T),
+                    rtol=1e-10,
+                )
+
+        # A changed *.bed file invalidates the sidecar
+        snpdata.val[:, 0] = 0
+        os.utime(Bed.write(output, snpdata, count_A1=False).filename, ns=(0, 0))
+        stats = Bed(output, count_A1=False).read_snp_stats()
+        assert stats["allele_count"][0] == 0
+
+    def test_bed_packed_kernel(self):
+        from pysnptools.snpreader import SnpReader
+
+        snpdata = Bed(
+            self.currentFolder + "/../tests/datasets/all_chr.maf0.001.N300.bed",
+            count_A1=False,
+        )[:299, :].read()  # An iid_count that isn't a multiple of 4 leaves unused codes in each SNP's last byte
+        snpdata.val[::7, ::3] = np.nan
+        snpdata.val[:, 5] = 2
+        output = self.currentFolder + "/tempdir/packedkernel.bed"
+        create_directory_if_necessary(output)
+        Bed.write(output, snpdata, count_A1=False)
+
+        for count_A1 in [False, True]:
+            bed = Bed(output, count_A1=count_A1)
+            for standardizer in [Unit(), Beta(1, 25)]:
+                expected, expected_trained = SnpReader._read_kernel(
+                    bed, standardizer, return_trained=True
+                )
+                for block_size, order, dtype in [
+                    (None, "A", np.float64),
+                    (7, "F", np.float64),
+                    (100, "C", np.float32),
+                ]:
+                    K, trained = bed._read_kernel(
+                        standardizer, block_size=block_size, order=order, dtype=dtype, return_trained=True
+                    )
+                    assert K.dtype == dtype
+                    assert K.flags["F_CONTIGUOUS" if order == "F" else "C_CONTIGUOUS"]
+                    np.testing.assert_allclose(K, expected, rtol=1e-10 if dtype == np.float64 else 1e-4, atol=1e-3)
+                    np.testing.assert_allclose(trained.stats, expected_trained.stats, rtol=1e-10)
+                    assert np.array_equal(trained.sid, bed.sid)
+
+                np.testing.assert_allclose(
+                    bed.read_kernel(standardizer).val, expected, rtol=1e-10
+                )
+
+    def test_memory_budget(self):
+        from pysnptools.snpreader import SnpReader
+        from pysnptools.distreader import DistGen
+        from pysnptools.kernelreader import SnpKernel
+        from pysnptools.util import _memory_budget_bytes
+
+        assert _memory_budget_bytes("8GB") == 8 * 1000**3
+        assert _memory_budget_bytes(" 2 gib ") == 2 * 1024**3
+        assert _memory_budget_bytes("1.5MB") == 1500 * 1000
+        assert _memory_budget_bytes(123) == 123
+        with self.assertRaises(ValueError):
+            _memory_budget_bytes("8 GBs")
+
+        bed = Bed(
+            self.currentFolder + "/../tests/datasets/all_chr.maf0.001.N300.bed",
+            count_A1=False,
+        )
+        kernel_bytes = 300 * 300 * 8
+        for standardizer in [Unit(), Beta(1, 25)]:
+            for reader in [bed, bed[:, ::2], bed.read()]:
+                expected = SnpReader._read_kernel(reader, standardizer)
+                with self.assertLogs(level=logging.INFO) as log:
+                    kerneldata = reader.read_kernel(standardizer, memory_budget=kernel_bytes + 50 * 300 * 8 * 10)
+                assert any("memory_budget" in line for line in log.output)
+                np.testing.assert_allclose(kerneldata.val, expected, rtol=1e-10)
+                np.testing.assert_allclose(
+                    SnpKernel(reader, standardizer, memory_budget="1MB").read().val, expected, rtol=1e-10
+                )
+            with self.assertRaises(ValueError):
+                bed.read_kernel(standardizer, memory_budget=kernel_bytes)
+        assert "memory_budget='8GB'" in repr(SnpKernel(bed, Unit(), memory_budget="8GB"))
+
+        distgen = DistGen(seed=0, iid_count=100, sid_count=50)
+        expected = distgen.as_snp().read().val
+        snpreader = distgen.as_snp(memory_budget=100 * 50 * 8 + 10 * 100 * 3 * 8)
+        assert repr(snpreader).endswith("memory_budget=64000)")
+        np.testing.assert_allclose(snpreader.read().val, expected, rtol=1e-10)
+        np.testing.assert_allclose(snpreader[::2, 1:].read().val, expected[::2, 1:], rtol=1e-10)
+        with self.assertRaises(ValueError):
+            distgen.as_snp(memory_budget="10KB").read()
+
+    def test_bed_write_in_blocks(self):
+        from pysnptools.snpreader import SnpData, SnpGen
+
+        snpdata = Bed(
+            self.currentFolder + "/examples/toydata.5chrom.bed", count_A1=False
+        )[::3, ::20].read()
+        snpdata.val[::7, ::3] = np.nan
+        output = self.currentFolder + "/tempdir/inblocks.bed"
+        expected_output = self.currentFolder + "/tempdir/inone.bed"
+        create_directory_if_necessary(output)
+
+        for count_A1 in [False, True]:
+            source_bed = Bed.write(self.currentFolder + "/tempdir/source.bed", snpdata, count_A1=count_A1)
+            for source in [snpdata, source_bed[:, ::2], SnpGen(seed=0, iid_count=101, sid_count=50)]:
+                Bed.write(expected_output, source.read(), count_A1=count_A1)
+                expected_bytes = {suffix: open(expected_output[:-3] + suffix, "rb").read() for suffix in ["bed", "fam", "bim"]}
+                for block_size in [1, 7, 1000]:
+                    bed = Bed.write(output, source, count_A1=count_A1, block_size=block_size)
+                    for suffix in ["bed", "fam", "bim"]:
+                        assert open(output[:-3] + suffix, "rb").read() == expected_bytes[suffix]
+                    np.testing.assert_array_equal(bed.read().val, source.read().val)
+                    assert np.array_equal(bed.iid, source.iid) and np.array_equal(bed.sid, source.sid)
+                    np.testing.assert_array_equal(bed.pos, source.pos)
+
+        Bed.write(expected_output, snpdata, count_A1=False, reverse_chrom_map={1: "X"})
+        bed = Bed.write(output, snpdata, count_A1=False, block_size=5, reverse_chrom_map={1: "X"})
+        assert open(output[:-3] + "bim", "rb").read() == open(expected_output[:-3] + "bim", "rb").read()
+        assert all(line.startswith("X\t") == (chrom == 1) for line, chrom in zip(open(output[:-3] + "bim"), snpdata.pos[:, 0]))
+
+        bad_output = self.currentFolder + "/tempdir/bad.bed"
+        with self.assertRaises(ValueError):
+            Bed.write(bad_output, SnpData(iid=[["f", "i"]], sid=["s"], val=[[0.5]]), count_A1=False, block_size=1)
+        for suffix in ["bed", "bed.temp", "fam", "bim"]:
+            assert not os.path.exists(bad_output[:-3] + suffix)
+
+    def test_bed_lazy_metadata(self):
+        filename = self.currentFolder + "/../tests/datasets/distributed_bed_test1_X.bed"
+        expected = Bed(filename, count_A1=False).read()
+
+        # Counting and reading values don't parse the *.bim file
+        bed = Bed(filename, count_A1=False)
+        assert bed.sid_count == expected.sid_count and not hasattr(bed, "_col")
+        for indexer in [[0, 5, -1], slice(-3, None), slice(None, None, 50)]:
+            snpdata = bed[::2, indexer].read()
+            assert np.array_equal(snpdata.sid, expected.sid[indexer])
+            np.testing.assert_array_equal(snpdata.pos, expected.pos[indexer])
+            np.testing.assert_array_equal(snpdata.val, expected.val[::2, indexer])
+        assert not hasattr(bed, "_col") and not hasattr(bed, "_col_property")
+
+        # The *.bim file is scanned only as far as the wanted lines, and the lines are read in blocks
+        bed = Bed(filename, count_A1=False)
+        bed._bim_lines_per_offset, bed._bim_scan_chunk_size = 7, 64
+        assert np.array_equal(bed[:, [9, 2]].sid, expected.sid[[9, 2]])
+        assert bed._bim_scanned[0] < os.path.getsize(filename[:-3] + "bim")
+        for indexer in [[50, 13, 14, 6, 50], [-1, 0], [98, 97], slice(69, 77), slice(None, None, -25), []]:
+            assert np.array_equal(bed[:, indexer].sid, expected.sid[indexer])
+            np.testing.assert_array_equal(bed[:, indexer].pos, expected.pos[indexer])
+        assert len(bed._bim_offsets) == 15 and not hasattr(bed, "_col")
+
+        # Out-of-bounds indexes still raise, for any reader, even though the counts don't need the sids
+        for reader in [bed, expected]:
+            for indexer in [[100], [0, expected.sid_count], [-expected.sid_count - 1]]:
+                with self.assertRaises(IndexError):
+                    reader[:, indexer].sid_count
+            with self.assertRaises(IndexError):
+                reader[[reader.iid_count], :].read()
+            assert reader[:, [-expected.sid_count, expected.sid_count - 1]].sid_count == 2
+
+        # The binary cache is re-used until the *.bim file changes
+        output = self.currentFolder + "/tempdir/lazy.bed"
+        create_directory_if_necessary(output)
+        Bed.write(output, expected, count_A1=False)
+        if os.path.exists(output[:-3] + "bim.npz"):
+            os.remove(output[:-3] + "bim.npz")
+        for _ in range(2):
+            bed = Bed(output, count_A1=False, metadata_cache=True)
+            assert np.array_equal(bed.sid, expected.sid)
+            np.testing.assert_array_equal(bed.pos, expected.pos)
+            assert os.path.exists(output[:-3] + "bim.npz")
+        Bed.write(output, expected[:, :3].read(), count_A1=False)
+        os.utime(output[:-3] + "bim", ns=(0, 0))
+        assert np.array_equal(Bed(output, count_A1=False, metadata_cache=True).sid, expected.sid[:3])
+
+    def test_key_index(self):
+        from pysnptools.pstreader import PstData
+        from pysnptools.pstreader._keyindex import _KeyIndex
+
+        snpreader = Bed(self.currentFolder + "/examples/toydata.5chrom.bed", count_A1=False)
+        np.random.seed(0)
+        sid_index = np.random.permutation(snpreader.sid_count)[:100]
+        iid_index = np.random.permutation(snpreader.iid_count)[:50]
+        assert np.array_equal(snpreader.sid_to_index(snpreader.sid[sid_index]), sid_index)
+        assert np.array_equal(snpreader.sid_to_index(list(snpreader.sid[sid_index])), sid_index)
+        assert np.array_equal(snpreader.iid_to_index(snpreader.iid[iid_index]), iid_index)
+        assert np.array_equal(snpreader.iid_to_index([list(iid) for iid in snpreader.iid[iid_index]]), iid_index)
+        assert len(snpreader.sid_to_index([])) == 0
+        with self.assertRaises(KeyError):
+            snpreader.sid_to_index(["null_0", "no_such_sid"])
+        with self.assertRaises(KeyError):
+            snpreader.iid_to_index([["no", "such"]])
+
+        # Hashes don't depend on the string width, and collisions are resolved by comparing keys
+        keys = np.array(["a", "bb", "ccc", ""])
+        assert np.array_equal(_KeyIndex._hash(keys), _KeyIndex._hash(keys.astype("<U10")))
+        iid = np.array([["fam1", "i1"], ["fam1", "longiid2"], ["f", ""]])
+        assert np.array_equal(_KeyIndex._hash(iid), _KeyIndex._hash(iid.astype("<U20")))
+        pstdata = PstData(row=iid, col=["a"], val=np.zeros((3, 1)))
+        assert np.array_equal(pstdata.row_to_index([["fam1", "i1"]]), [0])
+        assert np.array_equal(pstdata.row_to_index(np.array([["f", ""], ["fam1", "i1"]], dtype="<U30")), [2, 0])
+
+        class _CollidingKeyIndex(_KeyIndex):
+            @staticmethod
+            def _hash(keys):
+                return np.zeros(len(keys), dtype=np.uint64)
+
+        key_index = _CollidingKeyIndex(keys)
+        assert np.array_equal(key_index.index(np.array(["ccc", "a", ""])), [2, 0, 3])
+        assert len(key_index.duplicates()) == 0
+        assert len(_CollidingKeyIndex(np.array(["a", "b", "a"])).duplicates()) == 1
+
+        # Non-string keys still work
+        pstdata = PstData(row=[1, 2, 3], col=[(1, "a"), (2, "b")], val=np.zeros((3, 2)))
+        assert np.array_equal(pstdata.row_to_index([3, 1]), [2, 0])
+        with self.assertRaises(Exception):
+            PstData(row=[["a", "b"], ["a", "b"]], col=["c"], val=[[1.0], [2.0]]).row_to_index([["a", "b"]])
+        with self.assertRaises(AssertionError):
+            PstData(row=["r"], col=["c", "c"], val=[[1.0, 2.0]]).col_to_index(["c"])
+
+        # With metadata_cache, a Bed's sid index is saved and memory mapped back
+        output = self.currentFolder + "/tempdir/keyindex.bed"
+        create_directory_if_necessary(output)
+        Bed.write(output, snpreader[:, ::10].read(), count_A1=False)
+        for _ in range(2):
+            bed = Bed(output, count_A1=False, metadata_cache=True)
+            assert np.array_equal(bed.sid_to_index(bed.sid[::-3]), np.arange(bed.sid_count)[::-3])
+            assert os.path.exists(output[:-3] + "bim.sid_index.npy")
+        assert isinstance(bed._col_key_index._hash_sorted, np.memmap)
+
+    def test_region(self):
+        from pysnptools.snpreader import SnpData
+        from pysnptools.distreader import DistData
+        from pysnptools.util import IntRangeSet
+
+        np.random.seed(0)
+        sid_count = 1000
+        pos = np.array([np.random.choice([1, 2, 23], sid_count), np.zeros(sid_count), np.random.randint(1, 5000, sid_count)], dtype=float).T
+        pos[::97, 2] = np.nan
+        snpdata = SnpData(iid=[["f", "i"]], sid=["sid{0}".format(i) for i in range(sid_count)], val=np.zeros((1, sid_count)), pos=pos)
+        distdata = DistData(iid=snpdata.iid, sid=snpdata.sid, val=np.full((1, sid_count, 3), 1 / 3.0), pos=pos)
+
+        def in_region(chrom, start, stop):  # start and stop are inclusive
+            return (pos[:, 0] == chrom) & (pos[:, 2] >= start) & (pos[:, 2] <= stop)
+
+        def expected(chrom, start, stop):
+            return snpdata.sid[in_region(chrom, start, stop)]
+
+        for reader in [snpdata, distdata]:
+            for _ in range(20):
+                chrom = np.random.choice([1, 2, 23])
+                start = np.random.randint(0, 5000)
+                stop = start + np.random.randint(0, 1000)
+                assert np.array_equal(reader.region("{0}:{1}-{2}".format(chrom, start, stop)).sid, expected(chrom, start, stop))
+                assert np.array_equal(reader.region({chrom: IntRangeSet((start, stop + 1))}).sid, expected(chrom, start, stop))
+            assert np.array_equal(reader.region("chrX:1,000-2,000").sid, expected(23, 1000, 2000))
+            assert np.array_equal(reader.region("2").sid, expected(2, 0, np.inf))
+            assert np.array_equal(reader.region(["1:10", "1:5-3000", "2:4000-4100"]).sid, snpdata.sid[in_region(1, 5, 3000) | in_region(2, 4000, 4100)])
+            assert reader.region("7:1-100").sid_count == 0 and reader.region([]).sid_count == 0
+            with self.assertRaises(ValueError):
+                reader.region("1:a-b")
+
     def test_load_and_standardize_hdf5(self):
         snpreader2 = SnpHdf5(self.currentFolder + "/examples/toydata.snpmajor.snp.hdf5")
         snpreader3 = SnpHdf5(self.currentFolder + "/examples/toydata.iidmajor.snp.hdf5")
@@ -910,6 +1363,44 @@ class TestPySnpTools(unittest.TestCase):
 
         os.chdir(previous_wd)
 
+    def test_merge_threads(self):
+        from pysnptools.snpreader import _MergeIIDs, _MergeSIDs
+
+        previous_wd = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)))
+
+        bed = Bed("examples/toydata.5chrom.bed", count_A1=True)
+        expected = bed.read().val
+        merge_sids = _MergeSIDs([bed[:, :100], bed[:, 100:101], bed[:, 101:].read()])
+        merge_iids = _MergeIIDs([bed[:100, :], bed[100:101, :], bed[101:, :].read()])
+        rng = np.random.RandomState(0)
+
+        for num_threads in [1, 3]:
+            for order in ["F", "C"]:
+                for dtype in [np.float32, np.float64]:
+                    val = merge_sids.read(
+                        order=order, dtype=dtype, num_threads=num_threads
+                    ).val
+                    np.testing.assert_array_equal(val, expected.astype(dtype))
+                    val = merge_iids.read(
+                        order=order, dtype=dtype, num_threads=num_threads
+                    ).val
+                    np.testing.assert_array_equal(val, expected.astype(dtype))
+
+            # Out of order and repeated indexes that go back and forth between subreaders
+            sid_index = rng.randint(bed.sid_count, size=150)
+            iid_index = rng.randint(bed.iid_count, size=150)
+            np.testing.assert_array_equal(
+                merge_sids[iid_index, sid_index].read(num_threads=num_threads).val,
+                expected[iid_index][:, sid_index],
+            )
+            np.testing.assert_array_equal(
+                merge_iids[iid_index, sid_index].read(num_threads=num_threads).val,
+                expected[iid_index][:, sid_index],
+            )
+
+        os.chdir(previous_wd)
+
     def test_respect_read_inputs(self):
         from pysnptools.snpreader import _MergeIIDs, _MergeSIDs, SnpGen, SnpMemMap
 
@@ -1061,7 +1552,7 @@ class TestPySnpTools(unittest.TestCase):
         logging.info("done with 'test_writes'")
 
     def test_writes2(self):
-        from pysnptools.snpreader import SnpData, SnpHdf5, SnpNpz, SnpMemMap
+        from pysnptools.snpreader import SnpData, SnpHdf5, SnpNpz, SnpMemMap, SnpChunked
 
         the_class_and_suffix_list = [
             (DistributedBed, "distributed_bed", None, None),
@@ -1073,6 +1564,14 @@ class TestPySnpTools(unittest.TestCase):
             (SnpHdf5, "hdf5", None, None),
             (SnpNpz, "npz", None, None),
             (SnpMemMap, "memmap", None, None),
+            (
+                SnpChunked,
+                "chunked",
+                None,
+                lambda filename, snpdata: SnpChunked.write(
+                    filename, snpdata, chunk_shape=(2, 3)
+                ),
+            ),
         ]
         cant_do_col_prop_none_set = {"dense", "distributed_bed"}
         cant_do_col_len_0_set = {"distributed_bed"}
@@ -1475,6 +1974,28 @@ class TestSnpDocStrings(unittest.TestCase):
         os.chdir(old_dir)
         assert result.failed == 0, "failed doc test: " + __file__
 
+    def test_snpsparse(self):
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)) + "/snpreader")
+        import pysnptools.snpreader.snpsparse
+
+        result = doctest.testmod(
+            pysnptools.snpreader.snpsparse, optionflags=doctest.ELLIPSIS
+        )
+        os.chdir(old_dir)
+        assert result.failed == 0, "failed doc test: " + __file__
+
+    def test_snpchunked(self):
+        old_dir = os.getcwd()
+        os.chdir(os.path.dirname(os.path.realpath(__file__)) + "/snpreader")
+        import pysnptools.snpreader.snpchunked
+
+        result = doctest.testmod(
+            pysnptools.snpreader.snpchunked, optionflags=doctest.ELLIPSIS
+        )
+        os.chdir(old_dir)
+        assert result.failed == 0, "failed doc test: " + __file__
+
     def test_snpnpz(self):
         old_dir = os.getcwd()
         os.chdir(os.path.dirname(os.path.realpath(__file__)) + "/snpreader")
@@ -1570,10 +2091,14 @@ def getTestSuite():
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestPstDocStrings))
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestKrDocStrings))
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSnpGen))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSnpSparse))
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestGenerate))
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestExampleFile))
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestPstMemMap))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestPstChunked))
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSnpMemMap))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestKernelMemMap))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestKernelAccumulator))
     test_suite.addTests(NaNCNCTestCases.factory_iterator())
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestPstReader))
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestKernelReader))
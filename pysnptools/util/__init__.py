@@ -194,12 +194,18 @@ def _reindex_snpkernel(snpkernel, iididx, is_test=False):
     if not is_test:
         new_reader = snpkernel.snpreader[iididx, :]
         result = SnpKernel(
-            new_reader, snpkernel.standardizer, block_size=snpkernel.block_size
+            new_reader,
+            snpkernel.standardizer,
+            block_size=snpkernel.block_size,
+            memory_budget=snpkernel.memory_budget,
         )
     else:
         new_reader = snpkernel.test[iididx, :]
         result = SnpKernel(
-            snpkernel.snpreader, snpkernel.standardizer, block_size=snpkernel.block_size
+            snpkernel.snpreader,
+            snpkernel.standardizer,
+            block_size=snpkernel.block_size,
+            memory_budget=snpkernel.memory_budget,
         )
     return result
 
@@ -523,6 +529,45 @@ def format_delta(delta_seconds):
     return datetime.timedelta(seconds=delta_seconds)
 
 
+_memory_budget_units = {
+    "": 1,
+    "k": 1000,
+    "m": 1000**2,
+    "g": 1000**3,
+    "t": 1000**4,
+    "ki": 1024,
+    "mi": 1024**2,
+    "gi": 1024**3,
+    "ti": 1024**4,
+}
+
+
+def _memory_budget_bytes(memory_budget):
+    """
+    Returns a memory budget, given as a number of bytes or as a string such as "8GB", "500 MB", or "1.5GiB", as a number of bytes.
+    (KB, MB, GB, and TB are powers of 1000. KiB, MiB, GiB, and TiB are powers of 1024.)
+
+    >>> from pysnptools.util import _memory_budget_bytes
+    >>> print(_memory_budget_bytes("8GB"), _memory_budget_bytes("1.5 KiB"), _memory_budget_bytes(500_000))
+    8000000000 1536 500000
+    """
+    if isinstance(memory_budget, str):
+        import re
+
+        match = re.match(
+            r"^\s*(\d+(?:\.\d*)?|\.\d+)\s*([kmgt]i?)?b?\s*$", memory_budget, re.IGNORECASE
+        )
+        if match is None:
+            raise ValueError(
+                "Expect memory_budget to be a number of bytes or a string such as '8GB' or '500MB', not '{0}'".format(memory_budget)
+            )
+        number, unit = match.groups()
+        return int(float(number) * _memory_budget_units[(unit or "").lower()])
+    if memory_budget < 0:
+        raise ValueError("Expect memory_budget to be non-negative, not {0}".format(memory_budget))
+    return int(memory_budget)
+
+
 def _mbps(size, delta):
     return size * 8 / delta / 1e6
 
@@ -0,0 +1,90 @@
+import re
+import numpy as np
+from pysnptools.util.intrangeset import IntRangeSet
+
+_region_pattern = re.compile(r"^(?:chr)?([^:]+)(?::(\d+)(?:-(\d+))?)?$", re.IGNORECASE)
+
+
+class _PosIndex(object):
+    """
+    The SNPs (or other cols) sorted by chromosome and then base-pair position, so that the SNPs
+    in a genomic region can be found with binary search. SNPs with a missing chromosome or
+    base-pair position are never in a region.
+    """
+
+    def __init__(self, pos):
+        chromosome = pos[:, 0]
+        bp_position = pos[:, 2]
+        index = np.flatnonzero(~(np.isnan(chromosome) | np.isnan(bp_position)))
+        order = np.lexsort((bp_position[index], chromosome[index]))
+        self._index = index[order]
+        self._chromosome = chromosome[self._index]
+        self._bp_position = bp_position[self._index]
+
+    def index(self, region):
+        """
+        Returns, in increasing order, the indexes of the cols in the region(s).
+        """
+        chrom_list, start_list, stop_list = _PosIndex._parse(region)
+        chrom_array = np.array(chrom_list, dtype=np.float64)
+        start_array = np.array(start_list, dtype=np.float64)
+        stop_array = np.array(stop_list, dtype=np.float64)
+
+        piece_list = []
+        for chrom in np.unique(chrom_array):
+            chrom_start, chrom_stop = (
+                np.searchsorted(self._chromosome, chrom, side="left"),
+                np.searchsorted(self._chromosome, chrom, side="right"),
+            )
+            bp_position = self._bp_position[chrom_start:chrom_stop]
+            is_chrom = chrom_array == chrom
+            starts = chrom_start + np.searchsorted(bp_position, start_array[is_chrom], side="left")
+            stops = chrom_start + np.searchsorted(bp_position, stop_array[is_chrom], side="left")
+            piece_list.extend(self._index[start:stop] for start, stop in zip(starts, stops))
+
+        if len(piece_list) == 0:
+            return np.zeros(0, dtype=np.intp)
+        return np.unique(np.concatenate(piece_list))  # Sorted, and without the duplicates from overlapping regions
+
+    @staticmethod
+    def _parse(region):
+        chrom_list, start_list, stop_list = [], [], []
+
+        def add(chrom, start, stop):
+            chrom_list.append(chrom)
+            start_list.append(start)
+            stop_list.append(stop)
+
+        region_list = region if isinstance(region, list) else [region]
+        for region in region_list:
+            if isinstance(region, str):
+                match = _region_pattern.match(region.replace(",", "").strip())
+                if match is None:
+                    raise ValueError(
+                        "Expect region to look like '1:1000000-2000000', '1:1000000', or '1', not '{0}'".format(region)
+                    )
+                chrom, first, last = match.groups()
+                if first is None:  # The whole chromosome
+                    add(_PosIndex._chrom_number(chrom), -np.inf, np.inf)
+                else:  # 'first' and 'last' are inclusive
+                    add(_PosIndex._chrom_number(chrom), int(first), int(first if last is None else last) + 1)
+            elif isinstance(region, dict):
+                for chrom, ranges_input in region.items():
+                    for start, stop in IntRangeSet(ranges_input).ranges():
+                        add(_PosIndex._chrom_number(chrom), start, stop)
+            else:
+                raise ValueError(
+                    "Expect region to be a string, a dictionary from chromosome to IntRangeSet, or a list of these, not '{0}'".format(region)
+                )
+        return chrom_list, start_list, stop_list
+
+    @staticmethod
+    def _chrom_number(chrom):
+        from pysnptools.snpreader.bed import plink_chrom_map
+
+        if isinstance(chrom, str):
+            chrom = chrom.strip()
+            if chrom.lower().startswith("chr"):
+                chrom = chrom[3:]
+            chrom = plink_chrom_map.get(chrom.upper(), chrom)
+        return float(chrom)